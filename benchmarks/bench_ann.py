@@ -0,0 +1,103 @@
+"""
+Recall@k versus latency for the approximate nearest neighbor options
+
+Sweeps nprobe of the IVF index of MemmapVectorStore and search_ef of
+Chroma's HNSW index over synthetic clustered embeddings, and prints recall
+against exact search next to p50/p95/p99 latency, so that settings can be
+picked for a latency target.
+
+Usage:
+    python benchmarks/bench_ann.py [--vectors 100000] [--dim 1536] [--nlist 1024]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.embeddings.fake import FakeEmbeddings
+from langchain.vectorstores import Chroma
+
+from benchmarks.bench_vector_store import make_vectors, BATCH_SIZE
+from src.models.memmap_store import MemmapVectorStore
+
+
+def report(name, search, queries, truth, k):
+    """Run the queries and print recall and latency percentiles"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found) & set(expected))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:<22} recall@{k} {hits / truth.size:6.3f}  p50 {p50:7.2f}  p95 {p95:7.2f}  p99 {p99:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=100000, help="Number of indexed vectors")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimensions")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--dtype", default="float32", help="Memmap vector dtype")
+    parser.add_argument("--nlist", type=int, default=1024, help="IVF clusters")
+    parser.add_argument("--nprobe", default="1,4,8,16,32,64", help="Comma separated IVF nprobe values")
+    parser.add_argument("--search-ef", default="10,50,100", help="Comma separated HNSW search_ef values, empty to skip Chroma")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.vectors, args.dim)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+    ids = [str(i) for i in range(args.vectors)]
+    truth = np.vectorize(str)(np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k])
+    embeddings = FakeEmbeddings(size=args.dim)
+
+    root = tempfile.mkdtemp(prefix="bench_ann_")
+    try:
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries")
+
+        store = MemmapVectorStore(embeddings, path=os.path.join(root, "ivf"), dtype=args.dtype, index="ivf", nlist=args.nlist)
+        start = time.perf_counter()
+        for offset in range(0, len(ids), BATCH_SIZE):
+            store.upsert(ids[offset:offset + BATCH_SIZE], vectors[offset:offset + BATCH_SIZE], ids[offset:offset + BATCH_SIZE])
+        store.build_index()
+        print(f"IVF build {time.perf_counter() - start:.1f} s")
+
+        def memmap_search(nprobe):
+            return lambda query: [doc.page_content for doc in store.similarity_search_by_vector(query, k=args.k, nprobe=nprobe)]
+
+        report(f"memmap ivf all {args.nlist}", memmap_search(args.nlist), queries, truth, args.k)
+        for nprobe in [int(value) for value in args.nprobe.split(",") if value]:
+            report(f"memmap ivf nprobe={nprobe}", memmap_search(nprobe), queries, truth, args.k)
+        store.close()
+
+        for search_ef in [int(value) for value in args.search_ef.split(",") if value]:
+            chroma = Chroma(
+                f"bench_ef{search_ef}",
+                embeddings,
+                collection_metadata={"hnsw:space": "cosine", "hnsw:search_ef": search_ef}
+            )
+            start = time.perf_counter()
+            for offset in range(0, len(ids), BATCH_SIZE):
+                chroma._collection.upsert(ids=ids[offset:offset + BATCH_SIZE], embeddings=vectors[offset:offset + BATCH_SIZE].tolist())
+            build = time.perf_counter() - start
+
+            def chroma_search(query):
+                return chroma._collection.query(query_embeddings=[query.tolist()], n_results=args.k, include=[])["ids"][0]
+
+            report(f"chroma hnsw ef={search_ef}", chroma_search, queries, truth, args.k)
+            print(f"{'':<22} build {build:.1f} s")
+            chroma.delete_collection()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark character-based against token-based chunking
+
+Splits the industrial documents (repeated to a larger corpus) with the
+plain recursive splitter and both Markdown-aware splitters and prints throughput and the token count distribution of the
+resulting chunks.
+
+Usage:
+    python benchmarks/bench_chunking.py [--repeat 50] [--chunk-tokens 256]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.models.splitting import MarkdownCharacterSplitter, MarkdownTokenSplitter
+from src.models.tokenizer import get_tokenizer, count_tokens
+
+DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "data", "industrial_docs")
+
+
+def load_corpus(repeat: int):
+    """Read every document of the corpus, repeated to the requested size"""
+    documents = []
+    for name in sorted(os.listdir(DOCS_DIR)):
+        with open(os.path.join(DOCS_DIR, name), "r") as f:
+            documents.append(Document(page_content=f.read(), metadata={"source": name}))
+    return documents * repeat
+
+
+def run(name, splitter, documents):
+    """Split the corpus and print statistics"""
+    start = time.perf_counter()
+    chunks = splitter.split_documents(documents)
+    seconds = time.perf_counter() - start
+
+    characters = sum(len(doc.page_content) for doc in documents)
+    tokens = np.array([count_tokens(chunk.page_content) for chunk in chunks])
+    print(
+        f"{name:<12} {characters / seconds / 1e6:8.2f} MB/s  {len(chunks):6d} chunks  "
+        f"tokens p5/p50/p95/max = {np.percentile(tokens, 5):.0f}/{np.percentile(tokens, 50):.0f}/"
+        f"{np.percentile(tokens, 95):.0f}/{tokens.max()}  std = {tokens.std():.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50, help="Copies of the corpus to split")
+    parser.add_argument("--chunk-chars", type=int, default=1000, help="Character chunk size")
+    parser.add_argument("--chunk-tokens", type=int, default=256, help="Token chunk size")
+    args = parser.parse_args()
+
+    documents = load_corpus(args.repeat)
+    print(f"Tokenizer: {get_tokenizer().name}, {len(documents)} documents")
+    run("recursive", RecursiveCharacterTextSplitter(chunk_size=args.chunk_chars, chunk_overlap=args.chunk_chars // 5), documents)
+    run("characters", MarkdownCharacterSplitter(chunk_size=args.chunk_chars, chunk_overlap=args.chunk_chars // 5), documents)
+    run("tokens", MarkdownTokenSplitter(chunk_size=args.chunk_tokens, chunk_overlap=args.chunk_tokens // 8), documents)
+
+
+if __name__ == "__main__":
+    main()
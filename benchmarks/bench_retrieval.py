@@ -0,0 +1,89 @@
+"""
+Benchmark lexical retrieval and reranking latency
+
+Indexes chunks built from shuffled paragraphs of the industrial documents
+in BM25Index and prints the search latency of a natural-language
+question, then times LexicalOverlapScorer on a typical reranking
+candidate set.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--chunks 5000 50000] [--candidates 51]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.bm25 import BM25Index
+from src.models.rerank import LexicalOverlapScorer
+
+DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "data", "industrial_docs")
+
+QUESTION = "How do I implement a PID control loop in a PLC?"
+
+
+def load_paragraphs():
+    """Read the paragraphs of every document of the corpus"""
+    paragraphs = []
+    for name in sorted(os.listdir(DOCS_DIR)):
+        with open(os.path.join(DOCS_DIR, name), "r") as f:
+            paragraphs.extend(p for p in f.read().split("\n\n") if p.strip())
+    return paragraphs
+
+
+def make_chunks(paragraphs, count, seed=0):
+    """Build chunks of four shuffled paragraphs, each with a unique term"""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        words = " ".join(rng.sample(paragraphs, 4)).split()
+        rng.shuffle(words)
+        chunks.append(" ".join(words) + f" site{i}")
+    return chunks
+
+
+def latencies_ms(fn, runs):
+    """Call fn repeatedly after one warm-up call and return the latencies"""
+    fn()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    print(f"{name:<28} p50 {np.percentile(latencies, 50):8.3f} ms  p95 {np.percentile(latencies, 95):8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[5000, 50000], help="Index sizes")
+    parser.add_argument("--candidates", type=int, default=51, help="Reranking candidates")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per measurement")
+    args = parser.parse_args()
+
+    paragraphs = load_paragraphs()
+    for count in args.chunks:
+        chunks = make_chunks(paragraphs, count)
+        index = BM25Index()
+        index.add([str(i) for i in range(count)], chunks)
+        report(f"bm25 search, {count} chunks", latencies_ms(lambda: index.search(QUESTION, k=20), args.runs))
+
+    candidates = [chunk * 5 for chunk in make_chunks(paragraphs, args.candidates, seed=1)]
+    scorer = LexicalOverlapScorer()
+    report(
+        f"rerank {args.candidates} candidates",
+        latencies_ms(lambda: scorer.score(QUESTION, candidates), args.runs)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark the memory-mapped vector store against Chroma
+
+Indexes synthetic clustered embeddings in Chroma and in MemmapVectorStore
+(float32, float16 and int8), then prints recall@k against exact search,
+query latency, reopen time and on-disk size.
+
+Reopening the store alone hides the work IndustrialRAG does on startup,
+so the time and RSS growth of opening an IndustrialRAG on the memmap store
+are also measured in fresh processes, with and without hybrid search.
+
+Usage:
+    python benchmarks/bench_vector_store.py [--vectors 20000] [--dim 1536]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.embeddings.fake import FakeEmbeddings
+from langchain.vectorstores import Chroma
+
+from src.models.memmap_store import MemmapVectorStore
+
+BATCH_SIZE = 2000
+
+DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "data", "industrial_docs")
+
+
+def make_vectors(count, dim, clusters=64, seed=0):
+    """Generate normalized vectors grouped around random centers"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.5 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def directory_size(path):
+    """Total size of the files below a directory in MB"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1e6
+
+
+def measure(name, search, queries, truth, k, reopen_seconds, size_mb):
+    """Run the queries and print recall and latency"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found) & set(expected))
+    print(
+        f"{name:<16} recall@{k} {hits / truth.size:6.3f}  "
+        f"p50 {np.percentile(latencies, 50):7.2f} ms  p95 {np.percentile(latencies, 95):7.2f} ms  "
+        f"reopen {reopen_seconds * 1000:8.1f} ms  disk {size_mb:8.1f} MB"
+    )
+
+
+def bench_chroma(root, ids, vectors, queries, truth, k):
+    path = os.path.join(root, "chroma")
+    embeddings = FakeEmbeddings(size=vectors.shape[1])
+    store = Chroma("bench", embeddings, persist_directory=path, collection_metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(ids), BATCH_SIZE):
+        store._collection.upsert(
+            ids=ids[start:start + BATCH_SIZE],
+            embeddings=vectors[start:start + BATCH_SIZE].tolist(),
+            documents=ids[start:start + BATCH_SIZE]
+        )
+    del store
+
+    start = time.perf_counter()
+    store = Chroma("bench", embeddings, persist_directory=path, collection_metadata={"hnsw:space": "cosine"})
+    store._collection.count()
+    reopen = time.perf_counter() - start
+
+    def search(query):
+        return store._collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])["ids"][0]
+
+    measure("chroma (hnsw)", search, queries, truth, k, reopen, directory_size(path))
+
+
+def bench_memmap(root, dtype, ids, vectors, queries, truth, k):
+    path = os.path.join(root, f"memmap_{dtype}")
+    embeddings = FakeEmbeddings(size=vectors.shape[1])
+    store = MemmapVectorStore(embeddings, path=path, dtype=dtype)
+    for start in range(0, len(ids), BATCH_SIZE):
+        store.upsert(ids[start:start + BATCH_SIZE], vectors[start:start + BATCH_SIZE], ids[start:start + BATCH_SIZE])
+    store.close()
+
+    start = time.perf_counter()
+    store = MemmapVectorStore(embeddings, path=path, dtype=dtype)
+    reopen = time.perf_counter() - start
+
+    def search(query):
+        return [doc.page_content for doc in store.similarity_search_by_vector(query, k=k)]
+
+    measure(f"memmap {dtype}", search, queries, truth, k, reopen, directory_size(path))
+    store.close()
+
+
+def make_texts(count, seed=0):
+    """Generate chunk texts by shuffling paragraphs of the industrial documents"""
+    paragraphs = []
+    for name in sorted(os.listdir(DOCS_DIR)):
+        with open(os.path.join(DOCS_DIR, name), "r") as f:
+            paragraphs.extend(p for p in f.read().split("\n\n") if p.strip())
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(paragraphs, size=3)) for _ in range(count)]
+
+
+def resident_mb():
+    """Current resident set size of this process in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def open_rag(path, hybrid):
+    """Open an IndustrialRAG on a memmap store and print seconds and RSS growth in MB"""
+    from src.models.rag import IndustrialRAG
+
+    before = resident_mb()
+    start = time.perf_counter()
+    rag = IndustrialRAG(
+        persist_directory=path,
+        collection_name="bench",
+        embedding_backend="hashing",
+        vector_backend="memmap",
+        hybrid_search=hybrid,
+        response_cache_size=0
+    )
+    rag._open_vectorstore()
+    seconds = time.perf_counter() - start
+    print(seconds, resident_mb() - before)
+
+
+def bench_rag_startup(root, ids, vectors):
+    path = os.path.join(root, "rag")
+    store = MemmapVectorStore(FakeEmbeddings(size=vectors.shape[1]), path=os.path.join(path, "bench"))
+    texts = make_texts(len(ids))
+    for start in range(0, len(ids), BATCH_SIZE):
+        store.upsert(
+            ids[start:start + BATCH_SIZE],
+            vectors[start:start + BATCH_SIZE],
+            texts[start:start + BATCH_SIZE],
+            [{"source": f"doc{i % 100}.txt"} for i in range(start, min(start + BATCH_SIZE, len(ids)))]
+        )
+    store.close()
+
+    # Fresh processes, so that neither run inherits the other's memory
+    for hybrid in (False, True):
+        result = subprocess.run(
+            [sys.executable, __file__, "--open-rag", path] + (["--hybrid"] if hybrid else []),
+            capture_output=True, text=True, check=True
+        )
+        seconds, rss = (float(value) for value in result.stdout.split()[-2:])
+        name = "rag hybrid" if hybrid else "rag vector only"
+        print(f"{name:<16} startup {seconds * 1000:8.1f} ms  rss growth {rss:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", type=int, default=20000, help="Number of indexed vectors")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimensions")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--open-rag", help=argparse.SUPPRESS)
+    parser.add_argument("--hybrid", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.open_rag:
+        open_rag(args.open_rag, args.hybrid)
+        return
+
+    vectors = make_vectors(args.vectors, args.dim)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+    ids = [str(i) for i in range(args.vectors)]
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+    truth = np.vectorize(str)(exact)
+
+    root = tempfile.mkdtemp(prefix="bench_vector_store_")
+    try:
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries")
+        bench_chroma(root, ids, vectors, queries, truth, args.k)
+        for dtype in ("float32", "float16", "int8"):
+            bench_memmap(root, dtype, ids, vectors, queries, truth, args.k)
+        bench_rag_startup(root, ids, make_vectors(args.vectors, 1024))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
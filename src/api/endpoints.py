@@ -2,17 +2,36 @@
 FastAPI endpoints for Industrial Automation Chatbot
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Dict, Optional, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 import os
+import json
+
+from src.models.llm_utils import IndustrialLLMHelper
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create one long-lived LLM helper shared by all requests"""
+    try:
+        app.state.llm_helper = IndustrialLLMHelper(
+            model_name=os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo"),
+            temperature=float(os.getenv("DEFAULT_TEMPERATURE", "0.7"))
+        )
+    except ValueError as e:
+        print(f"LLM helper not available: {e}")
+        app.state.llm_helper = None
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Industrial Automation AI Assistant API",
     description="API for accessing LLM-based industrial automation assistant",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -31,13 +50,47 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     messages: List[ChatMessage]
-    temperature: Optional[float] = 0.7
-    model: Optional[str] = "gpt-3.5-turbo"
+    # None uses the helper's configured DEFAULT_TEMPERATURE and DEFAULT_MODEL
+    temperature: Optional[float] = None
+    model: Optional[str] = None
+    conversation_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: Optional[List[str]] = None
 
+# Dependencies
+def get_llm_helper(request: Request) -> IndustrialLLMHelper:
+    """Get the shared LLM helper created at startup"""
+    helper = getattr(request.app.state, "llm_helper", None)
+    if helper is None:
+        raise HTTPException(status_code=503, detail="LLM service is not configured")
+    return helper
+
+def to_message_dicts(messages: List[ChatMessage]) -> List[Dict[str, str]]:
+    """Convert request messages to the helper's dictionary format"""
+    return [{"role": message.role, "content": message.content} for message in messages]
+
+async def sse_events(
+    tokens: AsyncIterator[str],
+    is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """Format a token stream as server-sent events
+    
+    Generation stops as soon as the client disconnects, closing the
+    upstream token stream so no further tokens are requested.
+    """
+    try:
+        async for token in tokens:
+            if await is_disconnected():
+                return
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    finally:
+        await tokens.aclose()
+
 # Routes
 @app.get("/")
 async def root():
@@ -45,18 +98,41 @@ async def root():
     return {"status": "online", "service": "Industrial Automation AI Assistant"}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    llm_helper: IndustrialLLMHelper = Depends(get_llm_helper)
+):
     """Process chat messages with industrial automation context"""
     try:
-        # In a real implementation, this would call the LLM service
-        # For now, we'll just return a dummy response
-        return {
-            "response": "This is a placeholder response from the Industrial Automation AI Assistant API",
-            "sources": ["Documentation 1", "Technical Specification 2"]
-        }
+        response = await llm_helper.aget_chat_response(
+            to_message_dicts(request.messages),
+            model_name=request.model,
+            temperature=request.temperature,
+            conversation_id=request.conversation_id
+        )
+        return {"response": response, "sources": None}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    llm_helper: IndustrialLLMHelper = Depends(get_llm_helper)
+):
+    """Stream the chat response token by token as server-sent events"""
+    tokens = llm_helper.astream_chat_response(
+        to_message_dicts(request.messages),
+        model_name=request.model,
+        temperature=request.temperature,
+        conversation_id=request.conversation_id
+    )
+    return StreamingResponse(
+        sse_events(tokens, http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/industrial-topics")
 async def get_industrial_topics():
     """Get list of available industrial automation topics"""
@@ -1,9 +1,28 @@
 import streamlit as st
 from PIL import Image
-from openai import OpenAI
 import os
+import sys
 from datetime import datetime
 
+# streamlit only puts src/ on the path, add the repository root for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.client_registry import get_openai_client
+from src.models.history import HistoryManager
+from src.models.prompts import PromptAssembler
+
+# System prompt of the chatbot, kept byte-identical across turns
+CHAT_SYSTEM_PROMPT = """You are a helpful AI assistant for a website chatbot. You are knowledgeable, friendly, and professional.
+You can help with:
+- Website development questions
+- General programming and coding help
+- Design and UX advice
+- SEO and web optimization
+- Technical troubleshooting
+- General questions about any topic
+
+Always be helpful, concise, and provide practical advice when possible. Use emojis sparingly but appropriately to make responses engaging."""
+
 # --- Page Config ---
 st.set_page_config(
     page_title="AI Website Chatbot",
@@ -34,7 +53,8 @@ st.sidebar.markdown("### 🧠 AI Settings")
 # OpenAI API Key input
 api_key = st.sidebar.text_input("Enter OpenAI API Key:", type="password", key="api_key")
 if api_key:
-    client = OpenAI(api_key=api_key)
+    # Shared client, so reruns and model switches reuse open connections
+    client = get_openai_client(api_key)
     st.sidebar.success("✅ API Key configured!")
 else:
     st.sidebar.warning("⚠️ Please enter your OpenAI API key to enable AI responses")
@@ -203,30 +223,22 @@ if submit and user_input.strip():
     # AI-powered responses using OpenAI
     if api_key and client:
         try:
-            # Prepare conversation history for OpenAI
-            messages_for_ai = [
-                {"role": "system", "content": """You are a helpful AI assistant for a website chatbot. You are knowledgeable, friendly, and professional. 
-                You can help with:
-                - Website development questions
-                - General programming and coding help
-                - Design and UX advice
-                - SEO and web optimization
-                - Technical troubleshooting
-                - General questions about any topic
-                
-                Always be helpful, concise, and provide practical advice when possible. Use emojis sparingly but appropriately to make responses engaging."""}
+            # Conversation history, which already ends with the current user
+            # message; older turns are folded into a rolling summary
+            history = [
+                {"role": "user" if msg['role'] == 'user' else "assistant", "content": msg['content']}
+                for msg in st.session_state['messages']
             ]
+            if 'history' not in st.session_state:
+                st.session_state['history'] = HistoryManager(model=model_choice)
+            if 'prompt' not in st.session_state:
+                st.session_state['prompt'] = PromptAssembler(CHAT_SYSTEM_PROMPT)
             
-            # Add recent conversation history (last 10 messages to avoid token limits)
-            recent_messages = st.session_state['messages'][-10:]
-            for msg in recent_messages:
-                if msg['role'] == 'user':
-                    messages_for_ai.append({"role": "user", "content": msg['content']})
-                else:
-                    messages_for_ai.append({"role": "assistant", "content": msg['content']})
-            
-            # Add the current user message
-            messages_for_ai.append({"role": "user", "content": user_input})
+            # The static system prompt always comes first, so its prefix can be
+            # served from the provider's prompt cache
+            messages_for_ai = st.session_state['prompt'].assemble(
+                st.session_state['history'].compact(history, conversation_id="chat")
+            )
             
             # Get AI response
             with st.spinner("🤖 AI is thinking..."):
@@ -1,9 +1,14 @@
 import streamlit as st
 from PIL import Image
-from openai import OpenAI
 import os
+import sys
 from datetime import datetime
 
+# streamlit only puts src/ on the path, add the repository root for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.client_registry import get_openai_client
+
 # --- Page Config ---
 st.set_page_config(
     page_title="AI Website Chatbot",
@@ -29,7 +34,8 @@ st.sidebar.markdown("### 🧠 AI Settings")
 # OpenAI API Key input
 api_key = st.sidebar.text_input("Enter OpenAI API Key:", type="password", key="api_key")
 if api_key:
-    client = OpenAI(api_key=api_key)
+    # Shared client, so reruns and model switches reuse open connections
+    client = get_openai_client(api_key)
     st.sidebar.success("✅ API Key configured!")
 else:
     st.sidebar.warning("⚠️ Please enter your OpenAI API key to enable AI responses")
@@ -247,11 +253,15 @@ if st.session_state['page'] == 'internship':
 
     if generate_doc and api_key:
         from src.models.llm_utils import IndustrialLLMHelper
-        llm_helper = IndustrialLLMHelper(
-            model_name=model_choice,
-            temperature=temperature,
-            api_key=api_key
-        )
+        # Keep one helper per session; model and temperature are per-call overrides
+        llm_helper = st.session_state.get('llm_helper')
+        if llm_helper is None or llm_helper.api_key != api_key:
+            llm_helper = IndustrialLLMHelper(
+                model_name=model_choice,
+                temperature=temperature,
+                api_key=api_key
+            )
+            st.session_state['llm_helper'] = llm_helper
         prompt = f"""
 You are an expert assistant. Write a professional internship documentation in English for a student. Use the following information:
 
@@ -264,7 +274,7 @@ The documentation should be formal, clear, and suitable for an official internsh
         with st.spinner("📝 Generating your internship documentation..."):
             doc = llm_helper.get_chat_response([
                 {"role": "user", "content": prompt}
-            ])
+            ], model_name=model_choice, temperature=temperature)
         st.markdown("### 📝 Generated Internship Documentation")
         st.text_area("Your Internship Documentation (English)", value=doc, height=350)
         st.success("You can copy and use this documentation in your internship report!")
@@ -0,0 +1,303 @@
+"""
+In-process BM25 inverted index for lexical retrieval
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Tuple, Optional, Callable
+
+import numpy as np
+
+# Keeps identifiers such as "61131-3", "modbus/tcp" or "motor_01.start" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.:/][a-z0-9]+)*")
+SEPARATOR_PATTERN = re.compile(r"[-_.:/]")
+
+# Function words carrying no lexical signal, never indexed or scored
+STOPWORDS = frozenset("""
+a about all also an and any are as at be been but by can could did do does for from had has have
+how i if in into is it its may me more most my no not of on or our should so such than that the
+their them then there these they this those to too was we were what when where which while who
+why will with would you your
+""".split())
+
+# Query terms found in more than this share of chunks are ignored, unless
+# every query term is that common
+MAX_DF_RATIO = 0.5
+
+# Chunks added or removed since the last rebuild of the term-major
+# postings, as a share of the indexed chunks, that trigger a rebuild
+REBUILD_RATIO = 0.25
+REBUILD_MIN_ROWS = 256
+
+# Ranked candidates passed to the filter of a filtered search at a time
+FILTER_BATCH = 100
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms
+
+    Compound identifiers are indexed whole and as their parts, so that
+    "IEC 61131-3" matches queries for both "61131-3" and "61131".
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = SEPARATOR_PATTERN.split(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+def index_terms(text: str) -> List[str]:
+    """Tokenize text without stopwords
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    return [term for term in tokenize(text) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 index over chunks, updated incrementally
+
+    Only chunk IDs and term statistics are kept, texts and metadata stay
+    in the vector store. Every chunk is stored as arrays of term IDs and
+    frequencies. Searches
+    score term-major postings (CSR arrays) with numpy, so a query costs a
+    few vector operations per query term instead of a Python loop over
+    every posting. Chunks added since the postings were built are scored
+    from their own arrays until enough changes accumulate for a rebuild.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_df_ratio: float = MAX_DF_RATIO):
+        """Initialize an empty index
+
+        Args:
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+            max_df_ratio: Query terms found in a larger share of chunks are
+                ignored, unless every query term is that common
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.RLock()
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def clear(self) -> None:
+        """Remove all chunks"""
+        with self._lock:
+            self._vocab: Dict[str, int] = {}
+            self._df = np.zeros(0, dtype=np.int32)
+            self._rows: Dict[str, int] = {}
+            self._ids: List[Optional[str]] = []
+            self._terms: List[Optional[np.ndarray]] = []
+            self._freqs: List[Optional[np.ndarray]] = []
+            self._lengths = np.zeros(0, dtype=np.float32)
+            self._total_length = 0
+            # Term-major postings of the rows below self._built
+            self._built = 0
+            self._indptr = np.zeros(1, dtype=np.int64)
+            self._posting_rows = np.zeros(0, dtype=np.int32)
+            self._posting_freqs = np.zeros(0, dtype=np.float32)
+            self._delta: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+            self._removed_rows: List[int] = []
+
+    def _term_ids(self, terms: List[str]) -> np.ndarray:
+        """Map terms to IDs, adding unknown terms to the vocabulary"""
+        ids = [self._vocab.setdefault(term, len(self._vocab)) for term in terms]
+        if len(self._vocab) > len(self._df):
+            grown = np.zeros(max(len(self._vocab), 2 * len(self._df)), dtype=np.int32)
+            grown[:len(self._df)] = self._df
+            self._df = grown
+        return np.array(ids, dtype=np.int32)
+
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        """Add or replace chunks
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+        """
+        # Tokenizing dominates, so it runs before taking the lock
+        counts_list = [Counter(index_terms(text)) for text in texts]
+        with self._lock:
+            self.remove([i for i in ids if i in self._rows])
+            lengths = []
+            for chunk_id, counts in zip(ids, counts_list):
+                terms = self._term_ids(list(counts))
+                self._df[terms] += 1
+                self._rows[chunk_id] = len(self._ids)
+                self._ids.append(chunk_id)
+                self._terms.append(terms)
+                self._freqs.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                lengths.append(sum(counts.values()))
+            self._lengths = np.concatenate([self._lengths, np.array(lengths, dtype=np.float32)])
+            self._total_length += sum(lengths)
+            self._delta = None
+
+    def remove(self, ids: List[str]) -> None:
+        """Remove chunks, ignoring unknown IDs
+
+        Args:
+            ids: Chunk IDs
+        """
+        with self._lock:
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is None:
+                    continue
+                self._df[self._terms[row]] -= 1
+                self._total_length -= int(self._lengths[row])
+                self._ids[row] = self._terms[row] = self._freqs[row] = None
+                self._removed_rows.append(row)
+                if row >= self._built:
+                    self._delta = None
+
+    def _rebuild(self) -> None:
+        """Compact removed rows and rebuild the term-major postings"""
+        alive = [row for row, chunk_id in enumerate(self._ids) if chunk_id is not None]
+        self._ids = [self._ids[row] for row in alive]
+        self._terms = [self._terms[row] for row in alive]
+        self._freqs = [self._freqs[row] for row in alive]
+        self._lengths = self._lengths[alive] if alive else np.zeros(0, dtype=np.float32)
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+
+        if self._ids:
+            sizes = np.fromiter((len(terms) for terms in self._terms), dtype=np.int64, count=len(self._terms))
+            terms = np.concatenate(self._terms)
+            order = np.argsort(terms, kind="stable")
+            self._posting_rows = np.repeat(np.arange(len(self._ids), dtype=np.int32), sizes)[order]
+            self._posting_freqs = np.concatenate(self._freqs)[order]
+            counts = np.bincount(terms, minlength=len(self._df))
+        else:
+            self._posting_rows = np.zeros(0, dtype=np.int32)
+            self._posting_freqs = np.zeros(0, dtype=np.float32)
+            counts = np.zeros(len(self._df), dtype=np.int64)
+        self._indptr = np.concatenate([[0], np.cumsum(counts)])
+        self._built = len(self._ids)
+        self._delta = None
+        self._removed_rows = []
+
+    def _pending_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Rows, term IDs and frequencies of chunks added since the last rebuild"""
+        if self._delta is None:
+            rows = [row for row in range(self._built, len(self._ids)) if self._ids[row] is not None]
+            if rows:
+                sizes = [len(self._terms[row]) for row in rows]
+                self._delta = (
+                    np.repeat(np.array(rows, dtype=np.int32), sizes),
+                    np.concatenate([self._terms[row] for row in rows]),
+                    np.concatenate([self._freqs[row] for row in rows])
+                )
+            else:
+                empty = np.zeros(0, dtype=np.int32)
+                self._delta = (empty, empty, np.zeros(0, dtype=np.float32))
+        return self._delta
+
+    def _query_terms(self, query: str) -> np.ndarray:
+        """IDs of the query terms worth scoring"""
+        terms = np.array(
+            sorted({self._vocab[term] for term in index_terms(query) if term in self._vocab}),
+            dtype=np.int32
+        )
+        terms = terms[self._df[terms] > 0]
+        selective = terms[self._df[terms] <= self.max_df_ratio * len(self._rows)]
+        return selective if len(selective) else terms
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        filter_ids: Optional[Callable[[List[str]], List[str]]] = None
+    ) -> List[Tuple[str, float]]:
+        """Find the best matching chunks
+
+        IDF statistics are computed over the whole index, the filter only
+        restricts which chunks are returned. It is called outside the index
+        lock with batches of ranked candidates, best first, until k of them
+        passed.
+
+        Args:
+            query: Query text
+            k: Number of results
+            filter_ids: Returns the given chunk IDs that may be returned,
+                e.g. those whose metadata matches a filter
+
+        Returns:
+            List of (chunk ID, score) pairs, best first
+        """
+        with self._lock:
+            count = len(self._rows)
+            if count == 0 or k <= 0:
+                return []
+            changed = len(self._removed_rows) + len(self._ids) - self._built
+            if changed > max(REBUILD_MIN_ROWS, REBUILD_RATIO * count):
+                self._rebuild()
+
+            terms = self._query_terms(query)
+            if len(terms) == 0:
+                return []
+            df = self._df[terms].astype(np.float64)
+            idf = np.log(1 + (count - df + 0.5) / (df + 0.5))
+            average_length = self._total_length / count
+            k1, b = self.k1, self.b
+            scores = np.zeros(len(self._ids), dtype=np.float64)
+
+            built_terms = len(self._indptr) - 1
+            for term, weight in zip(terms, idf):
+                if term >= built_terms:
+                    # Term first seen after the last rebuild
+                    continue
+                start, end = self._indptr[term], self._indptr[term + 1]
+                rows = self._posting_rows[start:end]
+                freqs = self._posting_freqs[start:end]
+                norm = k1 * (1 - b + b * self._lengths[rows] / average_length)
+                scores[rows] += weight * freqs * (k1 + 1) / (freqs + norm)
+
+            rows, pending_terms, freqs = self._pending_rows()
+            if len(rows):
+                positions = np.searchsorted(terms, pending_terms)
+                positions[positions == len(terms)] = 0
+                hit = terms[positions] == pending_terms
+                rows, freqs, weights = rows[hit], freqs[hit], idf[positions[hit]]
+                norm = k1 * (1 - b + b * self._lengths[rows] / average_length)
+                np.add.at(scores, rows, weights * freqs * (k1 + 1) / (freqs + norm))
+
+            # Postings still reference removed rows until the next rebuild
+            scores[self._removed_rows] = 0.0
+            candidates = np.flatnonzero(scores)
+            if filter_ids is not None:
+                ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+            else:
+                top = candidates
+                if len(top) > k:
+                    top = top[np.argpartition(-scores[top], k - 1)[:k]]
+                ranked = top[np.argsort(-scores[top], kind="stable")]
+            # Row numbers change on rebuilds, so IDs are resolved under the lock
+            hits = [(self._ids[row], float(score)) for row, score in zip(ranked, scores[ranked])]
+
+        if filter_ids is None:
+            return hits
+        results: List[Tuple[str, float]] = []
+        batch_size = max(FILTER_BATCH, 2 * k)
+        for start in range(0, len(hits), batch_size):
+            batch = hits[start:start + batch_size]
+            allowed = set(filter_ids([chunk_id for chunk_id, _ in batch]))
+            results.extend(hit for hit in batch if hit[0] in allowed)
+            if len(results) >= k:
+                break
+        return results[:k]
@@ -0,0 +1,279 @@
+"""
+Process-wide registry of OpenAI clients sharing one pooled HTTP transport
+"""
+
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple, Optional, Any
+
+import httpx
+import openai
+from langchain.chat_models import ChatOpenAI
+
+# Connection pool limits of the shared HTTP transport
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# Maximum number of chat models kept for reuse
+MAX_CHAT_MODELS = 32
+
+# Retries of failed OpenAI requests, the default of ChatOpenAI
+DEFAULT_MAX_RETRIES = 2
+
+
+def api_key_hash(api_key: str) -> str:
+    """Hash an API key so that it is never kept as a dictionary key
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        Hex digest identifying the key
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def openai_settings() -> Dict[str, Optional[str]]:
+    """Read the OpenAI connection settings ChatOpenAI takes from the environment
+
+    Returns:
+        Dictionary with "base_url", "organization" and "proxy"
+    """
+    return {
+        "base_url": os.getenv("OPENAI_API_BASE") or None,
+        "organization": os.getenv("OPENAI_ORG_ID") or os.getenv("OPENAI_ORGANIZATION") or None,
+        "proxy": os.getenv("OPENAI_PROXY") or None,
+    }
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Async HTTP transport keeping one connection pool per event loop
+
+    Pooled connections belong to the event loop that opened them, so one
+    pool shared by successive asyncio.run() calls would hand out
+    connections of a closed loop. Pools of closed loops are dropped.
+    """
+
+    def __init__(self, limits: httpx.Limits, proxy: Optional[str] = None):
+        """Initialize without pools
+
+        Args:
+            limits: Connection limits of each pool
+            proxy: Proxy URL, None for direct connections
+        """
+        self.limits = limits
+        self.proxy = proxy
+        self._pools: Dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        """Get the pool of the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                for closed in [other for other in self._pools if other.is_closed()]:
+                    del self._pools[closed]
+                pool = httpx.AsyncHTTPTransport(limits=self.limits, proxy=self.proxy)
+                self._pools[loop] = pool
+            return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the pool of the running event loop"""
+        with self._lock:
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+class ClientRegistry:
+    """Thread-safe cache of OpenAI clients and chat models
+
+    All clients send their requests through the same sync and async
+    HTTP connection pools, so switching models or temperatures reuses
+    open TLS connections. Async requests use the pool of the running
+    event loop. OPENAI_API_BASE, OPENAI_ORGANIZATION and OPENAI_PROXY are
+    honored like ChatOpenAI does. Chat models are cached per
+    (model, temperature, API key hash, connection settings).
+    """
+
+    def __init__(self, max_chat_models: int = MAX_CHAT_MODELS):
+        """Initialize an empty registry
+
+        Args:
+            max_chat_models: Maximum number of chat models kept for reuse
+        """
+        self.max_chat_models = max_chat_models
+        # One sync client and one async client per proxy
+        self._http_clients: Dict[Optional[str], Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._openai_clients: Dict[Tuple, Tuple[openai.OpenAI, openai.AsyncOpenAI]] = {}
+        self._chat_models: "OrderedDict[Tuple, ChatOpenAI]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+
+    def _get_http_clients(self, proxy: Optional[str]) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """Get the pooled sync and async HTTP clients of a proxy"""
+        clients = self._http_clients.get(proxy)
+        if clients is None:
+            clients = (
+                httpx.Client(limits=self._limits(), proxy=proxy),
+                httpx.AsyncClient(transport=LoopLocalTransport(self._limits(), proxy=proxy))
+            )
+            self._http_clients[proxy] = clients
+        return clients
+
+    def get_openai_clients(
+        self,
+        api_key: str,
+        request_timeout: Optional[float] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES
+    ) -> Tuple[openai.OpenAI, openai.AsyncOpenAI]:
+        """Get the sync and async OpenAI clients of an API key
+
+        Args:
+            api_key: OpenAI API key
+            request_timeout: Request timeout in seconds, None keeps the
+                default of the OpenAI client
+            max_retries: Retries of failed requests
+
+        Returns:
+            Tuple of (sync client, async client)
+        """
+        settings = openai_settings()
+        key = (api_key_hash(api_key), settings["base_url"], settings["organization"], settings["proxy"],
+               request_timeout, max_retries)
+        with self._lock:
+            clients = self._openai_clients.get(key)
+            if clients is None:
+                http_client, async_http_client = self._get_http_clients(settings["proxy"])
+                options: Dict[str, Any] = dict(
+                    api_key=api_key,
+                    base_url=settings["base_url"],
+                    organization=settings["organization"],
+                    max_retries=max_retries
+                )
+                if request_timeout is not None:
+                    options["timeout"] = request_timeout
+                clients = (
+                    openai.OpenAI(http_client=http_client, **options),
+                    openai.AsyncOpenAI(http_client=async_http_client, **options)
+                )
+                self._openai_clients[key] = clients
+            return clients
+
+    def get_chat_model(
+        self,
+        model_name: str,
+        temperature: float,
+        api_key: str,
+        request_timeout: Optional[float] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES
+    ) -> ChatOpenAI:
+        """Get a chat model, creating it on first use
+
+        Args:
+            model_name: Name of the OpenAI model
+            temperature: Temperature parameter for generation
+            api_key: OpenAI API key
+            request_timeout: Request timeout in seconds, None keeps the
+                default of the OpenAI client
+            max_retries: Retries of failed requests
+
+        Returns:
+            Chat model sending requests through the shared connection pool
+
+        Raises:
+            ValueError: If no API key is given
+        """
+        if not api_key:
+            raise ValueError("OpenAI API key is required to generate answers")
+        settings = openai_settings()
+        key = (model_name, temperature, api_key_hash(api_key), settings["base_url"],
+               settings["organization"], settings["proxy"], request_timeout, max_retries)
+        with self._lock:
+            llm = self._chat_models.get(key)
+            if llm is not None:
+                self._chat_models.move_to_end(key)
+                return llm
+
+            client, async_client = self.get_openai_clients(api_key, request_timeout, max_retries)
+            llm = ChatOpenAI(
+                model_name=model_name,
+                temperature=temperature,
+                openai_api_key=api_key,
+                openai_api_base=settings["base_url"],
+                openai_organization=settings["organization"],
+                openai_proxy=settings["proxy"],
+                request_timeout=request_timeout,
+                max_retries=max_retries,
+                client=client.chat.completions,
+                async_client=async_client.chat.completions
+            )
+            self._chat_models[key] = llm
+            while len(self._chat_models) > self.max_chat_models:
+                self._chat_models.popitem(last=False)
+            return llm
+
+    def clear(self) -> None:
+        """Drop all cached clients and close the connection pools"""
+        with self._lock:
+            self._chat_models.clear()
+            self._openai_clients.clear()
+            # Async pools can only be closed from their event loop; dropping
+            # them lets their connections be released on garbage collection
+            for http_client, _ in self._http_clients.values():
+                http_client.close()
+            self._http_clients.clear()
+
+
+# Registry shared by all helpers and RAG instances of the process
+DEFAULT_REGISTRY = ClientRegistry()
+
+
+def get_chat_model(
+    model_name: str,
+    temperature: float,
+    api_key: str,
+    request_timeout: Optional[float] = None,
+    max_retries: int = DEFAULT_MAX_RETRIES
+) -> ChatOpenAI:
+    """Get a chat model from the process-wide registry
+
+    Args:
+        model_name: Name of the OpenAI model
+        temperature: Temperature parameter for generation
+        api_key: OpenAI API key
+        request_timeout: Request timeout in seconds, None keeps the
+            default of the OpenAI client
+        max_retries: Retries of failed requests
+
+    Returns:
+        Shared chat model
+
+    Raises:
+        ValueError: If no API key is given
+    """
+    return DEFAULT_REGISTRY.get_chat_model(model_name, temperature, api_key, request_timeout, max_retries)
+
+
+def get_openai_client(api_key: str) -> openai.OpenAI:
+    """Get the sync OpenAI client of an API key from the process-wide registry
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        Shared OpenAI client
+    """
+    return DEFAULT_REGISTRY.get_openai_clients(api_key)[0]
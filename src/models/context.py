@@ -0,0 +1,171 @@
+"""
+Token-budget-aware packing of retrieved chunks into the prompt context
+"""
+
+from typing import List, Dict, Tuple, Optional
+
+from langchain.schema import Document
+
+from src.models.tokenizer import count_tokens
+
+# Context tokens allowed per model, leaving room for the prompt template,
+# the question and the answer
+CONTEXT_TOKEN_BUDGETS = {
+    "gpt-3.5-turbo": 3000,
+    "gpt-4": 6000,
+    "gpt-4-turbo": 12000,
+    "gpt-4o": 12000,
+    "gpt-4o-mini": 12000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+
+# Shortest suffix/prefix match treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+# Metadata identifying the document a chunk was split from. PyPDFLoader
+# returns one document per page, and start_index offsets are only
+# comparable between chunks of the same document
+DOCUMENT_KEYS = ("source", "page")
+
+
+def context_budget(model: str) -> int:
+    """Get the default context token budget of a model
+
+    Args:
+        model: Model name
+
+    Returns:
+        Number of context tokens
+    """
+    for name in sorted(CONTEXT_TOKEN_BUDGETS, key=len, reverse=True):
+        if model.startswith(name):
+            return CONTEXT_TOKEN_BUDGETS[name]
+    return DEFAULT_CONTEXT_TOKEN_BUDGET
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right"""
+    for size in range(min(len(left), len(right)), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _document_key(doc: Document) -> Tuple:
+    """Identity of the document a chunk was split from"""
+    return tuple(doc.metadata.get(key) for key in DOCUMENT_KEYS)
+
+
+def _join(left: Document, right: Document) -> Optional[Document]:
+    """Merge two chunks of the same document if they overlap or touch
+
+    Start offsets are only trusted when the overlap they imply matches
+    the chunk texts, otherwise the overlap is detected from the texts.
+
+    Returns:
+        The merged document, or None if the chunks are not adjacent
+    """
+    if _document_key(left) != _document_key(right):
+        return None
+    left_text, right_text = left.page_content, right.page_content
+    if right_text in left_text:
+        return left
+    if left_text in right_text:
+        return right
+
+    left_start = left.metadata.get("start_index")
+    right_start = right.metadata.get("start_index")
+    if left_start is not None and right_start is not None:
+        if right_start < left_start:
+            return _join(right, left)
+        shared = left_start + len(left_text) - right_start
+        if shared < 0:
+            return None
+        if left_text.endswith(right_text[:shared]):
+            return Document(page_content=left_text + right_text[shared:], metadata=dict(left.metadata))
+
+    shared = _overlap(left_text, right_text)
+    if not shared:
+        shared = _overlap(right_text, left_text)
+        if not shared:
+            return None
+        left, right = right, left
+        left_text, right_text = right_text, left_text
+    return Document(page_content=left_text + right_text[shared:], metadata=dict(left.metadata))
+
+
+def merge_chunks(documents: List[Document]) -> List[Document]:
+    """Merge adjacent chunks of the same document and drop duplicated overlap
+
+    Args:
+        documents: Chunks, best first
+
+    Returns:
+        Merged chunks, ordered by the rank of their best member
+    """
+    merged: List[Document] = []
+    for doc in documents:
+        for i, existing in enumerate(merged):
+            joined = _join(existing, doc)
+            if joined is not None:
+                merged[i] = joined
+                break
+        else:
+            merged.append(doc)
+
+    # A new chunk can bridge two earlier ones, so merge until stable
+    if len(merged) < len(documents):
+        return merge_chunks(merged)
+    return merged
+
+
+class ContextPacker:
+    """Packs ranked chunks into a prompt context limited by a token budget"""
+
+    def __init__(self, token_budget: Optional[int] = None, model: str = "gpt-3.5-turbo"):
+        """Initialize the packer
+
+        Args:
+            token_budget: Maximum context tokens, defaults to the budget of the model
+            model: Model name used for counting tokens
+        """
+        self.model = model
+        self.token_budget = token_budget if token_budget is not None else context_budget(model)
+
+    def pack(self, documents: List[Document]) -> Tuple[List[Document], Dict[str, int]]:
+        """Select and merge chunks until the budget is reached
+
+        The best chunk is always kept, even if it exceeds the budget on
+        its own.
+
+        Args:
+            documents: Chunks, best first
+
+        Returns:
+            Packed documents and packing statistics
+        """
+        counts: Dict[str, int] = {}
+
+        def measure(doc: Document) -> int:
+            if doc.page_content not in counts:
+                counts[doc.page_content] = count_tokens(doc.page_content, self.model)
+            return counts[doc.page_content]
+
+        packed: List[Document] = []
+        selected: List[Document] = []
+        tokens = 0
+        for doc in documents:
+            candidate = merge_chunks(selected + [doc])
+            candidate_tokens = sum(measure(d) for d in candidate)
+            if selected and candidate_tokens > self.token_budget:
+                break
+            selected.append(doc)
+            packed, tokens = candidate, candidate_tokens
+
+        raw_tokens = sum(measure(d) for d in selected)
+        return packed, {
+            "context_tokens": tokens,
+            "packed_chunks": len(selected),
+            "dropped_chunks": len(documents) - len(selected),
+            "overlap_tokens_saved": raw_tokens - tokens
+        }
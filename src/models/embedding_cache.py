@@ -0,0 +1,224 @@
+"""
+Content-addressed embedding cache with an in-memory LRU and a SQLite backend
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+from langchain.schema.embeddings import Embeddings
+
+
+def text_sha256(text: str) -> str:
+    """Hash a text for use as a cache key
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        Hex digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """Disk backend storing float32 vectors keyed by (model, text hash)"""
+
+    def __init__(self, path: str):
+        """Open or create the store
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Fetch the stored vectors for a list of hashes
+
+        Args:
+            model: Embedding model name
+            hashes: Text hashes to look up
+
+        Returns:
+            Mapping of found hashes to vectors
+        """
+        found = {}
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+            for text_hash, blob in rows:
+                found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]) -> None:
+        """Store vectors
+
+        Args:
+            model: Embedding model name
+            items: List of (text hash, vector) pairs
+        """
+        rows = [(model, text_hash, array("f", vector).tobytes()) for text_hash, vector in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached texts to the backend
+
+    Lookups go through an in-memory LRU first, then the optional disk
+    store. Identical texts within one call are embedded once.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_path: Optional[str] = None,
+        memory_size: int = 10000
+    ):
+        """Initialize the cache
+
+        Args:
+            embeddings: Underlying embeddings backend
+            model_name: Embedding model name, part of every cache key
+            cache_path: SQLite file for the disk cache, None for memory only
+            memory_size: Maximum number of vectors kept in memory
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.store = SQLiteEmbeddingStore(cache_path) if cache_path else None
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _lookup(self, namespace: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Look up hashes in memory, then on disk"""
+        found = {}
+        with self._lock:
+            for text_hash in hashes:
+                vector = self._memory.get((namespace, text_hash))
+                if vector is not None:
+                    self._memory.move_to_end((namespace, text_hash))
+                    found[text_hash] = vector
+            self.memory_hits += len(found)
+
+        remaining = [text_hash for text_hash in hashes if text_hash not in found]
+        if remaining and self.store is not None:
+            from_disk = self.store.get_many(namespace, remaining)
+            self._remember(namespace, from_disk.items())
+            with self._lock:
+                self.disk_hits += len(from_disk)
+            found.update(from_disk)
+        return found
+
+    def _remember(self, namespace: str, items) -> None:
+        """Put vectors into the in-memory LRU"""
+        with self._lock:
+            for text_hash, vector in items:
+                self._memory[(namespace, text_hash)] = vector
+                self._memory.move_to_end((namespace, text_hash))
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _store(self, namespace: str, items: List[Tuple[str, List[float]]]) -> None:
+        """Put freshly computed vectors into both cache levels"""
+        self._remember(namespace, items)
+        if self.store is not None:
+            self.store.put_many(namespace, items)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only the cache misses
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embeddings in input order
+        """
+        hashes = [text_sha256(text) for text in texts]
+        unique = list(dict.fromkeys(hashes))
+        found = self._lookup(self.model_name, unique)
+
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = list(zip(missing.keys(), vectors))
+            self._store(self.model_name, computed)
+            found.update(computed)
+            with self._lock:
+                self.misses += len(missing)
+
+        return [found[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache
+
+        Args:
+            text: Query text
+
+        Returns:
+            The query embedding
+        """
+        # Query embeddings are kept apart, some backends embed queries differently
+        namespace = f"{self.model_name}:query"
+        text_hash = text_sha256(text)
+        found = self._lookup(namespace, [text_hash])
+        if text_hash in found:
+            return found[text_hash]
+
+        vector = self.embeddings.embed_query(text)
+        self._store(namespace, [(text_hash, vector)])
+        with self._lock:
+            self.misses += 1
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache hit and miss counters
+
+        Returns:
+            Dictionary with memory hits, disk hits, misses and hit rate
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0
+            }
@@ -0,0 +1,168 @@
+"""
+Selectable embedding backends: OpenAI, local CPU models and feature hashing
+"""
+
+import os
+import hashlib
+from functools import lru_cache
+from typing import List, Optional, Any
+
+import numpy as np
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.schema.embeddings import Embeddings
+
+from src.models.bm25 import tokenize
+
+# Model used by each backend when none is configured
+DEFAULT_EMBEDDING_MODELS = {
+    "openai": "text-embedding-ada-002",
+    "local": "sentence-transformers/all-MiniLM-L6-v2",
+    "hashing": "hashing-1024",
+}
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of a feature, identical across processes"""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic embeddings from hashed word unigrams and bigrams
+
+    Needs no model and no network, so it suits tests and environments
+    without any embedding service. Similarity reflects shared words only.
+    """
+
+    def __init__(self, n_features: int = 1024):
+        """Initialize the vectorizer
+
+        Args:
+            n_features: Vector dimensions
+        """
+        self.n_features = n_features
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for feature in features:
+            value = _feature_hash(feature)
+            # The top bit picks the sign so that collisions tend to cancel out
+            vector[value % self.n_features] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of vectors
+        """
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Vector
+        """
+        return self._embed(text)
+
+
+class LocalEmbeddings(Embeddings):
+    """Embeddings computed on the CPU with a sentence-transformers model
+
+    Requires the optional sentence-transformers package. The model is
+    loaded from the Hugging Face cache or from a local directory, so
+    ingestion runs without network access once the model is on disk.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODELS["local"], batch_size: int = 64, num_threads: Optional[int] = None):
+        """Load the model
+
+        Args:
+            model_name: Model name or path to a model directory
+            batch_size: Number of texts encoded per forward pass
+            num_threads: CPU threads used by torch, defaults to all cores
+        """
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "Could not import sentence_transformers. "
+                "Please install it with `pip install sentence-transformers`."
+            )
+        torch.set_num_threads(num_threads or os.cpu_count() or 1)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in batches
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of normalized vectors
+        """
+        if not texts:
+            return []
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Normalized vector
+        """
+        return self.embed_documents([text])[0]
+
+
+def create_embeddings(
+    backend: str = "openai",
+    model_name: Optional[str] = None,
+    api_key: Optional[str] = None,
+    **kwargs: Any
+) -> Embeddings:
+    """Create the embeddings of a backend
+
+    Args:
+        backend: "openai", "local" or "hashing"
+        model_name: Model name, defaults to the backend's default model
+        api_key: OpenAI API key, only used by the openai backend
+        **kwargs: Passed on to the backend class
+
+    Returns:
+        Embeddings instance
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend not in DEFAULT_EMBEDDING_MODELS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    model_name = model_name or DEFAULT_EMBEDDING_MODELS[backend]
+
+    if backend == "openai":
+        return OpenAIEmbeddings(model=model_name, openai_api_key=api_key, **kwargs)
+    if backend == "local":
+        return LocalEmbeddings(model_name, **kwargs)
+    n_features = int(model_name.rsplit("-", 1)[-1]) if model_name.startswith("hashing-") else 1024
+    return HashingEmbeddings(n_features, **kwargs)
@@ -0,0 +1,228 @@
+"""
+Token-bounded conversation history with rolling summaries of older turns
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Callable, Optional
+
+from langchain.schema import HumanMessage
+from langchain.schema.language_model import BaseLanguageModel
+
+from src.models.tokenizer import count_tokens
+
+# Tokens of recent messages sent verbatim
+HISTORY_TOKEN_BUDGET = 2000
+
+# Tokens a rolling summary may grow to
+SUMMARY_TOKEN_BUDGET = 300
+
+# Tokens the chat format adds to every message
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Characters kept per message by the extractive summarizer
+SUMMARY_LINE_CHARS = 200
+
+# Maximum number of conversations whose summaries are cached
+MAX_CACHED_SUMMARIES = 1000
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_PROMPT = """Update the summary of a technical support conversation with the new messages.
+Keep equipment names, error codes, settings and steps already tried. Answer with the summary only,
+in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{transcript}"""
+
+# Receives the current summary and the messages to fold into it
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+
+def dedupe_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Remove messages repeating the message right before them
+
+    Args:
+        messages: Messages in the conversation
+
+    Returns:
+        Messages without consecutive duplicates
+    """
+    deduped = []
+    for msg in messages:
+        if deduped and deduped[-1]["role"] == msg["role"] and deduped[-1]["content"].strip() == msg["content"].strip():
+            continue
+        deduped.append(msg)
+    return deduped
+
+
+def _digest(messages: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for msg in messages:
+        digest.update(f"{msg['role']}\x00{msg['content']}\x00".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ExtractiveSummarizer:
+    """Summarizer keeping the opening of every folded message
+
+    Needs no model call. Once the summary exceeds its token budget, the
+    oldest lines are dropped first, except for the opening message, which
+    usually states the problem being worked on.
+    """
+
+    def __init__(self, max_tokens: int = SUMMARY_TOKEN_BUDGET, model: str = "gpt-3.5-turbo"):
+        """Initialize the summarizer
+
+        Args:
+            max_tokens: Maximum summary tokens
+            model: Model whose tokenizer measures the summary
+        """
+        self.max_tokens = max_tokens
+        self.model = model
+
+    def __call__(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        lines = summary.splitlines() if summary else []
+        for msg in messages:
+            text = " ".join(msg["content"].split())
+            if len(text) > SUMMARY_LINE_CHARS:
+                text = text[:SUMMARY_LINE_CHARS].rsplit(" ", 1)[0] + " ..."
+            lines.append(f"{msg['role']}: {text}")
+        sizes = [count_tokens(line, self.model) for line in lines]
+        total = sum(sizes)
+        while len(lines) > 2 and total > self.max_tokens:
+            total -= sizes.pop(1)
+            lines.pop(1)
+        return "\n".join(lines)
+
+
+class LLMSummarizer:
+    """Summarizer asking a language model to update the summary"""
+
+    def __init__(self, llm: BaseLanguageModel, max_tokens: int = SUMMARY_TOKEN_BUDGET):
+        """Initialize the summarizer
+
+        Args:
+            llm: Model writing the summaries
+            max_tokens: Approximate maximum summary tokens
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens
+
+    def __call__(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.max_tokens * 3 // 4,
+            summary=summary or "(none)",
+            transcript="\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        )
+        return self.llm.invoke([HumanMessage(content=prompt)]).content.strip()
+
+
+class HistoryManager:
+    """Keeps the prompt size of a conversation bounded
+
+    Recent messages are sent verbatim up to a token budget. When they
+    exceed it, the oldest ones are folded into a rolling summary until
+    half of the budget is left, so the summarizer runs once every few
+    turns rather than on every turn. Summaries are cached per conversation
+    and only extended with newly folded messages. Leading system messages
+    are always kept.
+    """
+
+    def __init__(
+        self,
+        summarizer: Optional[Summarizer] = None,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        model: str = "gpt-3.5-turbo",
+        max_conversations: int = MAX_CACHED_SUMMARIES
+    ):
+        """Initialize the manager
+
+        Args:
+            summarizer: Folds messages into a summary, defaults to an
+                ExtractiveSummarizer
+            token_budget: Maximum tokens of recent messages sent verbatim
+            model: Model whose tokenizer counts message tokens
+            max_conversations: Maximum number of cached summaries
+        """
+        self.summarizer = summarizer or ExtractiveSummarizer(model=model)
+        self.token_budget = token_budget
+        self.model = model
+        self.max_conversations = max_conversations
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tokens(self, msg: Dict[str, str]) -> int:
+        return count_tokens(msg["content"], self.model) + MESSAGE_TOKEN_OVERHEAD
+
+    def _split(self, messages: List[Dict[str, str]], start: int, budget: int) -> int:
+        """Find the first message of the longest suffix within the budget"""
+        total = 0
+        for index in range(len(messages) - 1, start - 1, -1):
+            total += self._tokens(messages[index])
+            if total > budget:
+                return min(index + 1, len(messages) - 1)
+        return start
+
+    def _cached(self, conversation_id: Optional[str], messages: List[Dict[str, str]]) -> Tuple[int, str]:
+        """Get the folded message count and summary still valid for messages"""
+        if conversation_id is None:
+            return 0, ""
+        with self._lock:
+            cached = self._summaries.get(conversation_id)
+            if cached is not None:
+                self._summaries.move_to_end(conversation_id)
+        if cached is None:
+            return 0, ""
+        folded, digest, summary = cached
+        if folded > len(messages) or _digest(messages[:folded]) != digest:
+            return 0, ""
+        return folded, summary
+
+    def compact(self, messages: List[Dict[str, str]], conversation_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build the messages to send for a conversation
+
+        Args:
+            messages: Full conversation, oldest first
+            conversation_id: Key of the cached summary, None summarizes the
+                older messages again on every call
+
+        Returns:
+            Leading system messages, a system message with the summary of
+            older turns if any were folded, then the recent messages
+        """
+        messages = dedupe_messages(messages)
+        pinned = 0
+        while pinned < len(messages) and messages[pinned]["role"] == "system":
+            pinned += 1
+        pinned_messages, body = messages[:pinned], messages[pinned:]
+
+        folded, summary = self._cached(conversation_id, body)
+        if self._split(body, folded, self.token_budget) > folded:
+            split = self._split(body, folded, self.token_budget // 2)
+            summary = self.summarizer(summary, body[folded:split])
+            folded = split
+            if conversation_id is not None:
+                with self._lock:
+                    self._summaries[conversation_id] = (folded, _digest(body[:folded]), summary)
+                    self._summaries.move_to_end(conversation_id)
+                    while len(self._summaries) > self.max_conversations:
+                        self._summaries.popitem(last=False)
+
+        compacted = list(pinned_messages)
+        if folded:
+            compacted.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+        return compacted + body[folded:]
+
+    def forget(self, conversation_id: str) -> None:
+        """Drop the cached summary of a conversation
+
+        Args:
+            conversation_id: Conversation key
+        """
+        with self._lock:
+            self._summaries.pop(conversation_id, None)
@@ -0,0 +1,140 @@
+"""
+Hybrid lexical + vector retrieval with reciprocal-rank fusion
+"""
+
+import asyncio
+from typing import List, Dict, Tuple, Any, Optional
+
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun
+)
+from langchain.schema import BaseRetriever, Document
+
+from src.models.bm25 import BM25Index
+from src.models.metadata_filter import MetadataFilter, to_chroma_where
+
+
+def _document_key(doc: Document) -> Tuple[str, str]:
+    return (str(doc.metadata.get("source", "")), doc.page_content)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """Merge ranked result lists with reciprocal-rank fusion
+
+    Args:
+        rankings: Result lists, best first
+        k: Rank offset damping the influence of top ranks
+
+    Returns:
+        Documents ordered by fused score
+    """
+    scores: Dict[Tuple[str, str], float] = {}
+    documents: Dict[Tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = _document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            documents.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ordered]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever fusing vector store results with BM25 results"""
+
+    vectorstore: Any
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    metadata_filter: Optional[MetadataFilter] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _lexical(self, query: str) -> List[Document]:
+        # BM25 only holds chunk IDs, texts and metadata of the hits are
+        # fetched from the vector store, which also applies the filter
+        where = to_chroma_where(self.metadata_filter)
+        documents: Dict[str, Document] = {}
+
+        def fetch(ids: List[str]) -> List[str]:
+            stored = self.vectorstore.get(ids=ids, where=where, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                documents[chunk_id] = Document(page_content=text, metadata=metadata or {})
+            return stored["ids"]
+
+        if where:
+            hits = self.bm25.search(query, k=self.fetch_k, filter_ids=fetch)
+        else:
+            hits = self.bm25.search(query, k=self.fetch_k)
+            if hits:
+                fetch([chunk_id for chunk_id, _ in hits])
+        return [documents[chunk_id] for chunk_id, _ in hits if chunk_id in documents]
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        semantic = self.vectorstore.similarity_search(
+            query, k=self.fetch_k, filter=to_chroma_where(self.metadata_filter)
+        )
+        return reciprocal_rank_fusion([semantic, self._lexical(query)], k=self.rrf_k)[:self.k]
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # BM25 runs in a worker thread, so a rebuild of its postings never
+        # blocks the event loop
+        semantic, lexical = await asyncio.gather(
+            self.vectorstore.asimilarity_search(
+                query, k=self.fetch_k, filter=to_chroma_where(self.metadata_filter)
+            ),
+            asyncio.get_running_loop().run_in_executor(None, self._lexical, query)
+        )
+        return reciprocal_rank_fusion([semantic, lexical], k=self.rrf_k)[:self.k]
+
+
+class FanOutRetriever(BaseRetriever):
+    """Retriever querying several collections and fusing their results
+
+    Scores of different collections are not comparable, so results are
+    merged by rank with reciprocal-rank fusion.
+    """
+
+    retrievers: List[BaseRetriever]
+    k: int = 4
+    rrf_k: int = 60
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        rankings = [
+            retriever.get_relevant_documents(query, callbacks=run_manager.get_child())
+            for retriever in self.retrievers
+        ]
+        return reciprocal_rank_fusion(rankings, k=self.rrf_k)[:self.k]
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        rankings = await asyncio.gather(*(
+            retriever.aget_relevant_documents(query, callbacks=run_manager.get_child())
+            for retriever in self.retrievers
+        ))
+        return reciprocal_rank_fusion(list(rankings), k=self.rrf_k)[:self.k]
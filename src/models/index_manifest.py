@@ -0,0 +1,154 @@
+"""
+On-disk manifest of the files indexed in the RAG vector store
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Optional, Any
+
+MANIFEST_FILENAME = "index_manifest.json"
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 digest of a file's contents
+
+    Args:
+        file_path: Path to the file
+        block_size: Number of bytes read per iteration
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, index: int, content: str, start_index: Optional[int] = None) -> str:
+    """Derive a deterministic ID for a chunk
+
+    Args:
+        source: Source file path
+        index: Position of the chunk within the file
+        content: Chunk text
+        start_index: Character offset of the chunk, so that a chunk moved
+            by an edit before it is rewritten with its new offset
+
+    Returns:
+        ID that only changes when the chunk's source, position or text changes
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{source}\0{index}\0{start_index}\0{content_hash}".encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    """Records content hash and chunk IDs for every indexed source file
+
+    The manifest also stores the chunking parameters the index was built
+    with, so that a change in chunking invalidates every recorded file.
+    A change of the embedding model is flagged separately, since vectors
+    of another model may not even fit the existing collection.
+    """
+
+    def __init__(self, path: Optional[str], chunking: Dict[str, Any]):
+        """Initialize the manifest
+
+        Args:
+            path: JSON file backing the manifest, None keeps it in memory only
+            chunking: Chunking parameters the index is built with
+        """
+        self.path = path
+        self.chunking = dict(chunking)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.stale_ids: List[str] = []
+        self.embedding_changed = False
+
+        if path and os.path.exists(path):
+            self._read()
+
+    def _read(self) -> None:
+        """Read the manifest from disk"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading index manifest: {e}")
+            return
+
+        files = data.get("files", {})
+        chunking = data.get("chunking") or {}
+        self.embedding_changed = chunking.get("embedding_model") != self.chunking.get("embedding_model")
+        if chunking == self.chunking:
+            self.files = files
+        else:
+            # Chunking changed, every recorded chunk has to be rebuilt
+            for entry in files.values():
+                self.stale_ids.extend(entry.get("ids", []))
+
+    def is_current(self, source: str, digest: str) -> bool:
+        """Check whether a source is indexed with the given content hash
+
+        Args:
+            source: Source file path
+            digest: Current content hash of the file
+
+        Returns:
+            True if the indexed chunks are up to date
+        """
+        entry = self.files.get(source)
+        return entry is not None and entry.get("sha256") == digest
+
+    def get_ids(self, source: str) -> List[str]:
+        """Get the chunk IDs recorded for a source
+
+        Args:
+            source: Source file path
+
+        Returns:
+            List of chunk IDs, empty if the source is unknown
+        """
+        return list(self.files.get(source, {}).get("ids", []))
+
+    def record(self, source: str, digest: str, ids: List[str]) -> None:
+        """Record a freshly indexed source
+
+        Args:
+            source: Source file path
+            digest: Content hash of the indexed file
+            ids: Chunk IDs stored in the vector store
+        """
+        self.files[source] = {"sha256": digest, "ids": list(ids)}
+
+    def remove(self, source: str) -> List[str]:
+        """Forget a source
+
+        Args:
+            source: Source file path
+
+        Returns:
+            Chunk IDs that were recorded for the source
+        """
+        return list(self.files.pop(source, {}).get("ids", []))
+
+    def sources(self) -> List[str]:
+        """Get all recorded sources
+
+        Returns:
+            List of source file paths
+        """
+        return list(self.files)
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically"""
+        self.stale_ids = []
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"chunking": self.chunking, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
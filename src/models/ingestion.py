@@ -0,0 +1,222 @@
+"""
+Batched, concurrent embedding pipeline for document ingestion
+"""
+
+import time
+import random
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Tuple, Iterable, Callable, Optional
+
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+
+# Receives each finished batch as (ids, documents, vectors)
+BatchSink = Callable[[List[str], List[Document], List[List[float]]], None]
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Check whether an error is an HTTP 429 rate limit response
+
+    Args:
+        error: Exception raised by the embeddings backend
+
+    Returns:
+        True if the request should be retried after backing off
+    """
+    if getattr(error, "status_code", None) == 429:
+        return True
+    if getattr(getattr(error, "response", None), "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize the bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to one second worth of tokens
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until the requested tokens are available
+
+        Args:
+            tokens: Number of tokens to take
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+@dataclass
+class IngestionStats:
+    """Counters reported by an ingestion run"""
+
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Embedding throughput of the run"""
+        return self.chunks / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class FileFailure:
+    """A file that could not be indexed"""
+
+    path: str
+    stage: str
+    error: str
+
+
+@dataclass
+class IndexReport:
+    """Outcome of indexing a set of files"""
+
+    indexed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failures: List[FileFailure] = field(default_factory=list)
+    stats: IngestionStats = field(default_factory=IngestionStats)
+
+
+class EmbeddingPipeline:
+    """Embeds a stream of chunks in batches on a bounded worker pool
+
+    Chunks are pulled lazily from the input, so at most
+    ``max_workers`` batches are held in memory at any time. Finished
+    batches are handed to the sink on the calling thread as they
+    complete.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 64,
+        max_workers: int = 4,
+        requests_per_second: Optional[float] = None,
+        max_retries: int = 5,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0
+    ):
+        """Initialize the pipeline
+
+        Args:
+            embeddings: Embeddings backend
+            batch_size: Number of chunks per embedding request
+            max_workers: Maximum number of concurrent requests
+            requests_per_second: Request rate limit, None for no limit
+            max_retries: Retries for a rate limited batch
+            retry_base_delay: Base delay in seconds for exponential backoff
+            retry_max_delay: Upper bound of a single backoff delay
+        """
+        if batch_size < 1 or max_workers < 1:
+            raise ValueError("Batch size and worker count must be positive")
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._retries = 0
+        self._retries_lock = threading.Lock()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying rate limit errors with full jitter"""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+                attempt += 1
+                with self._retries_lock:
+                    self._retries += 1
+                time.sleep(random.uniform(0, delay))
+
+    def _batches(self, chunks: Iterable[Tuple[str, Document]]):
+        """Group the chunk stream into batches"""
+        batch = []
+        for item in chunks:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, chunks: Iterable[Tuple[str, Document]], sink: BatchSink) -> IngestionStats:
+        """Embed all chunks and deliver them to the sink
+
+        Args:
+            chunks: Iterable of (chunk ID, document) pairs, consumed lazily
+            sink: Called with (ids, documents, vectors) for every finished batch
+
+        Returns:
+            Statistics of the run
+
+        Raises:
+            Exception: The first error of a batch that could not be embedded
+        """
+        stats = IngestionStats()
+        self._retries = 0
+        start = time.perf_counter()
+
+        def deliver(future, batch):
+            vectors = future.result()
+            sink([chunk_id for chunk_id, _ in batch], [doc for _, doc in batch], vectors)
+            stats.chunks += len(batch)
+            stats.batches += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            try:
+                for batch in self._batches(chunks):
+                    # Backpressure: stop reading input while all workers are busy
+                    while len(in_flight) >= self.max_workers:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            deliver(future, in_flight.pop(future))
+                    texts = [doc.page_content for _, doc in batch]
+                    in_flight[executor.submit(self._embed_batch, texts)] = batch
+
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        deliver(future, in_flight.pop(future))
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        stats.retries = self._retries
+        stats.seconds = time.perf_counter() - start
+        return stats
@@ -2,8 +2,10 @@
 LLM utility functions for industrial automation chatbot
 """
 
-from typing import List, Dict, Optional, Any
-from langchain.chat_models import ChatOpenAI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Any, Iterator, AsyncIterator
 from langchain.schema import (
     AIMessage,
     HumanMessage,
@@ -13,6 +15,11 @@ from langchain.schema import (
 import os
 from dotenv import load_dotenv
 
+from src.models.client_registry import get_chat_model
+from src.models.history import HistoryManager
+from src.models.prompts import PromptAssembler, PrefixCache, TOPIC_GUIDANCE
+from src.models.single_flight import SingleFlight, request_key
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +30,23 @@ and smart building solutions. Provide accurate, technical, and helpful informati
 and automation specialists. When you don't know something, acknowledge the limitations of your knowledge and avoid
 making up information."""
 
+# Default number of conversations generated at the same time
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class ChatResponse:
+    """Outcome of one conversation in a batch"""
+
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether a response was generated"""
+        return self.error is None
+
+
 class IndustrialLLMHelper:
     """Helper class for industrial automation LLM interactions"""
     
@@ -31,7 +55,10 @@ class IndustrialLLMHelper:
         model_name: str = "gpt-3.5-turbo",
         temperature: float = 0.7,
         system_prompt: str = DEFAULT_SYSTEM_PROMPT,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        history: Optional[HistoryManager] = None,
+        guidance: Optional[Dict[str, str]] = None,
+        examples: Optional[List[Dict[str, str]]] = None
     ):
         """Initialize the Industrial LLM Helper
         
@@ -40,6 +67,12 @@ class IndustrialLLMHelper:
             temperature: Temperature parameter for generation
             system_prompt: System prompt to guide model behavior
             api_key: OpenAI API key, defaults to env variable
+            history: Bounds the conversation history sent with each request,
+                defaults to a HistoryManager with extractive summaries
+            guidance: Guidance per topic, added to the static prompt prefix,
+                defaults to TOPIC_GUIDANCE; an empty dict adds none
+            examples: Few-shot examples with "question" and "answer", added
+                to the static prompt prefix
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -48,29 +81,32 @@ class IndustrialLLMHelper:
         self.model_name = model_name
         self.temperature = temperature
         self.system_prompt = system_prompt
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=temperature,
-            openai_api_key=self.api_key
-        )
+        self.history = history or HistoryManager(model=model_name)
+        if guidance is None:
+            guidance = TOPIC_GUIDANCE
+        self.prompt = PromptAssembler(system_prompt, guidance, examples, PrefixCache(model=model_name))
+        self.single_flight = SingleFlight()
+        self.llm = get_chat_model(model_name, temperature, self.api_key)
     
-    def get_chat_response(self, messages: List[Dict[str, str]]) -> str:
-        """Generate a response using the chat model
+    def _to_lc_messages(
+        self,
+        messages: List[Dict[str, str]],
+        conversation_id: Optional[str] = None
+    ) -> List[BaseMessage]:
+        """Convert dictionary messages to LangChain message types
         
         Args:
             messages: List of messages in the conversation
+            conversation_id: Key of the conversation's cached history summary
             
         Returns:
-            The generated response text
+            LangChain messages, starting with the static prompt prefix
         """
-        # Convert dictionary messages to LangChain message types
         lc_messages = []
         
-        # Add system prompt at the beginning
-        lc_messages.append(SystemMessage(content=self.system_prompt))
-        
-        # Add the rest of the messages
-        for msg in messages:
+        # Static prefix (system prompt, guidance, examples) first, then the
+        # conversation with older turns summarized
+        for msg in self.prompt.assemble(self.history.compact(messages, conversation_id)):
             if msg["role"] == "user":
                 lc_messages.append(HumanMessage(content=msg["content"]))
             elif msg["role"] == "assistant":
@@ -78,24 +114,248 @@ class IndustrialLLMHelper:
             elif msg["role"] == "system":
                 lc_messages.append(SystemMessage(content=msg["content"]))
         
-        # Generate response
-        response = self.llm.generate([lc_messages])
+        return lc_messages
+    
+    def _call_params(
+        self,
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Build per-call parameter overrides for the chat model
+        
+        Overrides are sent with the request, so the client is not rebuilt.
+        
+        Args:
+            model_name: Model to use for this call instead of the default
+            temperature: Temperature to use for this call instead of the default
+            
+        Returns:
+            Keyword arguments for the chat model call
+        """
+        params = {}
+        if model_name is not None and model_name != self.model_name:
+            params["model"] = model_name
+        if temperature is not None and temperature != self.temperature:
+            params["temperature"] = temperature
+        return params
+    
+    def _request_key(
+        self,
+        lc_messages: List[BaseMessage],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """Identify a request for coalescing identical in-flight calls
+        
+        Args:
+            lc_messages: Prompt messages
+            model_name: Optional model override for this call
+            temperature: Optional temperature override for this call
+            
+        Returns:
+            Hash of the normalized messages and the effective parameters
+        """
+        return request_key(
+            [{"role": msg.type, "content": msg.content} for msg in lc_messages],
+            model=model_name or self.model_name,
+            temperature=self.temperature if temperature is None else temperature
+        )
+    
+    def get_chat_response(
+        self,
+        messages: List[Dict[str, str]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> str:
+        """Generate a response using the chat model
+        
+        Args:
+            messages: List of messages in the conversation
+            model_name: Optional model override for this call
+            temperature: Optional temperature override for this call
+            conversation_id: Identifies the conversation so that the summary
+                of its older turns is cached between calls
+            
+        Returns:
+            The generated response text
+        """
+        lc_messages = self._to_lc_messages(messages, conversation_id)
+        params = self._call_params(model_name, temperature)
+        llm = self.llm
+        
+        # Generate response, sharing it with identical requests in flight
+        def generate() -> str:
+            response = llm.generate([lc_messages], **params)
+            return response.generations[0][0].text
+        
+        return self.single_flight.do(self._request_key(lc_messages, model_name, temperature), generate)
+    
+    async def aget_chat_response(
+        self,
+        messages: List[Dict[str, str]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> str:
+        """Asynchronously generate a response using the chat model
+        
+        Args:
+            messages: List of messages in the conversation
+            model_name: Optional model override for this call
+            temperature: Optional temperature override for this call
+            conversation_id: Identifies the conversation so that the summary
+                of its older turns is cached between calls
+            
+        Returns:
+            The generated response text
+        """
+        lc_messages = self._to_lc_messages(messages, conversation_id)
+        params = self._call_params(model_name, temperature)
+        llm = self.llm
+        
+        async def generate() -> str:
+            response = await llm.agenerate([lc_messages], **params)
+            return response.generations[0][0].text
         
-        # Extract and return generated text
-        return response.generations[0][0].text
+        return await self.single_flight.ado(self._request_key(lc_messages, model_name, temperature), generate)
+    
+    def get_chat_responses(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ) -> List[ChatResponse]:
+        """Generate responses for many conversations concurrently
+        
+        A failing conversation is reported in its own result and does not
+        affect the others.
+        
+        Args:
+            conversations: Message lists, one per conversation
+            model_name: Optional model override for these calls
+            temperature: Optional temperature override for these calls
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            One result per conversation, in input order
+        """
+        if not conversations:
+            return []
+        
+        def respond(messages: List[Dict[str, str]]) -> ChatResponse:
+            try:
+                return ChatResponse(text=self.get_chat_response(messages, model_name, temperature))
+            except Exception as e:
+                return ChatResponse(error=f"{type(e).__name__}: {e}")
+        
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(conversations))) as executor:
+            return list(executor.map(respond, conversations))
+    
+    async def aget_chat_responses(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ) -> List[ChatResponse]:
+        """Asynchronously generate responses for many conversations
+        
+        Args:
+            conversations: Message lists, one per conversation
+            model_name: Optional model override for these calls
+            temperature: Optional temperature override for these calls
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            One result per conversation, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def respond(messages: List[Dict[str, str]]) -> ChatResponse:
+            async with semaphore:
+                try:
+                    return ChatResponse(text=await self.aget_chat_response(messages, model_name, temperature))
+                except Exception as e:
+                    return ChatResponse(error=f"{type(e).__name__}: {e}")
+        
+        return list(await asyncio.gather(*(respond(messages) for messages in conversations)))
+    
+    def stream_chat_response(
+        self,
+        messages: List[Dict[str, str]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """Generate a response, yielding tokens as they arrive
+        
+        Args:
+            messages: List of messages in the conversation
+            model_name: Optional model override for this call
+            temperature: Optional temperature override for this call
+            conversation_id: Identifies the conversation so that the summary
+                of its older turns is cached between calls
+            
+        Yields:
+            Pieces of the generated response text
+        """
+        lc_messages = self._to_lc_messages(messages, conversation_id)
+        params = self._call_params(model_name, temperature)
+        llm = self.llm
+        
+        def tokens() -> Iterator[str]:
+            for chunk in llm.stream(lc_messages, **params):
+                if chunk.content:
+                    yield chunk.content
+        
+        # Subscribers of an identical stream in flight join it mid-stream
+        yield from self.single_flight.stream(self._request_key(lc_messages, model_name, temperature), tokens)
+    
+    async def astream_chat_response(
+        self,
+        messages: List[Dict[str, str]],
+        model_name: Optional[str] = None,
+        temperature: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Asynchronously generate a response, yielding tokens as they arrive
+        
+        Args:
+            messages: List of messages in the conversation
+            model_name: Optional model override for this call
+            temperature: Optional temperature override for this call
+            conversation_id: Identifies the conversation so that the summary
+                of its older turns is cached between calls
+            
+        Yields:
+            Pieces of the generated response text
+        """
+        lc_messages = self._to_lc_messages(messages, conversation_id)
+        params = self._call_params(model_name, temperature)
+        llm = self.llm
+        
+        async def tokens() -> AsyncIterator[str]:
+            async for chunk in llm.astream(lc_messages, **params):
+                if chunk.content:
+                    yield chunk.content
+        
+        key = self._request_key(lc_messages, model_name, temperature)
+        async for token in self.single_flight.astream(key, tokens):
+            yield token
     
     def change_model(self, model_name: str) -> None:
         """Change the underlying LLM model
         
+        Chat models come from the process-wide client registry, so switching
+        back and forth reuses existing clients and open connections.
+        
         Args:
             model_name: New model name to use
         """
         self.model_name = model_name
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=self.temperature,
-            openai_api_key=self.api_key
-        )
+        self.llm = get_chat_model(model_name, self.temperature, self.api_key)
     
     def change_temperature(self, temperature: float) -> None:
         """Change the temperature parameter
@@ -107,12 +367,24 @@ class IndustrialLLMHelper:
             raise ValueError("Temperature must be between 0.0 and 1.0")
         
         self.temperature = temperature
-        self.llm = ChatOpenAI(
-            model_name=self.model_name,
-            temperature=temperature,
-            openai_api_key=self.api_key
-        )
+        self.llm = get_chat_model(self.model_name, temperature, self.api_key)
+        
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Get how many requests joined an identical request in flight
+        
+        Returns:
+            Dictionary with calls, coalesced calls and the coalesced ratio
+        """
+        return self.single_flight.stats()
+    
+    def prefix_cache_stats(self) -> Dict[str, Any]:
+        """Get how much of the sent prompts repeated earlier prefixes
         
+        Returns:
+            Dictionary with requests, prefix hits, hit ratio and cached tokens
+        """
+        return self.prompt.cache.stats()
+    
     def get_industrial_examples(self) -> List[Dict[str, str]]:
         """Get example questions for industrial automation
         
@@ -0,0 +1,112 @@
+"""
+Document loading, optionally parallelized across a process pool
+"""
+
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Any
+
+from langchain.document_loaders import TextLoader, PyPDFLoader
+from langchain.schema import Document
+
+# Loader used for each supported file extension
+LOADERS = {
+    ".txt": TextLoader,
+    ".pdf": PyPDFLoader,
+}
+
+# Metadata fields added to every chunk of a loaded file
+FILE_METADATA_FIELDS = ("file_type", "topic", "modified")
+
+# Topic of files placed directly in the documents directory
+DEFAULT_TOPIC = "general"
+
+
+@dataclass
+class LoadedFile:
+    """Outcome of loading one file"""
+
+    path: str
+    documents: List[Document]
+    error: Optional[str] = None
+
+
+def load_file(file_path: str) -> LoadedFile:
+    """Load a file with the loader for its extension
+
+    Errors are captured in the result so that a worker process never
+    fails a whole batch because of one bad file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        The loaded documents or the error message
+    """
+    try:
+        return LoadedFile(file_path, LOADERS[Path(file_path).suffix](file_path).load())
+    except Exception as e:
+        return LoadedFile(file_path, [], f"{type(e).__name__}: {e}")
+
+
+def file_metadata(file_path: str, root: str) -> Dict[str, Any]:
+    """Describe a file for metadata filtering
+
+    The topic is the first directory below the documents directory, so a
+    corpus organized as docs/plc/..., docs/site_a/... can be searched one
+    directory at a time.
+
+    Args:
+        file_path: Path to the file
+        root: Documents directory
+
+    Returns:
+        Dictionary with file_type, topic and modified (Unix time in seconds)
+    """
+    path = Path(file_path)
+    try:
+        parts = path.resolve().relative_to(Path(root).resolve()).parts
+        topic = parts[0] if len(parts) > 1 else DEFAULT_TOPIC
+    except ValueError:
+        # Files added from outside the documents directory
+        topic = path.parent.name or DEFAULT_TOPIC
+    return {
+        "file_type": path.suffix.lstrip(".").lower(),
+        "topic": topic,
+        "modified": int(path.stat().st_mtime)
+    }
+
+
+def iter_load_files(file_paths: List[str], max_workers: int = 1) -> Iterator[LoadedFile]:
+    """Load files, yielding each one as soon as it is parsed
+
+    Args:
+        file_paths: Files to load
+        max_workers: Number of worker processes, 1 loads in the calling process
+
+    Yields:
+        Loaded files in completion order
+    """
+    if max_workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield load_file(file_path)
+        return
+
+    remaining = iter(file_paths)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded window of files in flight so parsed documents
+        # do not pile up faster than they are consumed
+        in_flight = set()
+        for file_path in remaining:
+            in_flight.add(executor.submit(load_file, file_path))
+            if len(in_flight) >= 2 * max_workers:
+                break
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    in_flight.add(executor.submit(load_file, next_path))
@@ -0,0 +1,663 @@
+"""
+Vector store keeping (optionally quantized) vectors in a memory-mapped file
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import tempfile
+import threading
+import itertools
+from typing import List, Dict, Tuple, Optional, Any, Iterable
+
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+from langchain.schema.vectorstore import VectorStore
+
+from src.models.metadata_filter import MetadataFilter, matches_filter
+
+VECTOR_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Rows scored per step of a search, bounding the memory of a query
+SEARCH_BLOCK_ROWS = 16384
+
+# IDs per SQL lookup, below SQLite's limit on query parameters
+SQL_BATCH_IDS = 500
+
+# Values of an $in condition evaluated in SQL, larger lists are matched in Python
+SQL_MAX_IN_VALUES = 500
+
+# Rows added to the vector file whenever it runs full
+GROWTH_ROWS = 4096
+
+# Chunks per inverted list needed before the IVF index is trained
+IVF_MIN_POINTS_PER_LIST = 8
+
+# Vectors sampled per inverted list to train the IVF centroids
+IVF_SAMPLE_PER_LIST = 64
+
+# Retrain the IVF index once the store grew by this factor since training
+IVF_RETRAIN_GROWTH = 4.0
+
+# k-means iterations when training the IVF centroids
+IVF_ITERATIONS = 10
+
+
+def _sql_value(value: Any) -> bool:
+    """Whether SQLite compares a filter value like Python does"""
+    if isinstance(value, int):
+        return -(1 << 63) <= value < 1 << 63
+    return isinstance(value, str) or (isinstance(value, float) and value == value)
+
+
+def _sql_filter(where: Optional[MetadataFilter]) -> Tuple[List[str], List[Any], Optional[MetadataFilter]]:
+    """Split a filter into SQL conditions and the part matched in Python
+
+    Equality and $in conditions on a field, alone or combined with $and,
+    become conditions on the indexed source column or on json_extract of
+    the metadata, so SQLite skips non-matching rows without decoding their
+    JSON in Python. Other operators and $or are left to matches_filter.
+
+    Args:
+        where: Metadata filter
+
+    Returns:
+        SQL conditions to combine with AND, their parameters, and the
+        remaining filter, None if SQL evaluates the whole filter
+    """
+    conjuncts: List[Tuple[str, Any]] = []
+    pending = [where or {}]
+    while pending:
+        for key, condition in pending.pop().items():
+            if key == "$and":
+                pending.extend(condition)
+            else:
+                conjuncts.append((key, condition))
+
+    conditions: List[str] = []
+    params: List[Any] = []
+    remaining: List[MetadataFilter] = []
+    for key, condition in conjuncts:
+        values = [condition]
+        if isinstance(condition, dict) and list(condition) == ["$eq"]:
+            values = [condition["$eq"]]
+        elif isinstance(condition, dict) and list(condition) == ["$in"]:
+            values = list(condition["$in"])
+        if (
+            key.startswith("$") or '"' in key or not values or len(values) > SQL_MAX_IN_VALUES
+            or not all(_sql_value(value) for value in values)
+        ):
+            remaining.append({key: condition})
+            continue
+        if key == "source" and all(isinstance(value, str) for value in values):
+            column = "source"
+        else:
+            column = "json_extract(metadata, ?)"
+            params.append(f'$."{key}"')
+        conditions.append(f"{column} IN ({','.join('?' * len(values))})")
+        params.extend(values)
+
+    if not remaining:
+        return conditions, params, None
+    return conditions, params, remaining[0] if len(remaining) == 1 else {"$and": remaining}
+
+
+class MemmapVectorStore(VectorStore):
+    """Cosine search over vectors stored in a memory-mapped file
+
+    Vectors are normalized and stored as float32, float16 or int8 with a
+    per-vector scale. Texts and metadata live in a SQLite file next to the
+    vectors. Opening a store maps the files without reading them, and a
+    search scans the vectors block by block, so resident memory stays
+    bounded regardless of the corpus size.
+
+    With index="ivf" the vectors are clustered around nlist k-means
+    centroids and a search only scores the nprobe closest clusters,
+    trading recall for latency. The index is trained once enough chunks
+    are stored, new chunks are assigned to their closest centroid on
+    insert, and the centroids are retrained as the store keeps growing.
+
+    Equality and $in metadata filters are evaluated by SQLite. Other
+    operators and $or still decode and test the metadata of every row
+    left after those conditions, so they scan the table in Python.
+
+    The read/write methods mirror the parts of the Chroma API used by
+    IndustrialRAG: get, upsert, update, delete, count and similarity_search.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        index: str = "flat",
+        nlist: int = 256,
+        nprobe: int = 8
+    ):
+        """Open or create the store
+
+        Args:
+            embedding_function: Embeddings used for queries
+            path: Directory of the store, None uses a temporary directory
+                removed when the store is garbage collected
+            dtype: Storage type of the vectors, "float32", "float16" or "int8"
+            index: "flat" for exact search, "ivf" for an inverted file index
+            nlist: Number of IVF clusters
+            nprobe: Number of IVF clusters scored per query
+        """
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unsupported vector index: {index}")
+        self.embedding_function = embedding_function
+        self._tmp_dir = None
+        if path is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="memmap_store_")
+            path = self._tmp_dir.name
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dtype = dtype
+        self.index = index
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(os.path.join(path, "records.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, source TEXT, "
+            "document TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+        self._conn.commit()
+
+        self._info_path = os.path.join(path, "vectors.json")
+        self.dim: Optional[int] = None
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._assignments: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_count = 0
+        self._centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(self._info_path):
+            with open(self._info_path, "r") as f:
+                info = json.load(f)
+            if info["dtype"] != dtype:
+                raise ValueError(f"Store at {path} holds {info['dtype']} vectors, not {dtype}")
+            self.dim = info["dim"]
+            self._map(info["capacity"])
+            if info.get("nlist") == nlist and os.path.exists(self._centroids_path):
+                self._centroids = np.load(self._centroids_path)
+                self._trained_count = info["trained_count"]
+
+        # Row bookkeeping: which rows hold a chunk and which can be reused
+        self._rows: Dict[str, int] = dict(self._conn.execute("SELECT id, row FROM chunks"))
+        self._live = np.zeros(self._capacity, dtype=bool)
+        if self._rows:
+            self._live[np.fromiter(self._rows.values(), dtype=np.int64)] = True
+        self._free = [int(row) for row in np.flatnonzero(~self._live)[::-1]]
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def _map(self, capacity: int) -> None:
+        """Map the vector, scale and IVF assignment files with room for capacity rows"""
+        assignments_path = os.path.join(self.path, "assignments.bin")
+        if not os.path.exists(assignments_path) or os.path.getsize(assignments_path) < capacity * 4:
+            with open(assignments_path, "ab") as f:
+                f.truncate(capacity * 4)
+        # Stores the IVF cluster of each row plus one, 0 means unassigned
+        self._assignments = np.memmap(assignments_path, dtype=np.int32, mode="r+", shape=(capacity,))
+        self._vectors = np.memmap(
+            os.path.join(self.path, "vectors.bin"),
+            dtype=VECTOR_DTYPES[self.dtype],
+            mode="r+",
+            shape=(capacity, self.dim)
+        )
+        self._scales = np.memmap(
+            os.path.join(self.path, "scales.bin"),
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity,)
+        )
+        self._capacity = capacity
+
+    def _grow(self, needed: int) -> None:
+        """Extend the files so that at least needed more rows fit"""
+        previous = self._capacity
+        capacity = previous + max(needed, GROWTH_ROWS, previous // 2)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._scales.flush()
+            self._assignments.flush()
+            self._vectors = self._scales = self._assignments = None
+        # Growing a file with truncate keeps existing rows and zero-fills the rest
+        row_bytes = self.dim * np.dtype(VECTOR_DTYPES[self.dtype]).itemsize
+        for name, size in (("vectors.bin", capacity * row_bytes), ("scales.bin", capacity * 4)):
+            with open(os.path.join(self.path, name), "ab") as f:
+                f.truncate(size)
+        self._map(capacity)
+        self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        self._free.extend(range(capacity - 1, previous - 1, -1))
+        self._write_info()
+
+    def _write_info(self) -> None:
+        """Record the layout of the vector files and the IVF training state"""
+        info = {"dim": self.dim, "dtype": self.dtype, "capacity": self._capacity}
+        if self._centroids is not None:
+            info.update(nlist=len(self._centroids), trained_count=self._trained_count)
+        with open(self._info_path, "w") as f:
+            json.dump(info, f)
+
+    def _decode(self, rows: Any) -> np.ndarray:
+        """Read stored vectors back as float32"""
+        return self._vectors[rows].astype(np.float32) * self._scales[rows][:, None]
+
+    def _assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Store the closest IVF centroid of each row"""
+        self._assignments[rows] = np.argmax(vectors @ self._centroids.T, axis=1) + 1
+
+    def build_index(self) -> None:
+        """Train the IVF centroids with spherical k-means and assign every chunk"""
+        with self._lock:
+            live = np.flatnonzero(self._live)
+            if len(live) == 0:
+                return
+            nlist = min(self.nlist, len(live))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live, size=min(len(live), nlist * IVF_SAMPLE_PER_LIST), replace=False))
+            points = self._decode(sample)
+
+            centroids = points[rng.choice(len(points), size=nlist, replace=False)]
+            for _ in range(IVF_ITERATIONS):
+                labels = np.argmax(points @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, points)
+                counts = np.bincount(labels, minlength=nlist)
+                # Restart empty clusters from random points
+                empty = counts == 0
+                sums[empty] = points[rng.choice(len(points), size=int(empty.sum()))]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+            self._centroids = centroids.astype(np.float32)
+            for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                rows = live[start:start + SEARCH_BLOCK_ROWS]
+                self._assign(rows, self._decode(rows))
+            self._assignments.flush()
+            self._trained_count = len(live)
+            np.save(self._centroids_path, self._centroids)
+            self._write_info()
+
+    def _maybe_train(self) -> None:
+        """Train or retrain the IVF index when the store grew enough"""
+        if self.index != "ivf":
+            return
+        count = len(self._rows)
+        if self._centroids is None:
+            if count >= self.nlist * IVF_MIN_POINTS_PER_LIST:
+                self.build_index()
+        elif count >= IVF_RETRAIN_GROWTH * self._trained_count:
+            self.build_index()
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalize and quantize vectors into (stored values, scales)"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        if self.dtype != "int8":
+            return vectors.astype(VECTOR_DTYPES[self.dtype]), np.ones(len(vectors), dtype=np.float32)
+        peaks = np.abs(vectors).max(axis=1)
+        scales = np.where(peaks == 0, 1.0, peaks / 127.0).astype(np.float32)
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> None:
+        """Add chunks with precomputed vectors, replacing existing IDs
+
+        Args:
+            ids: Chunk IDs
+            embeddings: Chunk vectors
+            documents: Chunk texts
+            metadatas: Chunk metadata
+        """
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            new = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._rows]
+            if len(new) > len(self._free):
+                self._grow(len(new) - len(self._free))
+            for chunk_id in new:
+                self._rows[chunk_id] = self._free.pop()
+
+            rows = np.array([self._rows[chunk_id] for chunk_id in ids], dtype=np.int64)
+            values, scales = self._encode(vectors)
+            self._vectors[rows] = values
+            self._scales[rows] = scales
+            if self._centroids is not None:
+                self._assign(rows, values.astype(np.float32) * scales[:, None])
+            self._vectors.flush()
+            self._scales.flush()
+            self._assignments.flush()
+            self._live[rows] = True
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, id, source, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (int(row), chunk_id, (metadata or {}).get("source"), document, json.dumps(metadata or {}))
+                    for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ]
+            )
+            self._conn.commit()
+            self._maybe_train()
+
+    def update(self, ids: List[str], metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        """Replace the metadata of stored chunks, ignoring unknown IDs
+
+        Args:
+            ids: Chunk IDs
+            metadatas: New chunk metadata
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET source = ?, metadata = ? WHERE id = ?",
+                [
+                    ((metadata or {}).get("source"), json.dumps(metadata or {}), chunk_id)
+                    for chunk_id, metadata in zip(ids, metadatas)
+                ]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        """Delete chunks, ignoring unknown IDs
+
+        Args:
+            ids: Chunk IDs
+        """
+        with self._lock:
+            rows = [self._rows.pop(chunk_id) for chunk_id in ids or [] if chunk_id in self._rows]
+            if not rows:
+                return
+            self._live[rows] = False
+            self._free.extend(rows)
+            self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Flush the vectors and close the files"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._scales.flush()
+                self._assignments.flush()
+            self._vectors = self._scales = self._assignments = None
+            self._conn.close()
+
+    def count(self) -> int:
+        """Number of stored chunks"""
+        return len(self._rows)
+
+    def _records(
+        self,
+        ids: Optional[List[str]],
+        where: Optional[MetadataFilter],
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterable[Tuple]:
+        """Yield (row, id, document, metadata) of the chunks matching ids and where"""
+        if ids is not None:
+            # ID lookups use the unique index instead of scanning the table
+            rows = []
+            ids = list(dict.fromkeys(ids))
+            for start in range(0, len(ids), SQL_BATCH_IDS):
+                batch = ids[start:start + SQL_BATCH_IDS]
+                rows.extend(self._conn.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE id IN ({','.join('?' * len(batch))})",
+                    batch
+                ))
+            rows.sort()
+        else:
+            conditions, params, where = _sql_filter(where)
+            query = "SELECT row, id, document, metadata FROM chunks"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY row"
+            if not where and (limit is not None or offset):
+                query += " LIMIT ? OFFSET ?"
+                params.extend([-1 if limit is None else limit, offset])
+                limit, offset = None, 0
+            rows = self._conn.execute(query, params)
+        records = (
+            (row, chunk_id, document, json.loads(metadata))
+            for row, chunk_id, document, metadata in rows
+        )
+        matching = (record for record in records if matches_filter(record[3], where))
+        yield from itertools.islice(matching, offset, None if limit is None else offset + limit)
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[MetadataFilter] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Fetch stored chunks like Chroma's get
+
+        Args:
+            ids: Only return these chunk IDs
+            where: Only return chunks whose metadata matches this filter
+            limit: Maximum number of chunks returned, in storage order
+            offset: Number of matching chunks skipped before the first one returned
+            include: Fields to return besides IDs, "documents" and "metadatas"
+
+        Returns:
+            Dictionary with "ids", "documents" and "metadatas" lists, fields
+            not included are None
+        """
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            records = list(self._records(ids, where, limit, offset or 0))
+        return {
+            "ids": [chunk_id for _, chunk_id, _, _ in records],
+            "documents": [document for _, _, document, _ in records] if "documents" in include else None,
+            "metadatas": [metadata for _, _, _, metadata in records] if "metadatas" in include else None,
+        }
+
+    def _search(
+        self,
+        vector: List[float],
+        k: int,
+        where: Optional[MetadataFilter],
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Find the rows with the highest cosine similarity"""
+        with self._lock:
+            if self.dim is None or not self._rows:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+
+            mask = self._live
+            if where:
+                mask = np.zeros(self._capacity, dtype=bool)
+                conditions, params, remaining = _sql_filter(where)
+                if remaining is None:
+                    rows = [row for row, in self._conn.execute(
+                        "SELECT row FROM chunks WHERE " + " AND ".join(conditions), params
+                    )]
+                else:
+                    rows = [row for row, _, _, _ in self._records(None, where)]
+                mask[rows] = True
+
+            if self.index == "ivf" and self._centroids is not None:
+                # Only score the rows of the clusters closest to the query
+                probes = min(nprobe or self.nprobe, len(self._centroids))
+                closest = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+                candidates = np.flatnonzero(mask & np.isin(self._assignments, closest + 1))
+                blocks = (
+                    candidates[start:start + SEARCH_BLOCK_ROWS]
+                    for start in range(0, len(candidates), SEARCH_BLOCK_ROWS)
+                )
+            else:
+                blocks = (
+                    np.flatnonzero(mask[start:start + SEARCH_BLOCK_ROWS]) + start
+                    for start in range(0, self._capacity, SEARCH_BLOCK_ROWS)
+                )
+
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            for rows in blocks:
+                if len(rows) == 0:
+                    continue
+                scores = (self._vectors[rows].astype(np.float32) @ query) * self._scales[rows]
+                top = min(k, len(rows))
+                block_best = np.argpartition(-scores, top - 1)[:top]
+                best_rows = np.concatenate([best_rows, rows[block_best]])
+                best_scores = np.concatenate([best_scores, scores[block_best]])
+                if len(best_rows) > k:
+                    keep = np.argpartition(-best_scores, k - 1)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+            order = np.argsort(-best_scores, kind="stable")
+            return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def _documents(self, hits: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        """Load the documents of search hits"""
+        if not hits:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(hits))
+            records = {
+                row: (document, metadata)
+                for row, document, metadata in self._conn.execute(
+                    f"SELECT row, document, metadata FROM chunks WHERE row IN ({placeholders})",
+                    [row for row, _ in hits]
+                )
+            }
+        return [
+            (Document(page_content=records[row][0], metadata=json.loads(records[row][1])), score)
+            for row, score in hits
+            if row in records
+        ]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Find the chunks closest to a vector
+
+        Args:
+            embedding: Query vector
+            k: Number of results
+            filter: Only search chunks whose metadata matches this filter
+            **kwargs: nprobe overrides the number of IVF clusters scored
+
+        Returns:
+            List of (document, cosine similarity) pairs, best first
+        """
+        return self._documents(self._search(embedding, k, filter, kwargs.get("nprobe")))
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter, **kwargs)]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding_function.embed_query(query), k, filter, **kwargs
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed and add texts
+
+        Args:
+            texts: Texts to add
+            metadatas: Metadata of the texts
+            ids: IDs of the texts, generated if not given
+
+        Returns:
+            IDs of the added texts
+        """
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, self.embedding_function.embed_documents(texts), texts, metadatas)
+        return ids
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        **kwargs: Any
+    ) -> "MemmapVectorStore":
+        """Create a store from texts
+
+        Args:
+            texts: Texts to add
+            embedding: Embeddings backend
+            metadatas: Metadata of the texts
+            ids: IDs of the texts
+            path: Directory of the store
+            dtype: Storage type of the vectors
+
+        Returns:
+            The new store
+        """
+        store = cls(embedding, path=path, dtype=dtype)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
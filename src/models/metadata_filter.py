@@ -0,0 +1,76 @@
+"""
+Metadata filters in the Chroma "where" syntax, evaluated in Python
+"""
+
+from typing import Dict, Any, Optional
+
+MetadataFilter = Dict[str, Any]
+
+COMPARISONS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def to_chroma_where(metadata_filter: Optional[MetadataFilter]) -> Optional[MetadataFilter]:
+    """Convert a filter into a where clause Chroma accepts
+
+    Chroma requires several field conditions to be combined explicitly,
+    so {"a": 1, "b": 2} becomes {"$and": [{"a": 1}, {"b": 2}]}.
+
+    Args:
+        metadata_filter: Filter, None for no filter
+
+    Returns:
+        Equivalent Chroma where clause, None for no filter
+    """
+    if not metadata_filter:
+        return None
+    if len(metadata_filter) == 1:
+        return metadata_filter
+    return {"$and": [{key: value} for key, value in metadata_filter.items()]}
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Optional[MetadataFilter]) -> bool:
+    """Check whether metadata satisfies a filter
+
+    Supports field equality, the comparison operators $eq, $ne, $gt,
+    $gte, $lt, $lte, $in and $nin, and the logical operators $and and $or.
+
+    Args:
+        metadata: Chunk metadata
+        metadata_filter: Filter, None matches everything
+
+    Returns:
+        True if the metadata matches
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator
+    """
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {key}")
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, target in condition.items():
+                if operator not in COMPARISONS:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                if not COMPARISONS[operator](value, target):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
@@ -0,0 +1,192 @@
+"""
+Prompt assembly with a byte-stable static prefix and prefix cache statistics
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any
+
+from langchain.prompts import ChatPromptTemplate
+
+from src.models.tokenizer import count_tokens
+
+# Maximum number of message prefixes remembered by the prefix cache
+PREFIX_CACHE_ENTRIES = 4096
+
+# Instructions of RAG answers. The retrieved context and the question
+# follow in the user message, so the system message never changes.
+RAG_SYSTEM_PROMPT = """You are an expert assistant for industrial automation and building automation documentation.
+Answer the question using the context provided with it. If the context does not contain the answer,
+say that you don't know instead of making one up."""
+
+RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", RAG_SYSTEM_PROMPT),
+    ("human", "Context:\n{context}\n\nQuestion: {question}"),
+])
+
+# Guidance per topic, added to the static prompt prefix of IndustrialLLMHelper
+TOPIC_GUIDANCE = {
+    "PLC Programming": "Name the IEC 61131-3 language used and mention vendor-specific differences.",
+    "SCADA Systems": "Consider availability and network segmentation alongside functionality.",
+    "Industrial IoT": "State the protocols involved, such as OPC UA or MQTT, and where data is processed.",
+    "Building Automation": "Relate answers to BACnet, KNX or Modbus where applicable.",
+    "Manufacturing Execution Systems": "Refer to ISA-95 levels when describing integrations.",
+    "Smart Factory Solutions": "Mention the sensors and data required for the proposed solution.",
+}
+
+
+def _chain_digest(previous: str, message: Dict[str, str]) -> str:
+    """Digest of a message prefix, extending the digest of the prefix before it"""
+    return hashlib.sha256(
+        f"{previous}\x00{message['role']}\x00{message['content']}".encode("utf-8")
+    ).hexdigest()
+
+
+class PrefixCache:
+    """Local stand-in for a provider-side prompt prefix (KV) cache
+
+    Remembers every message prefix of the prompts it has seen. For a new
+    prompt, the longest remembered prefix is what a prefix cache could
+    skip during prefill, so its tokens are counted as cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PREFIX_CACHE_ENTRIES,
+        min_tokens: int = 0,
+        model: str = "gpt-3.5-turbo"
+    ):
+        """Initialize the cache
+
+        Args:
+            max_entries: Maximum number of remembered prefixes
+            min_tokens: Shortest prefix counted as a hit (OpenAI caches
+                prefixes of 1024 tokens or more)
+            model: Model whose tokenizer counts prompt tokens
+        """
+        self.max_entries = max_entries
+        self.min_tokens = min_tokens
+        self.model = model
+        self._prefixes: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, messages: List[Dict[str, str]]) -> int:
+        """Record a prompt and measure its cached prefix
+
+        Args:
+            messages: Prompt messages with "role" and "content"
+
+        Returns:
+            Number of prompt tokens covered by a previously seen prefix
+        """
+        digests = []
+        digest = ""
+        for msg in messages:
+            digest = _chain_digest(digest, msg)
+            digests.append(digest)
+
+        with self._lock:
+            known = [self._prefixes.get(digest) for digest in digests]
+
+        # Digests are chained, so the last known one marks the longest
+        # known prefix; only the messages after it are tokenized
+        matched = max((index + 1 for index, tokens in enumerate(known) if tokens is not None), default=0)
+        cached = known[matched - 1] if matched else 0
+        cumulative = list(known[:matched])
+        total = cached
+        for msg in messages[matched:]:
+            total += count_tokens(msg["content"], self.model)
+            cumulative.append(total)
+        if cached < self.min_tokens:
+            cached = 0
+
+        with self._lock:
+            for digest, tokens in zip(digests, cumulative):
+                if tokens is not None:
+                    self._prefixes[digest] = tokens
+                    self._prefixes.move_to_end(digest)
+            while len(self._prefixes) > self.max_entries:
+                self._prefixes.popitem(last=False)
+            self.requests += 1
+            self.hits += 1 if cached else 0
+            self.prompt_tokens += total
+            self.cached_tokens += cached
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        """Get prefix hit counters
+
+        Returns:
+            Dictionary with requests, prefix hits, hit ratio, prompt tokens,
+            cached tokens and the share of prompt tokens that were cached
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prefix_hits": self.hits,
+                "hit_ratio": self.hits / self.requests if self.requests else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "token_hit_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            }
+
+
+class PromptAssembler:
+    """Builds prompts as a static prefix followed by variable messages
+
+    The prefix holds the system prompt, topic guidance and few-shot
+    examples. It is built once, in a fixed order, so every request starts
+    with byte-identical messages that provider-side prompt caching can
+    reuse. Conversation history, retrieved context and the question
+    always come after it.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        guidance: Optional[Dict[str, str]] = None,
+        examples: Optional[List[Dict[str, str]]] = None,
+        cache: Optional[PrefixCache] = None
+    ):
+        """Initialize the assembler
+
+        Args:
+            system_prompt: System prompt
+            guidance: Guidance per topic, added to the system message in
+                sorted topic order
+            examples: Few-shot examples with "question" and "answer"
+            cache: Prefix cache recording assembled prompts, defaults to a new one
+        """
+        content = system_prompt
+        if guidance:
+            lines = [f"- {topic}: {guidance[topic]}" for topic in sorted(guidance)]
+            content += "\n\nTopic guidance:\n" + "\n".join(lines)
+        prefix = [{"role": "system", "content": content}]
+        for example in examples or []:
+            prefix.append({"role": "user", "content": example["question"]})
+            prefix.append({"role": "assistant", "content": example["answer"]})
+        self._prefix = tuple(prefix)
+        self.cache = cache or PrefixCache()
+
+    @property
+    def prefix(self) -> List[Dict[str, str]]:
+        """Static prefix messages"""
+        return [dict(msg) for msg in self._prefix]
+
+    def assemble(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Put the static prefix in front of the variable messages
+
+        Args:
+            messages: Variable messages, e.g. the compacted conversation history
+
+        Returns:
+            Prompt messages
+        """
+        prompt = self.prefix + list(messages)
+        self.cache.record(prompt)
+        return prompt
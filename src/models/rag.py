@@ -3,15 +3,77 @@ Retrieval Augmented Generation (RAG) implementation for industrial documentation
 """
 
 import os
-from typing import List, Dict, Optional, Any
+import json
+import time
+import shutil
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Iterator, AsyncIterator
 from pathlib import Path
 
-from langchain.document_loaders import DirectoryLoader, TextLoader, PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import Chroma
 from langchain.chains import RetrievalQA
-from langchain.chat_models import ChatOpenAI
+from langchain.schema import Document, BaseMessage, BaseRetriever
+from langchain.schema.vectorstore import VectorStore
+
+from src.models.bm25 import BM25Index
+from src.models.client_registry import get_chat_model
+from src.models.context import ContextPacker
+from src.models.embedding_cache import CachedEmbeddings
+from src.models.embeddings import DEFAULT_EMBEDDING_MODELS, create_embeddings
+from src.models.hybrid import HybridRetriever, FanOutRetriever
+from src.models.index_manifest import IndexManifest, MANIFEST_FILENAME, file_sha256, chunk_id
+from src.models.ingestion import EmbeddingPipeline, IngestionStats, IndexReport, FileFailure
+from src.models.loading import LOADERS, FILE_METADATA_FIELDS, file_metadata, iter_load_files
+from src.models.memmap_store import MemmapVectorStore
+from src.models.metadata_filter import MetadataFilter, to_chroma_where
+from src.models.prompts import RAG_PROMPT, PrefixCache
+from src.models.rerank import Reranker, Scorer
+from src.models.response_cache import SemanticResponseCache, normalize_question
+from src.models.single_flight import SingleFlight
+from src.models.splitting import MarkdownCharacterSplitter, MarkdownTokenSplitter, SPLITTER_VERSION
+from src.models.tokenizer import count_tokens
+
+# Stored chunks read per page when the lexical index is rebuilt on startup
+LEXICAL_LOAD_BATCH = 1000
+
+
+class _CachedQuery:
+    """Response cache lookup and store of one query
+    
+    The cache generation is read at lookup time, so that an answer
+    computed while the corpus changed is not stored.
+    """
+    
+    def __init__(
+        self,
+        cache: Optional[SemanticResponseCache],
+        question: str,
+        namespace: str,
+        flight_key: str,
+        generation: int
+    ):
+        self.cache = cache
+        self.question = question
+        self.namespace = namespace
+        self.flight_key = flight_key
+        self.generation = generation
+    
+    def lookup(self) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        return self.cache.lookup(self.question, self.namespace)
+    
+    async def alookup(self) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        return await self.cache.alookup(self.question, self.namespace)
+    
+    def store(self, response: Dict[str, Any]) -> None:
+        if self.cache is not None:
+            self.cache.store(self.question, response, self.namespace, generation=self.generation)
 
 class IndustrialRAG:
     """RAG system for industrial automation documentation"""
@@ -19,102 +81,604 @@ class IndustrialRAG:
     def __init__(
         self,
         docs_dir: str = None,
-        embedding_model: str = "text-embedding-ada-002",
+        embedding_model: Optional[str] = None,
+        embedding_backend: Optional[str] = None,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
-        api_key: Optional[str] = None
+        chunking: str = "characters",
+        api_key: Optional[str] = None,
+        persist_directory: Optional[str] = None,
+        collection_name: str = "industrial_docs",
+        embedding_cache_path: Optional[str] = None,
+        embedding_batch_size: int = 64,
+        embedding_workers: Optional[int] = None,
+        embedding_requests_per_second: Optional[float] = None,
+        chain_cache_size: int = 8,
+        response_cache_size: int = 1000,
+        response_cache_ttl: Optional[float] = 3600,
+        response_cache_threshold: float = 0.95,
+        load_workers: int = 1,
+        hybrid_search: Optional[bool] = None,
+        hybrid_fetch_k: int = 20,
+        rerank: bool = False,
+        rerank_fetch_k: int = 50,
+        rerank_scorer: Optional[Scorer] = None,
+        rerank_token_budget: Optional[int] = None,
+        context_packing: bool = True,
+        context_token_budget: Optional[int] = None,
+        base: Optional["IndustrialRAG"] = None,
+        vector_backend: str = "chroma",
+        vector_dtype: str = "float32",
+        vector_index: str = "flat",
+        ivf_nlist: int = 256,
+        ivf_nprobe: int = 8,
+        hnsw_params: Optional[Dict[str, Any]] = None
     ):
         """Initialize the RAG system
         
         Args:
             docs_dir: Directory containing industrial documentation
-            embedding_model: Model to use for embeddings
+            embedding_model: Model to use for embeddings, defaults to the
+                backend's default model
+            embedding_backend: "openai", "local" for a sentence-transformers
+                model on the CPU, or "hashing" for deterministic feature
+                hashing. Defaults to the EMBEDDING_BACKEND environment variable,
+                then "openai"
             chunk_size: Size of text chunks for processing
             chunk_overlap: Overlap between chunks
-            api_key: OpenAI API key
+            chunking: "characters" or "tokens", the unit chunk_size and
+                chunk_overlap are measured in. Chunks are cut at Markdown headers
+                and carry their heading path as metadata
+            api_key: OpenAI API key, required for the openai embedding
+                backend and for answering queries
+            persist_directory: Directory for the on-disk index, None keeps
+                the index in memory and rebuilds it on every start
+            collection_name: Name of the Chroma collection
+            embedding_cache_path: SQLite file caching embeddings, defaults to
+                a file in persist_directory (memory only without one)
+            embedding_batch_size: Number of chunks per embedding request
+            embedding_workers: Maximum number of concurrent embedding requests,
+                defaults to 4 for the openai backend and 1 for local backends,
+                which already use all cores per batch
+            embedding_requests_per_second: Rate limit for embedding requests
+            chain_cache_size: Maximum number of cached QA chains
+            response_cache_size: Maximum number of cached answers, 0 disables
+                the response cache
+            response_cache_ttl: Lifetime of a cached answer in seconds
+            response_cache_threshold: Minimum question similarity for a
+                cached answer to be reused
+            load_workers: Number of processes parsing files in parallel,
+                1 parses them in the calling process
+            hybrid_search: Fuse BM25 results with vector search results.
+                Defaults to True for the chroma backend and False for memmap,
+                where the BM25 postings would be rebuilt from every stored
+                text on startup
+            hybrid_fetch_k: Candidates fetched from each retriever before fusion
+            rerank: Over-fetch candidates and rerank them before generation
+            rerank_fetch_k: Number of candidates fetched for reranking
+            rerank_scorer: Local scorer for reranking, defaults to lexical overlap
+            rerank_token_budget: Maximum context tokens kept after reranking
+            context_packing: Merge overlapping chunks and pack them to a token budget
+            context_token_budget: Context token budget, defaults to the budget of the model
+            base: Shared collection of common documents. Queries search this
+                instance's collection and the base, which reuses its embedder
+                and index instead of holding a copy per instance
+            vector_backend: "chroma", or "memmap" for exact search over a
+                memory-mapped vector file with bounded memory use
+            vector_dtype: Storage type of memmap vectors, "float32",
+                "float16" or "int8"
+            vector_index: Search index of the memmap backend, "flat" for exact
+                search or "ivf" for approximate search over clustered vectors
+            ivf_nlist: Number of IVF clusters
+            ivf_nprobe: Number of IVF clusters scored per query, higher values
+                raise recall and latency
+            hnsw_params: HNSW settings of a new Chroma collection, e.g.
+                {"M": 16, "construction_ef": 100, "search_ef": 50}
         """
+        self.embedding_backend = embedding_backend or os.getenv("EMBEDDING_BACKEND", "openai")
+        if self.embedding_backend not in DEFAULT_EMBEDDING_MODELS:
+            raise ValueError(f"Unknown embedding backend: {self.embedding_backend}")
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+        if not self.api_key and self.embedding_backend == "openai":
             raise ValueError("OpenAI API key is required")
         
-        self.docs_dir = docs_dir or os.path.join(os.getcwd(), "src", "data", "industrial_docs")
+        # Sources are recorded by absolute path, so one file has one identity
+        self.docs_dir = os.path.abspath(docs_dir or os.path.join(os.getcwd(), "src", "data", "industrial_docs"))
+        embedding_model = embedding_model or DEFAULT_EMBEDDING_MODELS[self.embedding_backend]
         self.embedding_model = embedding_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embeddings = OpenAIEmbeddings(
-            model=embedding_model,
-            openai_api_key=self.api_key
+        self.chunking = chunking
+        if chunking == "tokens":
+            self.text_splitter = MarkdownTokenSplitter(chunk_size, chunk_overlap)
+        elif chunking == "characters":
+            self.text_splitter = MarkdownCharacterSplitter(chunk_size, chunk_overlap)
+        else:
+            raise ValueError(f"Unknown chunking mode: {chunking}")
+        self.base = base
+        self._overlays: "weakref.WeakSet[IndustrialRAG]" = weakref.WeakSet()
+        if base is not None:
+            if (base.embedding_backend, base.embedding_model) != (self.embedding_backend, embedding_model):
+                raise ValueError("Base collection uses a different embedding model")
+            if (base.collection_name, base.persist_directory) == (collection_name, persist_directory):
+                raise ValueError("Base collection and overlay collection must differ")
+            # Query vectors must come from the same model as the base index
+            self.embeddings = base.embeddings
+            base._overlays.add(self)
+        else:
+            if embedding_cache_path is None and persist_directory:
+                os.makedirs(persist_directory, exist_ok=True)
+                embedding_cache_path = os.path.join(persist_directory, "embedding_cache.sqlite")
+            self.embeddings = CachedEmbeddings(
+                create_embeddings(self.embedding_backend, embedding_model, self.api_key),
+                model_name=f"{self.embedding_backend}:{embedding_model}",
+                cache_path=embedding_cache_path
+            )
+        if embedding_workers is None:
+            embedding_workers = 4 if self.embedding_backend == "openai" else 1
+        self.ingestion = EmbeddingPipeline(
+            self.embeddings,
+            batch_size=embedding_batch_size,
+            max_workers=embedding_workers,
+            requests_per_second=embedding_requests_per_second
+        )
+        self.last_ingestion_stats: Optional[IngestionStats] = None
+        self.load_workers = load_workers
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        if vector_backend not in ("chroma", "memmap"):
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
+        self.vector_backend = vector_backend
+        self.vector_dtype = vector_dtype
+        self.vector_index = vector_index
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.hnsw_params = hnsw_params
+        self.vectorstore: Optional[VectorStore] = None
+        self.bm25 = BM25Index()
+        self.hybrid_search = vector_backend == "chroma" if hybrid_search is None else hybrid_search
+        self.hybrid_fetch_k = hybrid_fetch_k
+        self.reranker = Reranker(rerank_scorer, rerank_token_budget) if rerank else None
+        self.rerank_fetch_k = rerank_fetch_k
+        self.context_packing = context_packing
+        self.context_token_budget = context_token_budget
+        self.chain_cache_size = chain_cache_size
+        self._chains: "OrderedDict[Tuple[str, float, int], RetrievalQA]" = OrderedDict()
+        self._chains_lock = threading.Lock()
+        self.prefix_cache = PrefixCache()
+        self.single_flight = SingleFlight()
+        self.response_cache = None
+        if response_cache_size > 0:
+            self.response_cache = SemanticResponseCache(
+                self.embeddings,
+                similarity_threshold=response_cache_threshold,
+                ttl_seconds=response_cache_ttl,
+                max_entries=response_cache_size
+            )
+        self.manifest = IndexManifest(
+            os.path.join(persist_directory, MANIFEST_FILENAME) if persist_directory else None,
+            chunking={
+                "embedding_model": f"{self.embedding_backend}:{embedding_model}",
+                "splitter": f"{type(self.text_splitter).__name__}/{SPLITTER_VERSION}",
+                "metadata": list(FILE_METADATA_FIELDS),
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap
+            }
         )
-        self.vectorstore = None
+    
+    def _open_vectorstore(self) -> VectorStore:
+        """Open the vector store collection, creating it if needed
+        
+        Returns:
+            The vector store
+        """
+        if self.vectorstore is None:
+            # Vectors of another embedding model may have another dimension,
+            # so a store built with one is recreated rather than reused
+            reset = self.manifest.embedding_changed
+            self.manifest.embedding_changed = False
+            if self.vector_backend == "memmap":
+                path = os.path.join(self.persist_directory, self.collection_name) if self.persist_directory else None
+                if reset and path and os.path.exists(path):
+                    shutil.rmtree(path)
+                self.vectorstore = MemmapVectorStore(
+                    self.embeddings,
+                    path=path,
+                    dtype=self.vector_dtype,
+                    index=self.vector_index,
+                    nlist=self.ivf_nlist,
+                    nprobe=self.ivf_nprobe
+                )
+            else:
+                self.vectorstore = self._open_chroma()
+                if reset:
+                    self.vectorstore.delete_collection()
+                    self.vectorstore = self._open_chroma()
+            
+            if self.hybrid_search:
+                # Rebuild the lexical index from the persisted texts, one page
+                # at a time so that they are never all held in memory
+                offset = 0
+                while True:
+                    page = self.vectorstore.get(include=["documents"], limit=LEXICAL_LOAD_BATCH, offset=offset)
+                    if not page["ids"]:
+                        break
+                    self.bm25.add(page["ids"], page["documents"])
+                    offset += len(page["ids"])
+        return self.vectorstore
+    
+    def _open_chroma(self) -> Chroma:
+        """Open the Chroma collection, creating it if needed"""
+        return Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_directory,
+            collection_metadata=(
+                {f"hnsw:{key}": value for key, value in self.hnsw_params.items()}
+                if self.hnsw_params else None
+            )
+        )
+    
+    def _in_docs_dir(self, path: str) -> bool:
+        """Check whether a path lies inside the documents directory
+        
+        Args:
+            path: File path
+            
+        Returns:
+            True if the path is the documents directory or below it
+        """
+        path = os.path.abspath(path)
+        try:
+            return os.path.commonpath([path, self.docs_dir]) == self.docs_dir
+        except ValueError:
+            # Paths on different drives
+            return False
+    
+    def _find_files(self) -> List[str]:
+        """Find all supported files in the documents directory
+        
+        Returns:
+            Sorted list of file paths
+        """
+        files = []
+        for extension in LOADERS:
+            files.extend(str(path) for path in Path(self.docs_dir).glob(f"**/*{extension}"))
+        return sorted(files)
+    
+    def load_documents(self) -> IndexReport:
+        """Load documents from the specified directory
         
-    def load_documents(self) -> None:
-        """Load documents from the specified directory"""
+        Only files that are new or changed since the last run are split and
+        embedded. Chunks of files that no longer exist are deleted.
+        
+        Returns:
+            Report of indexed, removed and failed files
+        """
         # Check if directory exists
         if not os.path.exists(self.docs_dir):
             print(f"Directory not found: {self.docs_dir}")
-            return
+            return IndexReport(failures=[FileFailure(self.docs_dir, "load", "Directory not found")])
         
-        # Create loaders for different file types
-        loaders = []
+        self._open_vectorstore()
         
-        # Text files
-        try:
-            text_loader = DirectoryLoader(
-                self.docs_dir,
-                glob="**/*.txt",
-                loader_cls=TextLoader
-            )
-            loaders.append(text_loader)
-        except Exception as e:
-            print(f"Error loading text files: {e}")
+        # Drop chunks built with different chunking parameters
+        if self.manifest.stale_ids:
+            self._delete_chunks(self.manifest.stale_ids)
         
-        # PDF files
-        try:
-            pdf_loader = DirectoryLoader(
-                self.docs_dir,
-                glob="**/*.pdf",
-                loader_cls=PyPDFLoader
-            )
-            loaders.append(pdf_loader)
-        except Exception as e:
-            print(f"Error loading PDF files: {e}")
-            
-        # Load documents
-        documents = []
-        for loader in loaders:
+        files = self._find_files()
+        digests = {}
+        failures = []
+        for file_path in files:
             try:
-                documents.extend(loader.load())
-            except Exception as e:
-                print(f"Error in document loading: {e}")
+                digests[file_path] = file_sha256(file_path)
+            except OSError as e:
+                failures.append(FileFailure(file_path, "read", str(e)))
+        
+        # Remove chunks of deleted files
+        removed = [
+            source for source in self.manifest.sources()
+            if self._in_docs_dir(source) and source not in digests
+        ]
+        for source in removed:
+            ids = self.manifest.remove(source)
+            if ids:
+                self._delete_chunks(ids)
+        if removed:
+            self._invalidate_responses()
         
-        print(f"Loaded {len(documents)} documents")
+        # Embed new and changed files
+        changed = [
+            file_path for file_path, digest in digests.items()
+            if not self.manifest.is_current(file_path, digest)
+        ]
+        report = self._index_files(changed, digests)
+        report.removed = removed
+        report.unchanged = len(digests) - len(changed)
+        report.failures = failures + report.failures
         
-        # Split documents
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
+        print(
+            f"Indexed {len(report.indexed)} new or changed files ({report.stats.chunks} chunks, "
+            f"{report.stats.chunks_per_second:.1f} chunks/sec), removed {len(removed)}, "
+            f"{report.unchanged} unchanged, {len(report.failures)} failed"
         )
+        return report
+    
+    def _write_chunks(
+        self,
+        ids: List[str],
+        documents: List[Document],
+        vectors: List[List[float]]
+    ) -> None:
+        """Write embedded chunks to the vector store
         
-        splits = text_splitter.split_documents(documents)
-        print(f"Split into {len(splits)} chunks")
+        Args:
+            ids: Chunk IDs
+            documents: Chunk documents
+            vectors: Precomputed embeddings of the chunks
+        """
+        vectorstore = self._open_vectorstore()
+        collection = vectorstore if isinstance(vectorstore, MemmapVectorStore) else vectorstore._collection
+        collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata or None for doc in documents]
+        )
+        if self.hybrid_search:
+            self.bm25.add(ids, [doc.page_content for doc in documents])
+    
+    def _update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of stored chunks without re-embedding them
         
-        # Create vector store
-        self.vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=self.embeddings
+        Args:
+            ids: Chunk IDs
+            metadatas: New chunk metadata
+        """
+        vectorstore = self._open_vectorstore()
+        collection = vectorstore if isinstance(vectorstore, MemmapVectorStore) else vectorstore._collection
+        collection.update(ids=ids, metadatas=[metadata or None for metadata in metadatas])
+    
+    def _delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from the vector store and the lexical index
+        
+        Args:
+            ids: Chunk IDs
+        """
+        self._open_vectorstore().delete(ids)
+        self.bm25.remove(ids)
+    
+    def _index_files(self, file_paths: List[str], digests: Dict[str, str]) -> IndexReport:
+        """Split, embed and store files, replacing their previous chunks
+        
+        Chunk IDs are derived from the source path, chunk index, start
+        offset and chunk content, so only chunks that are not stored yet
+        are written. Moved chunks are embedded from the embedding cache.
+        Outdated chunks of a file are deleted once all of its new chunks
+        are stored, and only then is the file recorded in the manifest.
+        
+        Args:
+            file_paths: Files to index
+            digests: Content hash of every file
+            
+        Returns:
+            Report of indexed and failed files
+        """
+        vectorstore = self._open_vectorstore()
+        report = IndexReport()
+        new_ids: Dict[str, List[str]] = {}
+        stale_ids: Dict[str, List[str]] = {}
+        written_ids: Dict[str, List[str]] = {}
+        pending: Dict[str, int] = {}
+        owners: Dict[str, str] = {}
+        
+        def complete(file_path):
+            if stale_ids[file_path]:
+                self._delete_chunks(stale_ids[file_path])
+            self.manifest.record(file_path, digests[file_path], new_ids[file_path])
+            report.indexed.append(file_path)
+        
+        def chunks():
+            for loaded in iter_load_files(file_paths, self.load_workers):
+                if loaded.error is not None:
+                    report.failures.append(FileFailure(loaded.path, "load", loaded.error))
+                    continue
+                
+                file_path = loaded.path
+                metadata = file_metadata(file_path, self.docs_dir)
+                for doc in loaded.documents:
+                    doc.metadata.update(metadata)
+                splits = self.text_splitter.split_documents(loaded.documents)
+                ids = [
+                    chunk_id(file_path, index, split.page_content, split.metadata.get("start_index"))
+                    for index, split in enumerate(splits)
+                ]
+                in_store = set(vectorstore.get(where={"source": file_path}, include=[])["ids"])
+                stored = in_store.union(self.manifest.get_ids(file_path))
+                
+                new_ids[file_path] = ids
+                stale_ids[file_path] = sorted(stored.difference(ids))
+                missing = [(i, split) for i, split in zip(ids, splits) if i not in stored]
+                kept = [(i, split) for i, split in zip(ids, splits) if i in in_store]
+                if kept:
+                    # Unchanged chunks take the file's current metadata, e.g. its new mtime
+                    self._update_metadata([i for i, _ in kept], [split.metadata for _, split in kept])
+                written_ids[file_path] = [i for i, _ in missing]
+                pending[file_path] = len(missing)
+                if not missing:
+                    complete(file_path)
+                for i, split in missing:
+                    owners[i] = file_path
+                    yield i, split
+        
+        def sink(ids, documents, vectors):
+            self._write_chunks(ids, documents, vectors)
+            for i in ids:
+                file_path = owners.pop(i)
+                pending[file_path] -= 1
+                if pending[file_path] == 0:
+                    complete(file_path)
+        
+        try:
+            stats = self.ingestion.run(chunks(), sink)
+        except Exception as e:
+            # Roll back partially stored files, their previous chunks are kept
+            for file_path, remaining in pending.items():
+                if remaining > 0:
+                    self._delete_chunks(written_ids[file_path])
+                    report.failures.append(FileFailure(file_path, "embed", str(e)))
+            stats = IngestionStats()
+        finally:
+            self.manifest.save()
+            if file_paths:
+                self._invalidate_responses()
+        
+        report.stats = stats
+        self.last_ingestion_stats = stats
+        return report
+    
+    def _invalidate_responses(self) -> None:
+        """Drop cached answers after the corpus changed"""
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        # Overlays answer from this collection too
+        for overlay in list(self._overlays):
+            overlay._invalidate_responses()
+    
+    def _cache_namespace(
+        self,
+        model: str,
+        temperature: float,
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> str:
+        """Partition of the response cache for a set of query parameters"""
+        namespace = f"{model}|{temperature}|{k}"
+        if metadata_filter:
+            namespace += "|" + json.dumps(metadata_filter, sort_keys=True, default=str)
+        return namespace
+    
+    def _cached_query(
+        self,
+        question: str,
+        model: str,
+        temperature: float,
+        k: int,
+        metadata_filter: Optional[MetadataFilter]
+    ) -> _CachedQuery:
+        """Prepare the response cache lookup, coalescing key and store of a query"""
+        namespace = self._cache_namespace(model, temperature, k, metadata_filter)
+        generation = self.response_cache.generation if self.response_cache is not None else 0
+        # Queries arriving after a corpus change do not join answers computed before it
+        flight_key = f"{generation}\x00{self._flight_key(question, namespace)}"
+        return _CachedQuery(self.response_cache, question, namespace, flight_key, generation)
+    
+    def _flight_key(self, question: str, namespace: str) -> str:
+        """Identify a query for coalescing identical in-flight queries
+        
+        Args:
+            question: Question to ask the system
+            namespace: Response cache namespace of the query parameters
+            
+        Returns:
+            Key combining the normalized question and the parameters
+        """
+        return f"{namespace}\x00{normalize_question(question)}"
+    
+    def _fetch_k(self, k: int) -> int:
+        """Number of candidates to retrieve for k chunks in the prompt"""
+        return max(k, self.rerank_fetch_k) if self.reranker is not None else k
+    
+    def _get_retriever(self, k: int, metadata_filter: Optional[MetadataFilter] = None) -> BaseRetriever:
+        """Build the retriever used by the QA chains
+        
+        Args:
+            k: Number of chunks to retrieve
+            metadata_filter: Only search chunks whose metadata matches this filter,
+                e.g. {"h2": "Key Programming Languages"}
+            
+        Returns:
+            A hybrid BM25 + vector retriever, or a plain vector retriever,
+            fanned out to the base collection if there is one
+        """
+        if self.hybrid_search:
+            retriever = HybridRetriever(
+                vectorstore=self.vectorstore,
+                bm25=self.bm25,
+                k=k,
+                fetch_k=max(k, self.hybrid_fetch_k),
+                metadata_filter=metadata_filter
+            )
+        else:
+            search_kwargs = {"k": k}
+            where = to_chroma_where(metadata_filter)
+            if where:
+                search_kwargs["filter"] = where
+            retriever = self.vectorstore.as_retriever(search_kwargs=search_kwargs)
+        
+        if self.base is None:
+            return retriever
+        self.base._open_vectorstore()
+        return FanOutRetriever(
+            retrievers=[retriever, self.base._get_retriever(k, metadata_filter)],
+            k=k
         )
+    
+    def _get_chain(self, model: str, temperature: float, k: int) -> RetrievalQA:
+        """Get a prepared QA chain, building it on first use
         
-        print("Vector store created successfully")
+        Chains are cached per (model, temperature, k) with LRU eviction. Chat
+        models come from the process-wide client registry and share its
+        connection pool.
+        
+        Args:
+            model: LLM model to use for generation
+            temperature: Temperature parameter for generation
+            k: Number of chunks to retrieve
+            
+        Returns:
+            The QA chain
+        """
+        key = (model, temperature, k)
+        with self._chains_lock:
+            chain = self._chains.get(key)
+            if chain is not None:
+                self._chains.move_to_end(key)
+                return chain
+            
+            llm = get_chat_model(model, temperature, self.api_key)
+            chain = RetrievalQA.from_chain_type(
+                llm=llm,
+                chain_type="stuff",
+                chain_type_kwargs={"prompt": RAG_PROMPT},
+                retriever=self._get_retriever(self._fetch_k(k)),
+                return_source_documents=True
+            )
+            self._chains[key] = chain
+            while len(self._chains) > self.chain_cache_size:
+                self._chains.popitem(last=False)
+            return chain
     
-    def query(self, question: str, model: str = "gpt-3.5-turbo") -> Dict[str, Any]:
+    def query(
+        self,
+        question: str,
+        model: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        k: int = 4,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> Dict[str, Any]:
         """Query the RAG system
         
         Args:
             question: Question to ask the system
             model: LLM model to use for generation
+            temperature: Temperature parameter for generation
+            k: Number of chunks to retrieve
+            metadata_filter: Only search chunks whose metadata matches this
+                filter, e.g. {"file_type": "pdf", "topic": "plc"}
             
         Returns:
-            Dictionary containing response and sources
+            Dictionary containing response, sources and per-stage statistics
         """
         if not self.vectorstore:
             return {
@@ -122,79 +686,408 @@ class IndustrialRAG:
                 "sources": []
             }
         
-        # Create QA chain
-        llm = ChatOpenAI(
-            model_name=model,
-            temperature=0.7,
-            openai_api_key=self.api_key
-        )
+        cached_query = self._cached_query(question, model, temperature, k, metadata_filter)
+        cached = cached_query.lookup()
+        if cached is not None:
+            return {**cached, "stats": {"cache_hit": True}}
         
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=self.vectorstore.as_retriever(),
-            return_source_documents=True
-        )
+        def answer() -> Dict[str, Any]:
+            # Retrieve, rerank and generate
+            qa_chain = self._get_chain(model, temperature, k)
+            docs, stats = self._retrieve(qa_chain, question, k, model, metadata_filter)
+            
+            stats["prefix_cached_tokens"] = self._record_prefix(self._stream_inputs(qa_chain, question, docs)[1])
+            start = time.perf_counter()
+            answer = qa_chain.combine_documents_chain.run(input_documents=docs, question=question)
+            stats["generation_ms"] = (time.perf_counter() - start) * 1000
+            
+            result = {"answer": answer, "sources": self._extract_sources(docs)}
+            cached_query.store(result)
+            return {**result, "stats": stats}
         
-        # Run the chain
-        result = qa_chain({"query": question})
+        # Identical questions arriving while this one is answered share the answer
+        return dict(self.single_flight.do(cached_query.flight_key, answer))
+    
+    async def aquery(
+        self,
+        question: str,
+        model: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        k: int = 4,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> Dict[str, Any]:
+        """Query the RAG system without blocking the event loop
         
-        # Extract sources
-        sources = []
-        if hasattr(result, "source_documents"):
-            for doc in result.source_documents:
-                if hasattr(doc, "metadata") and "source" in doc.metadata:
-                    sources.append(doc.metadata["source"])
+        Args:
+            question: Question to ask the system
+            model: LLM model to use for generation
+            temperature: Temperature parameter for generation
+            k: Number of chunks to retrieve
+            metadata_filter: Only search chunks whose metadata matches this
+                filter, e.g. {"file_type": "pdf", "topic": "plc"}
+            
+        Returns:
+            Dictionary containing response, sources and per-stage statistics
+        """
+        if not self.vectorstore:
+            return {
+                "answer": "Error: Documents not loaded. Please load documents first.",
+                "sources": []
+            }
+        
+        cached_query = self._cached_query(question, model, temperature, k, metadata_filter)
+        cached = await cached_query.alookup()
+        if cached is not None:
+            return {**cached, "stats": {"cache_hit": True}}
+        
+        async def answer() -> Dict[str, Any]:
+            qa_chain = self._get_chain(model, temperature, k)
+            docs, stats = await self._aretrieve(qa_chain, question, k, model, metadata_filter)
+            
+            stats["prefix_cached_tokens"] = self._record_prefix(self._stream_inputs(qa_chain, question, docs)[1])
+            start = time.perf_counter()
+            answer = await qa_chain.combine_documents_chain.arun(input_documents=docs, question=question)
+            stats["generation_ms"] = (time.perf_counter() - start) * 1000
+            
+            result = {"answer": answer, "sources": self._extract_sources(docs)}
+            cached_query.store(result)
+            return {**result, "stats": stats}
+        
+        return dict(await self.single_flight.ado(cached_query.flight_key, answer))
+    
+    async def abatch_query(
+        self,
+        questions: List[str],
+        max_concurrency: int = 8,
+        **kwargs: Any
+    ) -> List[Dict[str, Any]]:
+        """Answer many questions concurrently
+        
+        Args:
+            questions: Questions to ask the system
+            max_concurrency: Maximum number of questions in flight
+            **kwargs: Passed on to aquery (model, temperature, k, metadata_filter)
+            
+        Returns:
+            List of results in the order of the questions
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(question: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aquery(question, **kwargs)
+        
+        return list(await asyncio.gather(*(run(question) for question in questions)))
+    
+    def stream_query(
+        self,
+        question: str,
+        model: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        k: int = 4,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Query the RAG system, streaming the answer
+        
+        Args:
+            question: Question to ask the system
+            model: LLM model to use for generation
+            temperature: Temperature parameter for generation
+            k: Number of chunks to retrieve
+            metadata_filter: Only search chunks whose metadata matches this filter
+            
+        Yields:
+            A {"type": "sources", "sources": [...], "stats": {...}} event,
+            followed by {"type": "token", "content": ...} events for the answer
+        """
+        if not self.vectorstore:
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "content": "Error: Documents not loaded. Please load documents first."}
+            return
+        
+        cached_query = self._cached_query(question, model, temperature, k, metadata_filter)
+        cached = cached_query.lookup()
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"], "stats": {"cache_hit": True}}
+            yield {"type": "token", "content": cached["answer"]}
+            return
+        
+        def events() -> Iterator[Dict[str, Any]]:
+            qa_chain = self._get_chain(model, temperature, k)
+            docs, stats = self._retrieve(qa_chain, question, k, model, metadata_filter)
+            llm, messages = self._stream_inputs(qa_chain, question, docs)
+            stats["prefix_cached_tokens"] = self._record_prefix(messages)
+            sources = self._extract_sources(docs)
+            yield {"type": "sources", "sources": sources, "stats": stats}
+            
+            answer = []
+            for chunk in llm.stream(messages):
+                if chunk.content:
+                    answer.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            
+            cached_query.store({"answer": "".join(answer), "sources": sources})
+        
+        # Subscribers of an identical stream in flight join it mid-stream
+        yield from self.single_flight.stream(cached_query.flight_key, events)
+    
+    async def astream_query(
+        self,
+        question: str,
+        model: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        k: int = 4,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronously query the RAG system, streaming the answer
+        
+        Args:
+            question: Question to ask the system
+            model: LLM model to use for generation
+            temperature: Temperature parameter for generation
+            k: Number of chunks to retrieve
+            metadata_filter: Only search chunks whose metadata matches this filter
+            
+        Yields:
+            A {"type": "sources", "sources": [...], "stats": {...}} event,
+            followed by {"type": "token", "content": ...} events for the answer
+        """
+        if not self.vectorstore:
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "content": "Error: Documents not loaded. Please load documents first."}
+            return
+        
+        cached_query = self._cached_query(question, model, temperature, k, metadata_filter)
+        cached = await cached_query.alookup()
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"], "stats": {"cache_hit": True}}
+            yield {"type": "token", "content": cached["answer"]}
+            return
+        
+        async def events() -> AsyncIterator[Dict[str, Any]]:
+            qa_chain = self._get_chain(model, temperature, k)
+            docs, stats = await self._aretrieve(qa_chain, question, k, model, metadata_filter)
+            llm, messages = self._stream_inputs(qa_chain, question, docs)
+            stats["prefix_cached_tokens"] = self._record_prefix(messages)
+            sources = self._extract_sources(docs)
+            yield {"type": "sources", "sources": sources, "stats": stats}
+            
+            answer = []
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    answer.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            
+            cached_query.store({"answer": "".join(answer), "sources": sources})
+        
+        async for event in self.single_flight.astream(cached_query.flight_key, events):
+            yield event
+    
+    def _stream_inputs(
+        self,
+        qa_chain: RetrievalQA,
+        question: str,
+        docs: List[Document]
+    ) -> Tuple[Any, List[BaseMessage]]:
+        """Build the prompt the chain's "stuff" step would send to the LLM
+        
+        Args:
+            qa_chain: Prepared QA chain
+            question: Question to ask the system
+            docs: Retrieved documents
+            
+        Returns:
+            The chat model and the prompt messages
+        """
+        combine_chain = qa_chain.combine_documents_chain
+        inputs = combine_chain._get_inputs(docs, question=question)
+        llm_chain = combine_chain.llm_chain
+        return llm_chain.llm, llm_chain.prompt.format_prompt(**inputs).to_messages()
+    
+    def _record_prefix(self, messages: List[BaseMessage]) -> int:
+        """Record a prompt in the prefix cache statistics
+        
+        Args:
+            messages: Prompt messages sent to the LLM
+            
+        Returns:
+            Prompt tokens covered by a previously sent prefix
+        """
+        return self.prefix_cache.record([{"role": msg.type, "content": msg.content} for msg in messages])
+    
+    def _extract_sources(self, docs: List[Document]) -> List[str]:
+        """Get the unique source files of retrieved documents
+        
+        Args:
+            docs: Retrieved documents
+            
+        Returns:
+            List of source paths
+        """
+        sources = [doc.metadata["source"] for doc in docs if "source" in doc.metadata]
+        return list(set(sources))
+    
+    def _retrieve(
+        self,
+        qa_chain: RetrievalQA,
+        question: str,
+        k: int,
+        model: str,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Retrieve candidates and select the chunks for the prompt
         
-        # Return formatted result
-        return {
-            "answer": result["result"],
-            "sources": list(set(sources)) if sources else []
+        Args:
+            qa_chain: Prepared QA chain
+            question: Question to ask the system
+            k: Number of chunks to keep
+            model: Model the context is packed for
+            metadata_filter: Only search chunks whose metadata matches this filter
+            
+        Returns:
+            Selected documents and per-stage statistics
+        """
+        retriever = qa_chain.retriever
+        if metadata_filter:
+            retriever = self._get_retriever(self._fetch_k(k), metadata_filter)
+        start = time.perf_counter()
+        docs = retriever.get_relevant_documents(question)
+        return self._select_context(question, docs, k, model, start)
+    
+    async def _aretrieve(
+        self,
+        qa_chain: RetrievalQA,
+        question: str,
+        k: int,
+        model: str,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Asynchronously retrieve candidates and select the chunks for the prompt
+        
+        Args:
+            qa_chain: Prepared QA chain
+            question: Question to ask the system
+            k: Number of chunks to keep
+            model: Model the context is packed for
+            metadata_filter: Only search chunks whose metadata matches this filter
+            
+        Returns:
+            Selected documents and per-stage statistics
+        """
+        retriever = qa_chain.retriever
+        if metadata_filter:
+            retriever = self._get_retriever(self._fetch_k(k), metadata_filter)
+        start = time.perf_counter()
+        docs = await retriever.aget_relevant_documents(question)
+        return self._select_context(question, docs, k, model, start)
+    
+    def _select_context(
+        self,
+        question: str,
+        docs: List[Document],
+        k: int,
+        model: str,
+        start: float
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Rerank the retrieved candidates and pack them into the context budget
+        
+        Args:
+            question: Question to ask the system
+            docs: Retrieved candidates
+            k: Number of chunks to keep
+            model: Model the context is packed for
+            start: perf_counter value when retrieval started
+            
+        Returns:
+            Selected documents and per-stage statistics
+        """
+        stats = {
+            "retrieval_ms": (time.perf_counter() - start) * 1000,
+            "candidates": len(docs)
         }
+        if self.reranker is not None:
+            docs, rerank_stats = self.reranker.rerank(question, docs, k, model)
+            stats.update(rerank_stats)
+        else:
+            docs = docs[:k]
+            stats["context_tokens"] = sum(count_tokens(doc.page_content, model) for doc in docs)
+        stats["chunks"] = len(docs)
+        if self.context_packing:
+            docs, packing_stats = ContextPacker(self.context_token_budget, model).pack(docs)
+            stats.update(packing_stats)
+        return docs, stats
+    
+    def prefix_cache_stats(self) -> Dict[str, Any]:
+        """Get how much of the sent prompts repeated earlier prefixes
+        
+        The system message is static and the retrieved context follows it,
+        so the system prompt is a cacheable prefix of every request.
+        
+        Returns:
+            Dictionary with requests, prefix hits, hit ratio and cached tokens
+        """
+        return self.prefix_cache.stats()
+    
+    def embedding_cache_stats(self) -> Dict[str, float]:
+        """Get hit and miss counters of the embedding cache
+        
+        Returns:
+            Dictionary with memory hits, disk hits, misses and hit rate
+        """
+        return self.embeddings.stats()
     
     def add_document(self, file_path: str) -> bool:
         """Add a new document to the vector store
         
+        Re-adding a file only embeds its changed chunks and removes chunks
+        that no longer exist.
+        
         Args:
             file_path: Path to the document
             
         Returns:
             Success status
         """
-        if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
-            return False
+        return self.add_documents([file_path])[file_path]
+    
+    def add_documents(self, file_paths: List[str]) -> Dict[str, bool]:
+        """Add many documents in one batched embedding pass
         
-        try:
-            # Determine loader based on file extension
-            if file_path.endswith(".pdf"):
-                loader = PyPDFLoader(file_path)
-            elif file_path.endswith(".txt"):
-                loader = TextLoader(file_path)
-            else:
-                print(f"Unsupported file type: {file_path}")
-                return False
-                
-            # Load and split document
-            document = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap
-            )
-            splits = text_splitter.split_documents(document)
+        Paths are made absolute, so relative and absolute spellings of
+        the same file replace each other's chunks.
+        
+        Args:
+            file_paths: Paths to the documents
             
-            # Add to existing vector store
-            if self.vectorstore:
-                self.vectorstore.add_documents(splits)
+        Returns:
+            Success status of every path, keyed as given
+        """
+        results = {}
+        digests = {}
+        given: Dict[str, List[str]] = {}
+        for file_path in file_paths:
+            results[file_path] = False
+            if not os.path.exists(file_path):
+                print(f"File not found: {file_path}")
+            elif Path(file_path).suffix not in LOADERS:
+                print(f"Unsupported file type: {file_path}")
             else:
-                self.vectorstore = Chroma.from_documents(
-                    documents=splits,
-                    embedding=self.embeddings
-                )
-                
-            print(f"Added document: {file_path}")
-            return True
-            
-        except Exception as e:
-            print(f"Error adding document: {e}")
-            return False
+                source = os.path.abspath(file_path)
+                given.setdefault(source, []).append(file_path)
+                if source in digests:
+                    continue
+                try:
+                    digests[source] = file_sha256(source)
+                except OSError as e:
+                    print(f"Error adding document: {e}")
+        
+        # Split, embed and store, replacing previous versions of the files
+        report = self._index_files(list(digests), digests)
+        for source in report.indexed:
+            for file_path in given[source]:
+                results[file_path] = True
+            print(f"Added document: {source}")
+        for failure in report.failures:
+            print(f"Error adding document {failure.path}: {failure.error}")
+        
+        return results
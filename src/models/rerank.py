@@ -0,0 +1,146 @@
+"""
+Lightweight local reranking of retrieved chunks
+"""
+
+import time
+from typing import List, Dict, Tuple, Optional, Protocol
+
+import numpy as np
+from langchain.schema import Document
+
+from src.models.bm25 import tokenize
+from src.models.tokenizer import count_tokens
+
+
+class Scorer(Protocol):
+    """Scores candidate texts against a query, higher is more relevant"""
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class LexicalOverlapScorer:
+    """Cheap default scorer based on IDF-weighted query term overlap"""
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Score texts by the query terms they contain
+
+        Args:
+            query: Query text
+            texts: Candidate texts
+
+        Returns:
+            Array of scores, one per text
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not texts:
+            return np.zeros(len(texts), dtype=np.float32)
+
+        position = {term: i for i, term in enumerate(terms)}
+        counts = np.zeros((len(texts), len(terms)), dtype=np.float32)
+        lengths = np.ones(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = max(len(tokens), 1)
+            for token in tokens:
+                column = position.get(token)
+                if column is not None:
+                    counts[row, column] += 1
+
+        # Terms found in fewer candidates are more discriminative
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = np.log1p(len(texts) / (1.0 + document_frequency))
+        saturated = counts / (counts + 1.0)
+        return (saturated @ idf) / np.log1p(lengths)
+
+
+class CrossEncoderScorer:
+    """Scorer running a local cross-encoder model on the CPU
+
+    Requires the optional sentence-transformers package.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 32):
+        """Load the model
+
+        Args:
+            model_name: Hugging Face model name
+            batch_size: Number of pairs scored per forward pass
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError(
+                "Could not import sentence_transformers. "
+                "Please install it with `pip install sentence-transformers`."
+            )
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Score texts with the cross-encoder
+
+        Args:
+            query: Query text
+            texts: Candidate texts
+
+        Returns:
+            Array of scores, one per text
+        """
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        pairs = [(query, text) for text in texts]
+        return np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+
+
+class Reranker:
+    """Keeps the best scoring candidates that fit into a token budget"""
+
+    def __init__(self, scorer: Optional[Scorer] = None, token_budget: Optional[int] = None):
+        """Initialize the reranker
+
+        Args:
+            scorer: Candidate scorer, defaults to LexicalOverlapScorer
+            token_budget: Maximum context tokens of the selected chunks
+        """
+        self.scorer = scorer or LexicalOverlapScorer()
+        self.token_budget = token_budget
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[Document],
+        k: int,
+        model: str = "gpt-3.5-turbo"
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """Select the top-k candidates within the token budget
+
+        Args:
+            query: Query text
+            documents: Candidate documents
+            k: Maximum number of documents to keep
+            model: Model name used for counting tokens
+
+        Returns:
+            Selected documents, best first, and stage statistics
+        """
+        start = time.perf_counter()
+        scores = self.scorer.score(query, [doc.page_content for doc in documents])
+        order = np.argsort(-scores, kind="stable")
+
+        selected = []
+        tokens = 0
+        for index in order:
+            if len(selected) >= k:
+                break
+            doc = documents[int(index)]
+            doc_tokens = count_tokens(doc.page_content, model)
+            if self.token_budget is not None and selected and tokens + doc_tokens > self.token_budget:
+                continue
+            selected.append(doc)
+            tokens += doc_tokens
+
+        return selected, {
+            "rerank_ms": (time.perf_counter() - start) * 1000,
+            "context_tokens": tokens
+        }
@@ -0,0 +1,210 @@
+"""
+Two-stage (exact, then semantic) response cache for RAG queries
+"""
+
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Any
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact-match lookups
+
+    Args:
+        question: Question text
+
+    Returns:
+        Lowercased question with punctuation and extra whitespace removed
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+@dataclass
+class _CacheEntry:
+    namespace: str
+    vector: Optional[np.ndarray]
+    response: Dict[str, Any]
+    created: float
+
+
+class SemanticResponseCache:
+    """LRU response cache with TTL, exact-match and similarity lookups
+
+    A question is first looked up by the hash of its normalized text. On a
+    miss, its embedding is compared with the cached questions of the same
+    namespace, and the closest one above the similarity threshold is a hit.
+
+    Every clear starts a new generation. Callers read the generation
+    before computing a response and pass it to store, so that a response
+    computed before a clear is not cached after it.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: Optional[float] = 3600,
+        max_entries: int = 1000
+    ):
+        """Initialize the cache
+
+        Args:
+            embeddings: Embeddings for similarity lookups, None for exact match only
+            similarity_threshold: Minimum cosine similarity of a semantic hit
+            ttl_seconds: Lifetime of an entry, None for no expiry
+            max_entries: Maximum number of cached responses
+        """
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _key(self, question: str, namespace: str) -> str:
+        normalized = normalize_question(question)
+        return hashlib.sha256(f"{namespace}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.created > self.ttl_seconds
+
+    def _to_vector(self, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _get_exact(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry by key, dropping it when expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, time.time()):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return dict(entry.response)
+
+    def _get_similar(self, vector: np.ndarray, namespace: str) -> Optional[Dict[str, Any]]:
+        """Find the most similar cached question of the namespace"""
+        with self._lock:
+            now = time.time()
+            for key in [key for key, entry in self._entries.items() if self._expired(entry, now)]:
+                del self._entries[key]
+
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry.namespace == namespace and entry.vector is not None
+            ]
+            if keys:
+                matrix = np.stack([self._entries[key].vector for key in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.semantic_hits += 1
+                    return dict(self._entries[keys[best]].response)
+
+            self.misses += 1
+            return None
+
+    def lookup(self, question: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """Look up a cached response
+
+        Args:
+            question: Question text
+            namespace: Partition of the cache, e.g. model parameters
+
+        Returns:
+            The cached response or None
+        """
+        response = self._get_exact(self._key(question, namespace))
+        if response is not None:
+            return response
+        if self.embeddings is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self._get_similar(self._to_vector(self.embeddings.embed_query(question)), namespace)
+
+    async def alookup(self, question: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """Look up a cached response without blocking the event loop
+
+        Args:
+            question: Question text
+            namespace: Partition of the cache, e.g. model parameters
+
+        Returns:
+            The cached response or None
+        """
+        response = self._get_exact(self._key(question, namespace))
+        if response is not None:
+            return response
+        if self.embeddings is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        embedding = await self.embeddings.aembed_query(question)
+        return self._get_similar(self._to_vector(embedding), namespace)
+
+    def store(
+        self,
+        question: str,
+        response: Dict[str, Any],
+        namespace: str = "",
+        generation: Optional[int] = None
+    ) -> None:
+        """Cache a response
+
+        Args:
+            question: Question text
+            response: Response to cache
+            namespace: Partition of the cache, e.g. model parameters
+            generation: Cache generation read before the response was
+                computed, the response is dropped if the cache was cleared
+                since. None always stores it
+        """
+        vector = None
+        if self.embeddings is not None:
+            vector = self._to_vector(self.embeddings.embed_query(question))
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            key = self._key(question, namespace)
+            self._entries[key] = _CacheEntry(namespace, vector, dict(response), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached responses and start a new generation"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache hit and miss counters
+
+        Returns:
+            Dictionary with exact hits, semantic hits, misses and size
+        """
+        with self._lock:
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "size": len(self._entries)
+            }
@@ -0,0 +1,286 @@
+"""
+Request coalescing: identical in-flight calls share one upstream call
+"""
+
+import json
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Awaitable, Iterator, AsyncIterator, Optional
+
+
+def request_key(messages: List[Dict[str, str]], **params: Any) -> str:
+    """Hash normalized messages and call parameters
+
+    Args:
+        messages: Messages with "role" and "content", whitespace differences
+            in the content are ignored
+        **params: Call parameters such as model and temperature
+
+    Returns:
+        Hex digest identifying the request
+    """
+    normalized = [[msg["role"], " ".join(msg["content"].split())] for msg in messages]
+    payload = json.dumps([normalized, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Broadcast:
+    """Chunks of one upstream stream, replayed to every subscriber"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Set when the last subscriber left early, the key is released then
+        self.aborted = False
+        self.condition = threading.Condition()
+
+
+class _AsyncBroadcast:
+    """Chunks of one upstream async stream, replayed to every subscriber"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Set when the last subscriber left early, the key is released then
+        self.aborted = False
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Coalesces identical requests that are in flight at the same time
+
+    The first caller of a key runs the upstream call. Callers arriving
+    while it runs wait for the same result instead of calling again.
+    Streams are shared too: a subscriber joining mid-stream first
+    receives the chunks produced so far, then follows the live stream.
+    Keys are released when the call finishes, or when the last
+    subscriber of a stream stops reading, so results are never cached
+    beyond the call itself and late callers never join an abandoned stream.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self._async_streams: Dict[str, _AsyncBroadcast] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _count(self, shared: bool) -> None:
+        self.calls += 1
+        if shared:
+            self.coalesced += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all concurrent callers of a key
+
+        Args:
+            key: Request key, see request_key
+            fn: Upstream call
+
+        Returns:
+            The result of fn, shared by all concurrent callers
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self._count(not leader)
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn once for all concurrent callers of a key
+
+        A cancelled caller does not cancel the shared call.
+
+        Args:
+            key: Request key, see request_key
+            fn: Upstream coroutine function
+
+        Returns:
+            The result of fn, shared by all concurrent callers
+        """
+        with self._lock:
+            task = self._async_calls.get(key)
+            self._count(task is not None)
+            if task is None:
+                task = self._async_calls[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, fn: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """Share one upstream stream among all concurrent subscribers of a key
+
+        The upstream iterator is consumed in a background thread. It is
+        closed early once every subscriber has stopped reading, and later
+        subscribers of the key start a new stream.
+
+        Args:
+            key: Request key, see request_key
+            fn: Creates the upstream iterator
+
+        Yields:
+            All chunks of the stream, from the beginning
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            self._count(broadcast is not None)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+            with broadcast.condition:
+                broadcast.subscribers += 1
+        if leader:
+            threading.Thread(target=self._produce, args=(key, broadcast, fn), daemon=True).start()
+
+        index = 0
+        try:
+            while True:
+                with broadcast.condition:
+                    while index >= len(broadcast.chunks) and not broadcast.done:
+                        broadcast.condition.wait()
+                    if index >= len(broadcast.chunks):
+                        if broadcast.error is not None:
+                            raise broadcast.error
+                        return
+                    chunk = broadcast.chunks[index]
+                index += 1
+                yield chunk
+        finally:
+            with self._lock, broadcast.condition:
+                broadcast.subscribers -= 1
+                if broadcast.subscribers == 0 and not broadcast.done:
+                    broadcast.aborted = True
+                    self._release(self._streams, key, broadcast)
+
+    def _release(self, streams: Dict[str, Any], key: str, broadcast: Any) -> None:
+        """Remove a broadcast from streams unless a newer one took its key"""
+        if streams.get(key) is broadcast:
+            del streams[key]
+
+    def _produce(self, key: str, broadcast: _Broadcast, fn: Callable[[], Iterator[Any]]) -> None:
+        """Consume an upstream iterator into a broadcast"""
+        iterator = None
+        try:
+            iterator = fn()
+            for chunk in iterator:
+                with broadcast.condition:
+                    if broadcast.aborted:
+                        break
+                    broadcast.chunks.append(chunk)
+                    broadcast.condition.notify_all()
+        except BaseException as e:
+            broadcast.error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            with self._lock:
+                self._release(self._streams, key, broadcast)
+            with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
+
+    async def astream(self, key: str, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Share one upstream async stream among all concurrent subscribers of a key
+
+        The upstream iterator is consumed in a task, which is cancelled
+        once every subscriber has stopped reading. Later subscribers of
+        the key start a new stream.
+
+        Args:
+            key: Request key, see request_key
+            fn: Creates the upstream async iterator
+
+        Yields:
+            All chunks of the stream, from the beginning
+        """
+        with self._lock:
+            broadcast = self._async_streams.get(key)
+            self._count(broadcast is not None)
+            if broadcast is None:
+                broadcast = self._async_streams[key] = _AsyncBroadcast()
+                broadcast.task = asyncio.ensure_future(self._aproduce(key, broadcast, fn))
+            broadcast.subscribers += 1
+
+        index = 0
+        try:
+            while True:
+                if index < len(broadcast.chunks):
+                    index += 1
+                    yield broadcast.chunks[index - 1]
+                elif broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                else:
+                    await broadcast.changed.wait()
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                if broadcast.subscribers == 0 and not broadcast.done:
+                    broadcast.aborted = True
+                    self._release(self._async_streams, key, broadcast)
+            if broadcast.aborted:
+                broadcast.task.cancel()
+
+    async def _aproduce(self, key: str, broadcast: _AsyncBroadcast, fn: Callable[[], AsyncIterator[Any]]) -> None:
+        """Consume an upstream async iterator into a broadcast"""
+        iterator = None
+        try:
+            iterator = fn()
+            async for chunk in iterator:
+                broadcast.chunks.append(chunk)
+                broadcast.notify()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            with self._lock:
+                self._release(self._async_streams, key, broadcast)
+            broadcast.done = True
+            broadcast.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters
+
+        Returns:
+            Dictionary with calls, coalesced calls and the coalesced ratio
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+            }
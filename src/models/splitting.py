@@ -0,0 +1,278 @@
+"""
+Markdown-aware text splitting that records heading paths on every chunk
+"""
+
+import re
+import abc
+from typing import List, Dict, Tuple, Any, NamedTuple
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.models.tokenizer import get_tokenizer
+
+HEADER_PATTERN = re.compile(r"^(#{1,6})[ \t]+(\S.*?)[ \t#]*$", re.MULTILINE)
+
+# Opening or closing line of a fenced code block
+FENCE_PATTERN = re.compile(r"^[ ]{0,3}(`{3,}|~{3,})", re.MULTILINE)
+
+# Separator of heading titles in the heading_path metadata field
+HEADING_SEPARATOR = " > "
+
+# Heading levels stored as separate metadata fields for filtering
+HEADING_LEVELS = 3
+
+# Raised whenever the same text is split differently, so that persisted
+# indexes are rebuilt with the new chunks
+SPLITTER_VERSION = 2
+
+
+class Section(NamedTuple):
+    """A header line and the text up to the next header"""
+
+    start: int
+    text: str
+    headings: Tuple[str, ...]
+
+
+def _fenced_ranges(text: str) -> List[Tuple[int, int]]:
+    """Find the (start, end) offsets of fenced code blocks
+
+    A block is closed by a fence of the same character that is at least
+    as long as the opening one. An unclosed block runs to the end of text.
+    """
+    ranges = []
+    opening = None
+    for match in FENCE_PATTERN.finditer(text):
+        fence = match.group(1)
+        if opening is None:
+            opening = match
+        elif fence[0] == opening.group(1)[0] and len(fence) >= len(opening.group(1)):
+            ranges.append((opening.start(), match.end()))
+            opening = None
+    if opening is not None:
+        ranges.append((opening.start(), len(text)))
+    return ranges
+
+
+def split_sections(text: str) -> List[Section]:
+    """Split text at Markdown headers
+
+    Lines starting with "#" inside fenced code blocks, such as shell or
+    Python comments, are not headers.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Sections in document order, each with the titles of its enclosing
+        headers from the top level down
+    """
+    fenced = _fenced_ranges(text)
+    matches = [
+        match for match in HEADER_PATTERN.finditer(text)
+        if not any(start <= match.start() < end for start, end in fenced)
+    ]
+    bounds = [match.start() for match in matches]
+    if not bounds or bounds[0] != 0:
+        matches.insert(0, None)
+        bounds.insert(0, 0)
+    bounds.append(len(text))
+
+    sections = []
+    stack: List[Tuple[int, str]] = []
+    for match, start, end in zip(matches, bounds, bounds[1:]):
+        if match is not None:
+            level = len(match.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, match.group(2)))
+        if text[start:end].strip():
+            sections.append(Section(start, text[start:end], tuple(title for _, title in stack)))
+    return sections
+
+
+def heading_metadata(headings: Tuple[str, ...]) -> Dict[str, str]:
+    """Build the metadata fields describing a heading path
+
+    Args:
+        headings: Heading titles from the top level down
+
+    Returns:
+        Dictionary with "heading_path" and one "h1", "h2", ... field per level
+    """
+    if not headings:
+        return {}
+    metadata = {"heading_path": HEADING_SEPARATOR.join(headings)}
+    for level, title in enumerate(headings[:HEADING_LEVELS], start=1):
+        metadata[f"h{level}"] = title
+    return metadata
+
+
+class MarkdownSplitter(abc.ABC):
+    """Base class for splitters that cut at Markdown headers
+
+    A chunk holds one section together with its leading descendants as
+    long as they fit, e.g. a title directly followed by its first
+    subsection. Sibling sections always start new chunks, so the heading
+    path of a chunk describes all of its text. Sections larger than a
+    chunk are cut into overlapping windows by the subclass.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, add_start_index: bool = True):
+        """Initialize the splitter
+
+        Args:
+            chunk_size: Maximum size of a chunk
+            chunk_overlap: Overlap of consecutive windows of a long section
+            add_start_index: Record the character offset of each chunk
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("Chunk overlap must be smaller than chunk size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.add_start_index = add_start_index
+
+    @abc.abstractmethod
+    def _measure(self, text: str) -> Tuple[int, Any]:
+        """Return the size of a section and any state reused by _windows"""
+
+    @abc.abstractmethod
+    def _windows(self, section: Section, state: Any) -> List[Tuple[int, str]]:
+        """Cut a section larger than a chunk into (offset, text) windows"""
+
+    def _split(self, text: str) -> List[Tuple[int, str, Tuple[str, ...]]]:
+        """Split text into (start offset, chunk text, headings) triples"""
+        chunks = []
+
+        def emit(start, piece, headings):
+            stripped = piece.strip()
+            if stripped:
+                chunks.append((start + len(piece) - len(piece.lstrip()), stripped, headings))
+
+        pending: List[Section] = []
+        pending_size = 0
+
+        def flush():
+            if pending:
+                end = pending[-1].start + len(pending[-1].text)
+                emit(pending[0].start, text[pending[0].start:end], pending[-1].headings)
+
+        for section in split_sections(text):
+            size, state = self._measure(section.text)
+            if (
+                pending
+                and section.headings[:-1] == pending[-1].headings
+                and pending_size + size <= self.chunk_size
+            ):
+                pending.append(section)
+                pending_size += size
+                continue
+            flush()
+            pending, pending_size = [], 0
+            if size <= self.chunk_size:
+                pending, pending_size = [section], size
+                continue
+            for offset, piece in self._windows(section, state):
+                emit(offset, piece, section.headings)
+        flush()
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of chunk texts
+        """
+        return [chunk for _, chunk, _ in self._split(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents into chunks carrying their heading path
+
+        Args:
+            documents: Documents to split
+
+        Returns:
+            List of chunk documents
+        """
+        chunks = []
+        for doc in documents:
+            for start, text, headings in self._split(doc.page_content):
+                metadata = dict(doc.metadata)
+                metadata.update(heading_metadata(headings))
+                if self.add_start_index:
+                    metadata["start_index"] = start
+                chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
+
+
+class MarkdownCharacterSplitter(MarkdownSplitter):
+    """Markdown-aware splitter sizing chunks in characters"""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, add_start_index: bool = True):
+        """Initialize the splitter
+
+        Args:
+            chunk_size: Maximum characters per chunk
+            chunk_overlap: Characters shared by consecutive windows of a long section
+            add_start_index: Record the character offset of each chunk
+        """
+        super().__init__(chunk_size, chunk_overlap, add_start_index)
+        self._section_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True
+        )
+
+    def _measure(self, text: str) -> Tuple[int, Any]:
+        return len(text), None
+
+    def _windows(self, section: Section, state: Any) -> List[Tuple[int, str]]:
+        return [
+            (section.start + doc.metadata["start_index"], doc.page_content)
+            for doc in self._section_splitter.create_documents([section.text])
+        ]
+
+
+class MarkdownTokenSplitter(MarkdownSplitter):
+    """Markdown-aware splitter sizing chunks in tokens"""
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        model: str = "gpt-3.5-turbo",
+        add_start_index: bool = True
+    ):
+        """Initialize the splitter
+
+        Args:
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Tokens shared by consecutive windows of a long section
+            model: Model whose tokenizer is used
+            add_start_index: Record the character offset of each chunk
+        """
+        super().__init__(chunk_size, chunk_overlap, add_start_index)
+        self.tokenizer = get_tokenizer(model)
+
+    def _measure(self, text: str) -> Tuple[int, Any]:
+        tokens = self.tokenizer.encode(text)
+        return len(tokens), tokens
+
+    def _windows(self, section: Section, state: Any) -> List[Tuple[int, str]]:
+        # Slide a window over the section's tokens: overlap regions are
+        # decoded again but never re-tokenized
+        tokens, decode = state, self.tokenizer.decode
+        step = self.chunk_size - self.chunk_overlap
+        windows = []
+        offset, previous = section.start, 0
+        for begin in range(0, len(tokens), step):
+            offset += len(decode(tokens[previous:begin]))
+            previous = begin
+            windows.append((offset, decode(tokens[begin:begin + self.chunk_size])))
+            if begin + self.chunk_size >= len(tokens):
+                break
+        return windows
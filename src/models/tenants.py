@@ -0,0 +1,122 @@
+"""
+Per-tenant RAG overlays sharing one base collection of common documents
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Any
+
+from src.models.ingestion import IndexReport
+from src.models.rag import IndustrialRAG
+
+BASE_COLLECTION = "shared_base"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,48}$")
+
+
+class TenantManager:
+    """Serves one IndustrialRAG overlay per tenant on top of a shared base
+
+    The common manuals are embedded and indexed once per process in the
+    base collection. Each tenant only indexes its own site documents, and
+    its queries search both collections.
+    """
+
+    def __init__(self, base_docs_dir: str, persist_root: Optional[str] = None, **rag_kwargs: Any):
+        """Initialize the manager and its base collection
+
+        Args:
+            base_docs_dir: Directory containing the shared documents
+            persist_root: Directory holding the base and tenant indexes, None
+                keeps all indexes in memory
+            **rag_kwargs: Passed on to every IndustrialRAG (embedding_model,
+                chunk_size, api_key, ...)
+        """
+        self.persist_root = persist_root
+        self.rag_kwargs = rag_kwargs
+        self.base = IndustrialRAG(
+            docs_dir=base_docs_dir,
+            persist_directory=os.path.join(persist_root, "base") if persist_root else None,
+            collection_name=BASE_COLLECTION,
+            **rag_kwargs
+        )
+        # Loading tenants are held as pending futures, so the lock is never
+        # held while a tenant embeds its documents
+        self._tenants: Dict[str, "Future[IndustrialRAG]"] = {}
+        self._lock = threading.Lock()
+
+    def load_base(self) -> IndexReport:
+        """Index new and changed shared documents
+
+        Returns:
+            Report of indexed, removed and failed files
+        """
+        return self.base.load_documents()
+
+    def get_tenant(self, tenant_id: str, docs_dir: str) -> IndustrialRAG:
+        """Get the overlay of a tenant, creating and loading it on first use
+
+        Args:
+            tenant_id: Tenant identifier, letters, digits, "-" and "_"
+            docs_dir: Directory containing the tenant's own documents
+
+        Returns:
+            The tenant's IndustrialRAG
+
+        Raises:
+            ValueError: If the tenant ID is invalid
+        """
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant ID: {tenant_id}")
+
+        with self._lock:
+            future = self._tenants.get(tenant_id)
+            leader = future is None
+            if leader:
+                future = self._tenants[tenant_id] = Future()
+        if not leader:
+            # Wait for the first caller loading this tenant; callers of other
+            # tenants are not blocked
+            return future.result()
+
+        try:
+            tenant = IndustrialRAG(
+                docs_dir=docs_dir,
+                persist_directory=(
+                    os.path.join(self.persist_root, "tenants", tenant_id) if self.persist_root else None
+                ),
+                collection_name=f"tenant_{tenant_id}",
+                base=self.base,
+                **self.rag_kwargs
+            )
+            tenant.load_documents()
+            future.set_result(tenant)
+        except BaseException as e:
+            # Forget the failed load so that the next call retries it
+            with self._lock:
+                if self._tenants.get(tenant_id) is future:
+                    del self._tenants[tenant_id]
+            future.set_exception(e)
+        return future.result()
+
+    def remove_tenant(self, tenant_id: str) -> None:
+        """Stop serving a tenant, keeping its persisted index
+
+        Args:
+            tenant_id: Tenant identifier
+        """
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+
+    def tenants(self) -> List[str]:
+        """Get the IDs of the loaded tenants
+
+        Returns:
+            Sorted list of tenant IDs, without tenants still loading
+        """
+        with self._lock:
+            return sorted(
+                tenant_id for tenant_id, future in self._tenants.items()
+                if future.done() and future.exception() is None
+            )
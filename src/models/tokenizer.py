@@ -0,0 +1,111 @@
+"""
+Process-wide cached tokenizers for counting and splitting by tokens
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Sequence, Any
+
+# Roughly BPE-sized pieces: short letter runs, short digit runs and single
+# symbols, each carrying its leading whitespace. Every character of the
+# input belongs to exactly one piece, so decoding is lossless.
+PIECE_PATTERN = re.compile(r"\s*[A-Za-z]{1,4}|\s*\d{1,3}|\s*[^\sA-Za-z\d]|\s+")
+
+
+class RegexTokenizer:
+    """Offline fallback tokenizer approximating BPE token boundaries"""
+
+    name = "regex"
+
+    def encode(self, text: str) -> List[str]:
+        """Split text into tokens
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            List of text pieces
+        """
+        return PIECE_PATTERN.findall(text)
+
+    def decode(self, tokens: Sequence[str]) -> str:
+        """Join tokens back into text
+
+        Args:
+            tokens: Pieces returned by encode
+
+        Returns:
+            The original text
+        """
+        return "".join(tokens)
+
+
+class TiktokenTokenizer:
+    """Tokenizer backed by a tiktoken encoding"""
+
+    def __init__(self, encoding: Any):
+        """Wrap an encoding
+
+        Args:
+            encoding: tiktoken Encoding
+        """
+        self.encoding = encoding
+        self.name = encoding.name
+
+    def encode(self, text: str) -> List[int]:
+        """Encode text into token IDs
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            List of token IDs
+        """
+        return self.encoding.encode(text, disallowed_special=())
+
+    def decode(self, tokens: Sequence[int]) -> str:
+        """Decode token IDs into text
+
+        Args:
+            tokens: Token IDs
+
+        Returns:
+            Decoded text
+        """
+        return self.encoding.decode(list(tokens))
+
+
+@lru_cache(maxsize=16)
+def get_tokenizer(model: str = "gpt-3.5-turbo"):
+    """Load the tokenizer of a model once per process
+
+    Args:
+        model: Model name
+
+    Returns:
+        A tiktoken based tokenizer, or RegexTokenizer when tiktoken or its
+        encoding files are not available
+    """
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return TiktokenTokenizer(encoding)
+    except Exception:
+        # tiktoken is missing or its encoding files cannot be downloaded
+        return RegexTokenizer()
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count the tokens of a text for a model
+
+    Args:
+        text: Text to measure
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        Token count
+    """
+    return len(get_tokenizer(model).encode(text))
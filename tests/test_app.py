@@ -0,0 +1,52 @@
+"""
+Smoke tests for the Streamlit chatbot app
+"""
+
+import unittest
+import os
+import sys
+import json
+import subprocess
+import tempfile
+
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "app_new.py"))
+
+# Runs the app like `streamlit run` does, with only src/ on the path
+RUN_APP = """
+import json
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({path!r}).run(timeout=60)
+print(json.dumps({{
+    "exceptions": [e.value for e in app.exception],
+    "titles": [t.value for t in app.title],
+}}))
+"""
+
+
+class TestStreamlitApp(unittest.TestCase):
+    """Test cases for src/app_new.py"""
+
+    def test_app_starts_without_repository_root_on_path(self):
+        """Test that the app renders when streamlit only adds src/ to sys.path"""
+        # Arrange
+        env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+
+        # Act
+        result = subprocess.run(
+            [sys.executable, "-c", RUN_APP.format(path=APP_PATH)],
+            cwd=tempfile.gettempdir(),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+
+        # Assert
+        self.assertEqual(result.returncode, 0, result.stderr)
+        page = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(page["exceptions"], [])
+        self.assertEqual(len(page["titles"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Unit tests for BM25 and hybrid retrieval
+"""
+
+import unittest
+import os
+import sys
+import math
+import random
+from collections import Counter
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+
+from src.models.bm25 import BM25Index, tokenize, index_terms
+from src.models.hybrid import reciprocal_rank_fusion
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for BM25Index class"""
+
+    def setUp(self):
+        """Index a few industrial snippets"""
+        self.index = BM25Index()
+        self.docs = {
+            "iec": Document(page_content="IEC 61131-3 defines ladder diagram and structured text.", metadata={"source": "plc.txt"}),
+            "modbus": Document(page_content="Modbus RTU runs over RS-485 serial lines.", metadata={"source": "fieldbus.txt"}),
+            "bacnet": Document(page_content="BACnet is the standard protocol for building automation.", metadata={"source": "bas.txt"}),
+        }
+        self.index.add(list(self.docs), [doc.page_content for doc in self.docs.values()])
+
+    def test_tokenize_keeps_identifiers_and_parts(self):
+        """Test that compound identifiers are indexed whole and split"""
+        self.assertEqual(tokenize("IEC 61131-3"), ["iec", "61131-3", "61131", "3"])
+        self.assertIn("motor_01.start", tokenize("Tag Motor_01.Start"))
+
+    def test_search_ranks_exact_token_match_first(self):
+        """Test lexical matching of exact technical terms"""
+        # Act
+        results = self.index.search("What does 61131-3 specify?", k=2)
+
+        # Assert
+        self.assertEqual(results[0][0], "iec")
+        self.assertEqual(len(results), 1)
+
+    def test_search_applies_id_filter_to_ranked_candidates(self):
+        """Test that chunks rejected by the filter are not returned"""
+        # Arrange
+        checked = []
+
+        def in_plc(ids):
+            checked.append(ids)
+            return [i for i in ids if self.docs[i].metadata["source"] == "plc.txt"]
+
+        # Act
+        results = self.index.search("standard ladder diagram for building automation", k=3, filter_ids=in_plc)
+
+        # Assert
+        self.assertEqual([chunk_id for chunk_id, _ in results], ["iec"])
+        self.assertEqual(checked, [["bacnet", "iec"]])
+
+    def test_remove_and_replace(self):
+        """Test that removed chunks are no longer found and replacements are"""
+        # Act
+        self.index.remove(["modbus"])
+        self.index.add(["bacnet"], ["KNX is used in home automation."])
+
+        # Assert
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search("Modbus RTU"), [])
+        self.assertEqual(self.index.search("BACnet"), [])
+        self.assertEqual(len(self.index.search("KNX")), 1)
+
+
+class TestBM25Scoring(unittest.TestCase):
+    """Test cases for vectorized BM25 scoring"""
+
+    def _reference_scores(self, texts, query, k1=1.5, b=0.75):
+        """Score every text with a plain Python BM25 over all query terms"""
+        counts = {chunk_id: Counter(index_terms(text)) for chunk_id, text in texts.items()}
+        average_length = sum(sum(c.values()) for c in counts.values()) / len(counts)
+        scores = {}
+        for term in set(index_terms(query)):
+            df = sum(1 for c in counts.values() if term in c)
+            if not df:
+                continue
+            idf = math.log(1 + (len(counts) - df + 0.5) / (df + 0.5))
+            for chunk_id, c in counts.items():
+                if term in c:
+                    norm = k1 * (1 - b + b * sum(c.values()) / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * c[term] * (k1 + 1) / (c[term] + norm)
+        return scores
+
+    def test_scores_match_reference_across_updates(self):
+        """Test that scores stay exact before and after postings are rebuilt"""
+        # Arrange
+        rng = random.Random(0)
+        words = ["plc", "scada", "modbus", "bacnet", "pid", "loop", "valve", "pump", "alarm", "historian"]
+        texts = {str(i): " ".join(rng.choices(words, k=rng.randint(3, 30))) for i in range(600)}
+        index = BM25Index(max_df_ratio=1.0)
+        ids = list(texts)
+        index.add(ids, [texts[i] for i in ids])
+        index.search("pump")
+        removed = ids[::7]
+        index.remove(removed)
+        for chunk_id in removed:
+            del texts[chunk_id]
+        texts["new"] = "pid loop tuning for the pump valve"
+        index.add(["new"], [texts["new"]])
+        query = "How is the PID loop of a pump valve tuned?"
+
+        # Act
+        results = index.search(query, k=50)
+
+        # Assert
+        expected = self._reference_scores(texts, query)
+        self.assertEqual(len(results), 50)
+        for chunk_id, score in results:
+            self.assertAlmostEqual(score, expected[chunk_id], places=5)
+        self.assertAlmostEqual(results[0][1], max(expected.values()))
+
+    def test_stopwords_and_common_terms_are_not_scored(self):
+        """Test that function words and terms found in most chunks carry no weight"""
+        # Arrange
+        index = BM25Index()
+        texts = [f"Automation cell {i} uses a PLC." for i in range(9)]
+        texts.append("Automation cell 9 uses a PID loop.")
+        index.add([str(i) for i in range(10)], texts)
+
+        # Act
+        results = index.search("How do I tune a PID loop in automation?", k=10)
+
+        # Assert
+        self.assertEqual([chunk_id for chunk_id, _ in results], ["9"])
+        self.assertEqual(index.search("what is the"), [])
+        self.assertEqual(len(index.search("automation", k=10)), 10)
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    """Test cases for reciprocal_rank_fusion"""
+
+    def test_documents_found_by_both_rankings_win(self):
+        """Test that agreement between retrievers is rewarded"""
+        # Arrange
+        a = Document(page_content="a", metadata={"source": "x"})
+        b = Document(page_content="b", metadata={"source": "x"})
+        c = Document(page_content="c", metadata={"source": "x"})
+
+        # Act
+        fused = reciprocal_rank_fusion([[a, b], [c, b]])
+
+        # Assert
+        self.assertEqual(fused[0], b)
+        self.assertEqual(len(fused), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Unit tests for context packing
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.document_loaders import PyPDFLoader
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.models.context import ContextPacker, merge_chunks, context_budget
+from src.models.splitting import MarkdownCharacterSplitter
+from src.models.tokenizer import count_tokens
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one page per list of text lines"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {len(objects)} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    with open(path, "w") as f:
+        f.write(out)
+
+
+class TestContextPacker(unittest.TestCase):
+    """Test cases for context packing"""
+
+    def setUp(self):
+        """Split a document into overlapping chunks"""
+        self.text = " ".join(f"Rung {i} energizes coil Q{i} when input I{i} is closed." for i in range(12))
+        splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=80, add_start_index=True)
+        self.chunks = splitter.create_documents([self.text], metadatas=[{"source": "plc.txt"}])
+
+    def test_adjacent_chunks_are_merged_without_overlap(self):
+        """Test that overlapping neighbours become one span of the source text"""
+        # Act
+        merged = merge_chunks([self.chunks[2], self.chunks[0], self.chunks[1]])
+
+        # Assert
+        self.assertEqual(len(merged), 1)
+        self.assertIn(merged[0].page_content, self.text)
+        self.assertTrue(self.text.startswith(merged[0].page_content))
+
+    def test_overlap_is_detected_without_start_index(self):
+        """Test merging of chunks indexed before start offsets were stored"""
+        # Arrange
+        chunks = [Document(page_content=c.page_content, metadata={"source": "plc.txt"}) for c in self.chunks[:2]]
+
+        # Act
+        merged = merge_chunks(chunks)
+
+        # Assert
+        self.assertEqual(len(merged), 1)
+        self.assertIn(merged[0].page_content, self.text)
+
+    def test_chunks_of_other_sources_are_kept_apart(self):
+        """Test that identical overlap from different files is not merged"""
+        # Arrange
+        other = Document(page_content=self.chunks[1].page_content, metadata={"source": "other.txt"})
+
+        # Act
+        merged = merge_chunks([self.chunks[0], other])
+
+        # Assert
+        self.assertEqual(len(merged), 2)
+
+    def test_stale_start_index_does_not_cut_text(self):
+        """Test that offsets contradicting the chunk texts are not trusted"""
+        # Arrange: the second chunk's offset predates an edit earlier in the file
+        stale = Document(
+            page_content=self.chunks[2].page_content,
+            metadata={**self.chunks[2].metadata, "start_index": self.chunks[2].metadata["start_index"] - 60}
+        )
+
+        # Act
+        merged = merge_chunks([self.chunks[0], stale])
+
+        # Assert
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged[1].page_content, self.chunks[2].page_content)
+
+    def test_pages_of_a_pdf_are_not_merged(self):
+        """Test that chunks of different PDF pages are kept apart despite restarting offsets"""
+        # Arrange
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        path = os.path.join(tmp_dir, "manual.pdf")
+        write_pdf(path, [
+            [f"Rung {i} energizes coil Q{i} when input I{i} is closed." for i in range(20)],
+            [f"Timer T{i} delays output Q{i} by {i * 10} ms." for i in range(20)]
+        ])
+        chunks = MarkdownCharacterSplitter(400, 100).split_documents(PyPDFLoader(path).load())
+        first_page = [c for c in chunks if c.metadata["page"] == 0 and c.metadata["start_index"] > 0][0]
+        second_page = [c for c in chunks if c.metadata["page"] == 1][0]
+        self.assertLess(first_page.metadata["start_index"], len(second_page.page_content))
+
+        # Act
+        packed, stats = ContextPacker().pack([first_page, second_page])
+
+        # Assert
+        self.assertEqual(packed, [first_page, second_page])
+        self.assertEqual(stats["overlap_tokens_saved"], 0)
+
+    def test_packing_stops_at_token_budget(self):
+        """Test that lower ranked chunks are dropped once the budget is used"""
+        # Arrange
+        far_apart = [self.chunks[0], self.chunks[2], self.chunks[4]]
+        budget = count_tokens(far_apart[0].page_content) + count_tokens(far_apart[1].page_content)
+
+        # Act
+        packed, stats = ContextPacker(token_budget=budget).pack(far_apart)
+
+        # Assert
+        self.assertEqual(len(packed), 2)
+        self.assertEqual(stats["dropped_chunks"], 1)
+        self.assertEqual(stats["context_tokens"], budget)
+
+    def test_packing_reports_saved_overlap(self):
+        """Test that merged overlap is reported as saved tokens"""
+        # Act
+        packed, stats = ContextPacker().pack(self.chunks[:3])
+
+        # Assert
+        self.assertEqual(len(packed), 1)
+        self.assertGreater(stats["overlap_tokens_saved"], 0)
+
+    def test_budget_depends_on_model(self):
+        """Test per-model default budgets"""
+        self.assertEqual(context_budget("gpt-4o-mini-2024-07-18"), 12000)
+        self.assertEqual(context_budget("gpt-4-0613"), 6000)
+        self.assertEqual(context_budget("unknown-model"), 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for the selectable embedding backends
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.embeddings import HashingEmbeddings, create_embeddings
+from src.models.rag import IndustrialRAG
+
+
+class TestHashingEmbeddings(unittest.TestCase):
+    """Test cases for HashingEmbeddings class"""
+
+    def setUp(self):
+        """Create the vectorizer"""
+        self.embeddings = HashingEmbeddings(n_features=256)
+
+    def test_vectors_are_deterministic_and_normalized(self):
+        """Test that equal texts give equal unit vectors"""
+        # Act
+        first, second = self.embeddings.embed_documents(["Modbus RTU wiring"] * 2)
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 256)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+
+    def test_shared_words_raise_similarity(self):
+        """Test that a query is closest to the text sharing its words"""
+        # Arrange
+        query = self.embeddings.embed_query("Modbus RTU wiring")
+        related, unrelated = self.embeddings.embed_documents([
+            "Modbus RTU wiring over RS-485",
+            "BACnet controllers for air handling"
+        ])
+
+        # Assert
+        self.assertGreater(np.dot(query, related), np.dot(query, unrelated))
+
+
+class TestCreateEmbeddings(unittest.TestCase):
+    """Test cases for create_embeddings"""
+
+    def test_hashing_model_name_sets_dimensions(self):
+        """Test that the hashing model name selects the vector size"""
+        # Act
+        embeddings = create_embeddings("hashing", "hashing-64")
+
+        # Assert
+        self.assertIsInstance(embeddings, HashingEmbeddings)
+        self.assertEqual(len(embeddings.embed_query("PLC")), 64)
+
+    def test_unknown_backend_raises(self):
+        """Test that an unknown backend is rejected"""
+        with self.assertRaises(ValueError):
+            create_embeddings("word2vec")
+
+
+class TestOfflineIngestion(unittest.TestCase):
+    """Test cases for indexing without an OpenAI key"""
+
+    def setUp(self):
+        """Set up a temporary corpus"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.docs_dir = os.path.join(self.tmp_dir, "docs")
+        os.makedirs(self.docs_dir)
+        with open(os.path.join(self.docs_dir, "plc.txt"), "w") as f:
+            f.write("# PLC\n\nLadder logic for PLC programming.")
+
+    def test_hashing_backend_indexes_without_api_key(self):
+        """Test that the hashing backend needs no API key"""
+        # Arrange
+        environ = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+        environ["EMBEDDING_BACKEND"] = "hashing"
+
+        # Act
+        with patch.dict(os.environ, environ, clear=True):
+            rag = IndustrialRAG(docs_dir=self.docs_dir, persist_directory=os.path.join(self.tmp_dir, "index"))
+            rag.load_documents()
+
+        # Assert
+        self.assertEqual(rag.embedding_model, "hashing-1024")
+        self.assertEqual(rag.vectorstore._collection.count(), 1)
+        self.assertEqual(rag.ingestion.max_workers, 1)
+
+    def test_openai_backend_requires_api_key(self):
+        """Test that the OpenAI backend still requires a key"""
+        with patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                IndustrialRAG(docs_dir=self.docs_dir, embedding_backend="openai")
+
+
+if __name__ == '__main__':
+    unittest.main()
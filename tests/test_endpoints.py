@@ -0,0 +1,125 @@
+"""
+Unit tests for the FastAPI endpoints
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import json
+import asyncio
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from langchain.chat_models.fake import FakeListChatModel
+
+from src.api.endpoints import app, get_llm_helper, sse_events
+from src.models.client_registry import DEFAULT_REGISTRY
+from src.models.llm_utils import IndustrialLLMHelper
+
+
+class TestChatEndpoints(unittest.TestCase):
+    """Test cases for the chat endpoints"""
+
+    def setUp(self):
+        """Set up a helper backed by a local fake LLM"""
+        os.environ["OPENAI_API_KEY"] = "sk-test-key"
+        DEFAULT_REGISTRY.clear()
+        with patch("src.models.client_registry.ChatOpenAI") as mock_chat_openai:
+            mock_chat_openai.return_value = FakeListChatModel(responses=["Check the PID gains."])
+            self.helper = IndustrialLLMHelper()
+        app.dependency_overrides[get_llm_helper] = lambda: self.helper
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Remove dependency overrides"""
+        app.dependency_overrides.clear()
+
+    def test_chat_calls_llm_helper(self):
+        """Test that /chat returns the helper's response"""
+        # Act
+        response = self.client.post(
+            "/chat",
+            json={"messages": [{"role": "user", "content": "My loop oscillates"}]}
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"], "Check the PID gains.")
+
+    def test_chat_without_model_uses_configured_default(self):
+        """Test that /chat only overrides the helper's model when one is requested"""
+        # Arrange
+        self.helper.model_name = "gpt-4"
+        messages = [{"role": "user", "content": "My loop oscillates"}]
+
+        # Act
+        with patch.object(self.helper, "_call_params", wraps=self.helper._call_params) as call_params:
+            self.client.post("/chat", json={"messages": messages})
+            self.client.post("/chat", json={"messages": messages, "model": "gpt-4o", "temperature": 0.2})
+
+        # Assert
+        self.assertEqual(call_params.call_args_list[0].args, (None, None))
+        self.assertEqual(call_params.call_args_list[1].args, ("gpt-4o", 0.2))
+
+    def test_chat_stream_sends_server_sent_events(self):
+        """Test that /chat/stream streams tokens followed by a done event"""
+        # Act
+        response = self.client.post(
+            "/chat/stream",
+            json={"messages": [{"role": "user", "content": "My loop oscillates"}]}
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = [event for event in response.text.split("\n\n") if event]
+        tokens = [json.loads(event[len("data: "):])["token"] for event in events[:-1]]
+        self.assertEqual("".join(tokens), "Check the PID gains.")
+        self.assertTrue(events[-1].startswith("event: done"))
+
+    def test_chat_without_helper_returns_503(self):
+        """Test that a missing LLM configuration is reported"""
+        # Arrange
+        app.dependency_overrides.clear()
+        app.state.llm_helper = None
+
+        # Act
+        response = self.client.post("/chat", json={"messages": []})
+
+        # Assert
+        self.assertEqual(response.status_code, 503)
+
+    def test_sse_events_stop_when_client_disconnects(self):
+        """Test that a disconnect closes the upstream token stream"""
+        # Arrange
+        generated = []
+        closed = []
+
+        async def tokens():
+            try:
+                for token in ["a", "b", "c", "d"]:
+                    generated.append(token)
+                    yield token
+            finally:
+                closed.append(True)
+
+        async def is_disconnected():
+            return len(generated) >= 2
+
+        async def collect():
+            return [event async for event in sse_events(tokens(), is_disconnected)]
+
+        # Act
+        events = asyncio.run(collect())
+
+        # Assert
+        self.assertEqual(len(events), 1)
+        self.assertEqual(generated, ["a", "b"])
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for conversation history compaction
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.history import HistoryManager, ExtractiveSummarizer, dedupe_messages, SUMMARY_PREFIX
+from src.models.tokenizer import count_tokens
+
+
+class CountingSummarizer(ExtractiveSummarizer):
+    """Extractive summarizer recording how many messages it folded"""
+
+    def __init__(self):
+        super().__init__()
+        self.folded = []
+
+    def __call__(self, summary, messages):
+        self.folded.append(len(messages))
+        return super().__call__(summary, messages)
+
+
+def make_turns(count):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"Step {i}: the conveyor PLC still reports fault code E{i:03d}."})
+        messages.append({"role": "assistant", "content": f"For step {i}, check the drive parameters and the encoder wiring."})
+    return messages
+
+
+class TestHistoryManager(unittest.TestCase):
+    """Test cases for HistoryManager class"""
+
+    def setUp(self):
+        """Create a manager with a small budget"""
+        self.summarizer = CountingSummarizer()
+        self.manager = HistoryManager(self.summarizer, token_budget=120)
+
+    def _tokens(self, messages):
+        return sum(count_tokens(msg["content"]) for msg in messages)
+
+    def test_short_history_is_unchanged(self):
+        """Test that a history within the budget is sent verbatim"""
+        # Arrange
+        messages = make_turns(1)
+
+        # Act & Assert
+        self.assertEqual(self.manager.compact(messages), messages)
+        self.assertEqual(self.summarizer.folded, [])
+
+    def test_long_history_stays_bounded(self):
+        """Test that older turns are summarized and recent ones kept"""
+        # Arrange
+        messages = [{"role": "system", "content": "Site: plant 3"}] + make_turns(40)
+
+        # Act
+        compacted = self.manager.compact(messages, conversation_id="op-1")
+
+        # Assert
+        self.assertEqual(compacted[0], messages[0])
+        self.assertTrue(compacted[1]["content"].startswith(SUMMARY_PREFIX))
+        self.assertEqual(compacted[-1], messages[-1])
+        self.assertLess(self._tokens(compacted[2:]), 120)
+        self.assertLess(self._tokens(compacted), 120 + 300 + 20)
+
+    def test_summary_is_extended_incrementally(self):
+        """Test that cached summaries only fold new messages"""
+        # Arrange
+        messages = make_turns(20)
+        self.manager.compact(messages, conversation_id="op-1")
+        first_fold = sum(self.summarizer.folded)
+
+        # Act
+        for count in range(21, 30):
+            self.manager.compact(make_turns(count), conversation_id="op-1")
+
+        # Assert: each message is folded at most once
+        self.assertLessEqual(sum(self.summarizer.folded), 2 * 29 - 2)
+        self.assertLess(len(self.summarizer.folded), 9)
+        self.assertGreater(first_fold, 0)
+
+    def test_edited_history_rebuilds_summary(self):
+        """Test that a cached summary is not reused for a different history"""
+        # Arrange
+        self.manager.compact(make_turns(20), conversation_id="op-1")
+        edited = make_turns(20)
+        edited[0] = {"role": "user", "content": "The HVAC controller lost BACnet connection."}
+
+        # Act
+        compacted = self.manager.compact(edited, conversation_id="op-1")
+
+        # Assert
+        self.assertIn("BACnet", compacted[0]["content"])
+
+    def test_duplicate_turns_are_removed(self):
+        """Test that a message repeated back to back is sent once"""
+        # Arrange
+        messages = [
+            {"role": "user", "content": "Why does the VFD trip?"},
+            {"role": "user", "content": "Why does the VFD trip? "},
+            {"role": "assistant", "content": "Check the overcurrent settings."},
+        ]
+
+        # Act & Assert
+        self.assertEqual(dedupe_messages(messages), [messages[0], messages[2]])
+        self.assertEqual(self.manager.compact(messages), [messages[0], messages[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Unit tests for the embedding ingestion pipeline
+"""
+
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+
+from src.models.ingestion import EmbeddingPipeline, TokenBucket, is_rate_limit_error
+
+
+class FakeRateLimitError(Exception):
+    """Error carrying an HTTP 429 status like the OpenAI client raises"""
+
+    status_code = 429
+
+
+class FakeEmbeddingsServer(Embeddings):
+    """Local stand-in for an embeddings endpoint
+
+    Rejects the first requests with 429 and tracks request concurrency.
+    """
+
+    def __init__(self, rejected_requests=0, latency=0.01):
+        self.rejected_requests = rejected_requests
+        self.latency = latency
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.rejected_requests:
+                raise FakeRateLimitError("Too Many Requests")
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def make_chunks(count):
+    return ((f"id-{i}", Document(page_content="x" * i)) for i in range(count))
+
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    """Test cases for EmbeddingPipeline class"""
+
+    def test_run_delivers_every_chunk(self):
+        """Test that all chunks reach the sink with matching vectors"""
+        # Arrange
+        server = FakeEmbeddingsServer()
+        pipeline = EmbeddingPipeline(server, batch_size=8, max_workers=3)
+        received = {}
+
+        def sink(ids, documents, vectors):
+            for chunk_id, doc, vector in zip(ids, documents, vectors):
+                received[chunk_id] = (doc.page_content, vector)
+
+        # Act
+        stats = pipeline.run(make_chunks(50), sink)
+
+        # Assert
+        self.assertEqual(len(received), 50)
+        for content, vector in received.values():
+            self.assertEqual(vector[0], float(len(content)))
+        self.assertEqual(stats.chunks, 50)
+        self.assertEqual(stats.batches, 7)
+        self.assertGreater(stats.chunks_per_second, 0)
+        self.assertLessEqual(server.max_active, 3)
+
+    def test_run_retries_rate_limited_batches(self):
+        """Test that 429 responses are retried"""
+        # Arrange
+        server = FakeEmbeddingsServer(rejected_requests=2)
+        pipeline = EmbeddingPipeline(server, batch_size=10, max_workers=1, retry_base_delay=0.001)
+
+        # Act
+        stats = pipeline.run(make_chunks(20), lambda ids, documents, vectors: None)
+
+        # Assert
+        self.assertEqual(stats.chunks, 20)
+        self.assertEqual(stats.retries, 2)
+
+    def test_run_raises_after_max_retries(self):
+        """Test that a persistently rate limited batch fails the run"""
+        # Arrange
+        server = FakeEmbeddingsServer(rejected_requests=100)
+        pipeline = EmbeddingPipeline(server, max_retries=2, retry_base_delay=0.001)
+
+        # Act & Assert
+        with self.assertRaises(FakeRateLimitError):
+            pipeline.run(make_chunks(5), lambda ids, documents, vectors: None)
+
+    def test_run_consumes_input_lazily(self):
+        """Test that the pipeline does not read far ahead of the workers"""
+        # Arrange
+        server = FakeEmbeddingsServer(latency=0.02)
+        pipeline = EmbeddingPipeline(server, batch_size=4, max_workers=2)
+        produced = []
+        max_ahead = []
+
+        def chunks():
+            for chunk_id, doc in make_chunks(40):
+                produced.append(chunk_id)
+                yield chunk_id, doc
+
+        delivered = []
+
+        def sink(ids, documents, vectors):
+            delivered.extend(ids)
+            max_ahead.append(len(produced) - len(delivered))
+
+        # Act
+        pipeline.run(chunks(), sink)
+
+        # Assert
+        self.assertEqual(len(delivered), 40)
+        self.assertLessEqual(max(max_ahead), 4 * 3)
+
+    def test_is_rate_limit_error(self):
+        """Test rate limit error detection"""
+        self.assertTrue(is_rate_limit_error(FakeRateLimitError()))
+        self.assertFalse(is_rate_limit_error(ValueError("bad input")))
+
+    def test_token_bucket_limits_rate(self):
+        """Test that the token bucket spaces out requests"""
+        # Arrange
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.perf_counter()
+
+        # Act
+        for _ in range(6):
+            bucket.acquire()
+
+        # Assert
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,11 +6,135 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import json
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Add src directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from langchain.chat_models.fake import FakeListChatModel
+from langchain.chat_models.base import SimpleChatModel
+
+from src.models.client_registry import DEFAULT_REGISTRY, ClientRegistry
 from src.models.llm_utils import IndustrialLLMHelper, DEFAULT_SYSTEM_PROMPT
+from src.models.prompts import TOPIC_GUIDANCE
+
+
+class EchoChatModel(SimpleChatModel):
+    """Chat model echoing the last message and failing on a "fail" message"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        content = messages[-1].content
+        if content == "fail":
+            raise RuntimeError("upstream error")
+        return f"echo: {content}"
+
+
+class SlowEchoChatModel(EchoChatModel):
+    """Echo model that takes a moment to answer and counts its calls"""
+
+    calls: int = 0
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        time.sleep(0.05)
+        return super()._call(messages, stop, run_manager, **kwargs)
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion request on a keep-alive connection"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestClientRegistry(unittest.TestCase):
+    """Test cases for ClientRegistry class"""
+
+    def setUp(self):
+        """Start a local chat completion server"""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        self.registry = ClientRegistry()
+        self.addCleanup(self.registry.clear)
+
+    def test_async_client_works_across_event_loops(self):
+        """Test that successive asyncio.run calls do not reuse connections of a closed loop"""
+        # Arrange
+        with patch.dict(os.environ, {"OPENAI_API_BASE": self.base_url}):
+            _, client = self.registry.get_openai_clients("sk-test-key", max_retries=0)
+
+        async def ask():
+            response = await client.chat.completions.create(
+                model="gpt-3.5-turbo", messages=[{"role": "user", "content": "Reset?"}]
+            )
+            return response.choices[0].message.content
+
+        # Act
+        answers = [asyncio.run(ask()) for _ in range(3)]
+
+        # Assert
+        self.assertEqual(answers, ["ok"] * 3)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_connection_settings_are_passed_through(self, mock_chat_openai):
+        """Test that environment settings, timeout and retries reach the clients"""
+        # Arrange
+        environment = {
+            "OPENAI_API_BASE": self.base_url,
+            "OPENAI_ORGANIZATION": "org-plant",
+            "OPENAI_PROXY": "http://proxy.local:3128",
+        }
+
+        # Act
+        with patch.dict(os.environ, environment):
+            self.registry.get_chat_model("gpt-4", 0.0, "sk-test-key", request_timeout=12.5, max_retries=5)
+            sync_client, async_client = self.registry.get_openai_clients("sk-test-key", 12.5, 5)
+        default_client = self.registry.get_openai_clients("sk-test-key")[0]
+
+        # Assert
+        kwargs = mock_chat_openai.call_args.kwargs
+        self.assertEqual(kwargs["openai_api_base"], self.base_url)
+        self.assertEqual(kwargs["openai_organization"], "org-plant")
+        self.assertEqual(kwargs["openai_proxy"], "http://proxy.local:3128")
+        self.assertEqual(kwargs["request_timeout"], 12.5)
+        self.assertEqual(kwargs["max_retries"], 5)
+        self.assertIs(kwargs["async_client"], async_client.chat.completions)
+        for client in (sync_client, async_client):
+            self.assertEqual(str(client.base_url), self.base_url + "/")
+            self.assertEqual(client.organization, "org-plant")
+            self.assertEqual(client.timeout, 12.5)
+            self.assertEqual(client.max_retries, 5)
+        self.assertEqual(async_client._client._transport.proxy, "http://proxy.local:3128")
+        self.assertNotEqual(default_client.base_url, sync_client.base_url)
+
 
 class TestIndustrialLLMHelper(unittest.TestCase):
     """Test cases for IndustrialLLMHelper class"""
@@ -19,8 +143,9 @@ class TestIndustrialLLMHelper(unittest.TestCase):
         """Set up test environment"""
         # Mock environment variable
         os.environ["OPENAI_API_KEY"] = "sk-test-key"
+        DEFAULT_REGISTRY.clear()
     
-    @patch("src.models.llm_utils.ChatOpenAI")
+    @patch("src.models.client_registry.ChatOpenAI")
     def test_initialization(self, mock_chat_openai):
         """Test initialization of the helper class"""
         # Arrange & Act
@@ -34,13 +159,29 @@ class TestIndustrialLLMHelper(unittest.TestCase):
         self.assertEqual(helper.temperature, 0.7)
         self.assertEqual(helper.system_prompt, DEFAULT_SYSTEM_PROMPT)
         self.assertEqual(helper.api_key, "sk-test-key")
-        mock_chat_openai.assert_called_once_with(
-            model_name="gpt-3.5-turbo",
-            temperature=0.7,
-            openai_api_key="sk-test-key"
-        )
-    
-    @patch("src.models.llm_utils.ChatOpenAI")
+        mock_chat_openai.assert_called_once()
+        kwargs = mock_chat_openai.call_args.kwargs
+        self.assertEqual(kwargs["model_name"], "gpt-3.5-turbo")
+        self.assertEqual(kwargs["temperature"], 0.7)
+        self.assertEqual(kwargs["openai_api_key"], "sk-test-key")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_system_message_includes_topic_guidance(self, mock_chat_openai):
+        """Test that the static prefix carries the topic guidance by default"""
+        # Arrange
+        helper = IndustrialLLMHelper()
+        plain = IndustrialLLMHelper(guidance={})
+
+        # Act
+        system = helper.prompt.prefix[0]["content"]
+
+        # Assert
+        self.assertTrue(system.startswith(DEFAULT_SYSTEM_PROMPT))
+        for topic, guidance in TOPIC_GUIDANCE.items():
+            self.assertIn(f"- {topic}: {guidance}", system)
+        self.assertEqual(plain.prompt.prefix[0]["content"], DEFAULT_SYSTEM_PROMPT)
+
+    @patch("src.models.client_registry.ChatOpenAI")
     def test_get_chat_response(self, mock_chat_openai):
         """Test getting a chat response"""
         # Arrange
@@ -62,25 +203,110 @@ class TestIndustrialLLMHelper(unittest.TestCase):
         self.assertEqual(response, "Test response")
         mock_instance.generate.assert_called_once()
     
-    @patch("src.models.llm_utils.ChatOpenAI")
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_stream_chat_response(self, mock_chat_openai):
+        """Test streaming a chat response token by token"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["Use PID"])
+        helper = IndustrialLLMHelper()
+        messages = [{"role": "user", "content": "Hello"}]
+
+        # Act
+        tokens = list(helper.stream_chat_response(messages))
+
+        # Assert
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), "Use PID")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_astream_chat_response(self, mock_chat_openai):
+        """Test asynchronously streaming a chat response"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["Use PID"])
+        helper = IndustrialLLMHelper()
+        messages = [{"role": "user", "content": "Hello"}]
+
+        async def collect():
+            return [token async for token in helper.astream_chat_response(messages)]
+
+        # Act
+        tokens = asyncio.run(collect())
+
+        # Assert
+        self.assertEqual("".join(tokens), "Use PID")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_get_chat_responses_keeps_order_and_errors(self, mock_chat_openai):
+        """Test that batch results follow input order with per-item errors"""
+        # Arrange
+        mock_chat_openai.return_value = EchoChatModel()
+        helper = IndustrialLLMHelper()
+        conversations = [[{"role": "user", "content": text}] for text in ["line 1", "fail", "line 3"]]
+
+        # Act
+        results = helper.get_chat_responses(conversations, max_concurrency=2)
+
+        # Assert
+        self.assertEqual([result.text for result in results], ["echo: line 1", None, "echo: line 3"])
+        self.assertFalse(results[1].ok)
+        self.assertIn("upstream error", results[1].error)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_aget_chat_responses_keeps_order(self, mock_chat_openai):
+        """Test asynchronous batch generation"""
+        # Arrange
+        mock_chat_openai.return_value = EchoChatModel()
+        helper = IndustrialLLMHelper()
+        conversations = [[{"role": "user", "content": f"line {i}"}] for i in range(5)]
+
+        # Act
+        results = asyncio.run(helper.aget_chat_responses(conversations, max_concurrency=2))
+
+        # Assert
+        self.assertEqual([result.text for result in results], [f"echo: line {i}" for i in range(5)])
+        self.assertTrue(all(result.ok for result in results))
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_identical_requests_in_flight_are_coalesced(self, mock_chat_openai):
+        """Test that concurrent identical questions share one model call"""
+        # Arrange
+        model = SlowEchoChatModel()
+        mock_chat_openai.return_value = model
+        helper = IndustrialLLMHelper()
+        messages = [{"role": "user", "content": "Alarm A-17 on line 3"}]
+
+        async def ask_all():
+            return await asyncio.gather(*(helper.aget_chat_response(messages) for _ in range(5)))
+
+        # Act
+        responses = asyncio.run(ask_all())
+
+        # Assert
+        self.assertEqual(responses, ["echo: Alarm A-17 on line 3"] * 5)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(helper.coalescing_stats()["coalesced"], 4)
+
+    @patch("src.models.client_registry.ChatOpenAI")
     def test_change_model(self, mock_chat_openai):
-        """Test changing the model"""
+        """Test that changing the model reuses registered chat models"""
         # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: MagicMock()
         helper = IndustrialLLMHelper(model_name="gpt-3.5-turbo")
-        mock_chat_openai.reset_mock()
+        original_llm = helper.llm
         
         # Act
         helper.change_model("gpt-4")
+        gpt4_llm = helper.llm
+        helper.change_model("gpt-3.5-turbo")
         
         # Assert
-        self.assertEqual(helper.model_name, "gpt-4")
-        mock_chat_openai.assert_called_once_with(
-            model_name="gpt-4",
-            temperature=helper.temperature,
-            openai_api_key=helper.api_key
-        )
+        self.assertEqual(helper.model_name, "gpt-3.5-turbo")
+        self.assertIsNot(gpt4_llm, original_llm)
+        self.assertIs(helper.llm, original_llm)
+        self.assertEqual(mock_chat_openai.call_count, 2)
+        self.assertEqual(mock_chat_openai.call_args.kwargs["model_name"], "gpt-4")
     
-    @patch("src.models.llm_utils.ChatOpenAI")
+    @patch("src.models.client_registry.ChatOpenAI")
     def test_change_temperature(self, mock_chat_openai):
         """Test changing the temperature"""
         # Arrange
@@ -92,13 +318,29 @@ class TestIndustrialLLMHelper(unittest.TestCase):
         
         # Assert
         self.assertEqual(helper.temperature, 0.5)
-        mock_chat_openai.assert_called_once_with(
-            model_name=helper.model_name,
-            temperature=0.5,
-            openai_api_key=helper.api_key
+        mock_chat_openai.assert_called_once()
+        self.assertEqual(mock_chat_openai.call_args.kwargs["temperature"], 0.5)
+    
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_helpers_share_one_http_transport(self, mock_chat_openai):
+        """Test that helpers with different settings and keys share connections"""
+        # Arrange
+        IndustrialLLMHelper(model_name="gpt-3.5-turbo")
+        IndustrialLLMHelper(model_name="gpt-4", temperature=0.2)
+        IndustrialLLMHelper(api_key="sk-other-key")
+        
+        # Act
+        clients = [call.kwargs["client"] for call in mock_chat_openai.call_args_list]
+        
+        # Assert
+        self.assertIs(clients[0], clients[1])
+        self.assertIsNot(clients[0], clients[2])
+        self.assertIs(
+            DEFAULT_REGISTRY.get_openai_clients("sk-test-key")[0]._client,
+            DEFAULT_REGISTRY.get_openai_clients("sk-other-key")[0]._client
         )
     
-    @patch("src.models.llm_utils.ChatOpenAI")
+    @patch("src.models.client_registry.ChatOpenAI")
     def test_invalid_temperature(self, mock_chat_openai):
         """Test setting invalid temperature"""
         # Arrange
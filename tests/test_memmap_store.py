@@ -0,0 +1,227 @@
+"""
+Unit tests for the memory-mapped vector store
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.embeddings.fake import DeterministicFakeEmbedding
+
+from src.models import memmap_store
+from src.models.memmap_store import MemmapVectorStore
+from src.models.metadata_filter import matches_filter
+
+
+class TestMemmapVectorStore(unittest.TestCase):
+    """Test cases for MemmapVectorStore class"""
+
+    def setUp(self):
+        """Create a store directory and a small corpus"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.embeddings = DeterministicFakeEmbedding(size=32)
+        self.texts = [f"Valve V{i} opens on command {i}." for i in range(300)]
+        self.metadatas = [{"source": f"line{i % 3}.txt"} for i in range(300)]
+        self.ids = [f"chunk-{i}" for i in range(300)]
+
+    def _make_store(self, dtype="float32"):
+        store = MemmapVectorStore(self.embeddings, path=os.path.join(self.tmp_dir, dtype), dtype=dtype)
+        self.addCleanup(store.close)
+        return store
+
+    def test_search_finds_exact_match_for_every_dtype(self):
+        """Test that quantized vectors still rank the exact match first"""
+        for dtype in ("float32", "float16", "int8"):
+            with self.subTest(dtype=dtype):
+                # Arrange
+                store = self._make_store(dtype)
+                store.add_texts(self.texts, metadatas=self.metadatas, ids=self.ids)
+
+                # Act
+                results = store.similarity_search_with_score(self.texts[42], k=3)
+
+                # Assert
+                self.assertEqual(results[0][0].page_content, self.texts[42])
+                self.assertAlmostEqual(results[0][1], 1.0, places=2)
+
+    def test_filter_restricts_search(self):
+        """Test metadata filtering of search results"""
+        # Arrange
+        store = self._make_store()
+        store.add_texts(self.texts, metadatas=self.metadatas, ids=self.ids)
+
+        # Act
+        results = store.similarity_search(self.texts[42], k=5, filter={"source": "line1.txt"})
+
+        # Assert
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(doc.metadata["source"] == "line1.txt" for doc in results))
+
+    def test_reopen_restores_chunks_and_reuses_deleted_rows(self):
+        """Test persistence across restarts and row reuse after deletes"""
+        # Arrange
+        store = self._make_store()
+        store.add_texts(self.texts, metadatas=self.metadatas, ids=self.ids)
+        store.delete(self.ids[:10])
+        store.close()
+
+        # Act
+        reopened = self._make_store()
+        reopened.add_texts(["New valve V900."], ids=["chunk-new"])
+
+        # Assert
+        self.assertEqual(reopened.count(), 291)
+        self.assertNotEqual(reopened.similarity_search(self.texts[5], k=1)[0].page_content, self.texts[5])
+        self.assertEqual(reopened.similarity_search("New valve V900.", k=1)[0].page_content, "New valve V900.")
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp_dir, "float32", "scales.bin")), 4 * memmap_store.GROWTH_ROWS)
+
+    def test_upsert_replaces_and_get_matches_chroma_shape(self):
+        """Test that upserts overwrite chunks and get returns Chroma-style results"""
+        # Arrange
+        store = self._make_store()
+        vectors = np.eye(4, 32).tolist()
+        store.upsert(["a", "b"], vectors[:2], ["first", "second"], [{"source": "x.txt"}, {"source": "y.txt"}])
+
+        # Act
+        store.upsert(["a"], [vectors[2]], ["replaced"], [{"source": "x.txt"}])
+        result = store.get(where={"source": "x.txt"})
+
+        # Assert
+        self.assertEqual(result["ids"], ["a"])
+        self.assertEqual(result["documents"], ["replaced"])
+        self.assertEqual(store.get(include=[])["documents"], None)
+        self.assertEqual(store.similarity_search_by_vector(vectors[2], k=1)[0].page_content, "replaced")
+
+    def test_get_looks_up_ids_and_pages(self):
+        """Test ID lookups across SQL batches and paging with limit and offset"""
+        # Arrange
+        store = self._make_store()
+        store.add_texts(self.texts, metadatas=self.metadatas, ids=self.ids)
+        original = memmap_store.SQL_BATCH_IDS
+        memmap_store.SQL_BATCH_IDS = 7
+        self.addCleanup(setattr, memmap_store, "SQL_BATCH_IDS", original)
+
+        # Act
+        found = store.get(ids=["chunk-251", "missing", "chunk-3", "chunk-100"], where={"source": "line1.txt"})
+        pages = [store.get(limit=128, offset=offset, include=[])["ids"] for offset in (0, 128, 256, 384)]
+        filtered = store.get(where={"source": {"$in": ["line2.txt"]}}, limit=5, offset=10)
+
+        # Assert
+        self.assertEqual(found["ids"], ["chunk-100"])
+        self.assertEqual(found["documents"], [self.texts[100]])
+        self.assertEqual(sum(pages, []), self.ids)
+        self.assertEqual(filtered["ids"], [f"chunk-{i}" for i in range(32, 47, 3)])
+
+    def test_sql_filters_match_python_filters(self):
+        """Test that filters evaluated in SQL select the same chunks as matches_filter"""
+        # Arrange
+        store = self._make_store()
+        metadatas = [
+            {"source": f"line{i % 3}.txt", "page": i % 5, "shift": ["early", "late", True, 1.0][i % 4], "a.b": i % 2}
+            for i in range(300)
+        ]
+        store.add_texts(self.texts, metadatas=metadatas, ids=self.ids)
+        filters = [
+            {"page": 2},
+            {"page": {"$eq": 2}, "source": "line1.txt"},
+            {"$and": [{"source": {"$in": ["line0.txt", "line2.txt"]}}, {"page": {"$in": [1, 3]}}]},
+            {"shift": True},
+            {"shift": 1},
+            {"shift": "1"},
+            {"a.b": 1, "page": {"$gte": 3}},
+            {"$or": [{"page": 0}, {"shift": "late"}], "source": "line2.txt"},
+            {"missing": None},
+        ]
+
+        for where in filters:
+            with self.subTest(where=where):
+                # Act
+                found = store.get(where=where, include=[])["ids"]
+                searched = store.similarity_search_by_vector(self.embeddings.embed_query("valve"), k=300, filter=where)
+
+                # Assert
+                expected = [i for i, metadata in enumerate(metadatas) if matches_filter(metadata, where)]
+                self.assertEqual(found, [self.ids[i] for i in expected])
+                self.assertEqual(sorted(doc.page_content for doc in searched), sorted(self.texts[i] for i in expected))
+
+    def test_equality_filter_skips_decoding_other_rows(self):
+        """Test that equality filters are applied by SQLite before metadata is decoded"""
+        # Arrange
+        store = self._make_store()
+        store.add_texts(self.texts, metadatas=self.metadatas, ids=self.ids)
+
+        # Act
+        with patch("src.models.memmap_store.json.loads", wraps=json.loads) as loads:
+            found = store.get(where={"$and": [{"source": "line1.txt"}, {"source": {"$in": ["line1.txt"]}}]})
+
+        # Assert
+        self.assertEqual(len(found["ids"]), 100)
+        self.assertEqual(loads.call_count, 100)
+
+    def test_search_scans_in_blocks(self):
+        """Test that results are merged correctly across search blocks"""
+        # Arrange
+        store = self._make_store()
+        store.add_texts(self.texts, ids=self.ids)
+        original = memmap_store.SEARCH_BLOCK_ROWS
+        memmap_store.SEARCH_BLOCK_ROWS = 7
+        self.addCleanup(setattr, memmap_store, "SEARCH_BLOCK_ROWS", original)
+
+        # Act
+        results = store.similarity_search(self.texts[250], k=4)
+
+        # Assert
+        self.assertEqual(results[0].page_content, self.texts[250])
+        self.assertEqual(len(results), 4)
+
+
+    def test_ivf_index_is_trained_persisted_and_updated(self):
+        """Test IVF training, reload and assignment of incremental inserts"""
+        # Arrange
+        path = os.path.join(self.tmp_dir, "ivf")
+        store = MemmapVectorStore(self.embeddings, path=path, index="ivf", nlist=8, nprobe=2)
+        store.add_texts(self.texts, ids=self.ids)
+        store.close()
+
+        # Act
+        reopened = MemmapVectorStore(self.embeddings, path=path, index="ivf", nlist=8, nprobe=2)
+        self.addCleanup(reopened.close)
+        reopened.add_texts(["New valve V900."], ids=["chunk-new"])
+
+        # Assert
+        self.assertEqual(reopened._centroids.shape, (8, 32))
+        self.assertTrue((reopened._assignments[reopened._live] > 0).all())
+        self.assertEqual(reopened.similarity_search("New valve V900.", k=1)[0].page_content, "New valve V900.")
+
+    def test_ivf_with_all_clusters_probed_matches_exact_search(self):
+        """Test that nprobe trades recall and reaches exact results at nlist"""
+        # Arrange
+        ivf = MemmapVectorStore(self.embeddings, path=os.path.join(self.tmp_dir, "ivf"), index="ivf", nlist=8)
+        flat = self._make_store()
+        self.addCleanup(ivf.close)
+        for store in (ivf, flat):
+            store.add_texts(self.texts, ids=self.ids)
+        original = memmap_store.SEARCH_BLOCK_ROWS
+        memmap_store.SEARCH_BLOCK_ROWS = 7
+        self.addCleanup(setattr, memmap_store, "SEARCH_BLOCK_ROWS", original)
+
+        # Act
+        approximate = ivf.similarity_search(self.texts[7], k=10, nprobe=1)
+        exhaustive = ivf.similarity_search(self.texts[7], k=10, nprobe=8)
+
+        # Assert
+        self.assertEqual(approximate[0].page_content, self.texts[7])
+        self.assertEqual(exhaustive, flat.similarity_search(self.texts[7], k=10))
+
+if __name__ == "__main__":
+    unittest.main()
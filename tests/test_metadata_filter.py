@@ -0,0 +1,48 @@
+"""
+Unit tests for metadata filters
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.metadata_filter import matches_filter, to_chroma_where
+
+
+class TestMetadataFilter(unittest.TestCase):
+    """Test cases for metadata filter evaluation"""
+
+    def setUp(self):
+        """Create chunk metadata"""
+        self.metadata = {"source": "plc.txt", "h1": "PLC", "page": 3}
+
+    def test_equality_and_operators(self):
+        """Test field equality and comparison operators"""
+        self.assertTrue(matches_filter(self.metadata, {"h1": "PLC"}))
+        self.assertFalse(matches_filter(self.metadata, {"h1": "BAS"}))
+        self.assertTrue(matches_filter(self.metadata, {"page": {"$gte": 2, "$lt": 4}}))
+        self.assertTrue(matches_filter(self.metadata, {"source": {"$in": ["plc.txt", "bas.txt"]}}))
+        self.assertFalse(matches_filter(self.metadata, {"h2": {"$gt": "A"}}))
+
+    def test_logical_operators(self):
+        """Test $and and $or clauses"""
+        self.assertTrue(matches_filter(self.metadata, {"$or": [{"h1": "BAS"}, {"page": 3}]}))
+        self.assertFalse(matches_filter(self.metadata, {"$and": [{"h1": "PLC"}, {"page": 4}]}))
+
+    def test_unsupported_operator_raises(self):
+        """Test that unknown operators are rejected"""
+        with self.assertRaises(ValueError):
+            matches_filter(self.metadata, {"page": {"$near": 3}})
+
+    def test_to_chroma_where_combines_fields(self):
+        """Test that several fields are wrapped in $and"""
+        self.assertEqual(to_chroma_where({"h1": "PLC"}), {"h1": "PLC"})
+        self.assertEqual(to_chroma_where({"h1": "PLC", "page": 3}), {"$and": [{"h1": "PLC"}, {"page": 3}]})
+        self.assertIsNone(to_chroma_where({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
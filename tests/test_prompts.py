@@ -0,0 +1,101 @@
+"""
+Unit tests for prompt assembly and prefix cache statistics
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.prompts import PromptAssembler, PrefixCache, RAG_PROMPT, TOPIC_GUIDANCE
+from src.models.tokenizer import count_tokens
+
+
+class TestPromptAssembler(unittest.TestCase):
+    """Test cases for PromptAssembler class"""
+
+    def setUp(self):
+        """Create an assembler with guidance and one example"""
+        self.examples = [{"question": "What is a PLC?", "answer": "A programmable logic controller."}]
+        self.assembler = PromptAssembler("You are an automation expert.", TOPIC_GUIDANCE, self.examples)
+
+    def test_prefix_is_byte_identical(self):
+        """Test that the prefix does not depend on guidance order or the request"""
+        # Arrange
+        reordered = PromptAssembler(
+            "You are an automation expert.",
+            dict(reversed(list(TOPIC_GUIDANCE.items()))),
+            self.examples
+        )
+
+        # Act
+        first = self.assembler.assemble([{"role": "user", "content": "Modbus timeout?"}])
+        second = reordered.assemble([{"role": "user", "content": "BACnet discovery?"}])
+
+        # Assert
+        self.assertEqual(first[:3], second[:3])
+        self.assertEqual(first[-1]["content"], "Modbus timeout?")
+        self.assertEqual([msg["role"] for msg in first], ["system", "user", "assistant", "user"])
+
+    def test_repeated_prefix_counts_as_hit(self):
+        """Test that the second request hits the cached static prefix"""
+        # Act
+        self.assembler.assemble([{"role": "user", "content": "Modbus timeout?"}])
+        self.assembler.assemble([{"role": "user", "content": "BACnet discovery?"}])
+
+        # Assert
+        stats = self.assembler.cache.stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["prefix_hits"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertGreater(stats["token_hit_ratio"], 0.25)
+
+
+class TestPrefixCache(unittest.TestCase):
+    """Test cases for PrefixCache class"""
+
+    def test_growing_conversation_reuses_longest_prefix(self):
+        """Test that earlier turns of a conversation are counted as cached"""
+        # Arrange
+        cache = PrefixCache()
+        turn = [{"role": "system", "content": "Be precise."}, {"role": "user", "content": "Pump P-101 trips."}]
+        cache.record(turn)
+
+        # Act
+        cached = cache.record(turn + [
+            {"role": "assistant", "content": "Check the motor overload relay."},
+            {"role": "user", "content": "Relay is fine."}
+        ])
+
+        # Assert
+        self.assertEqual(cached, sum(count_tokens(msg["content"]) for msg in turn))
+        self.assertEqual(cache.stats()["prefix_hits"], 1)
+
+    def test_short_prefix_below_minimum_is_not_a_hit(self):
+        """Test that prefixes shorter than min_tokens are not counted"""
+        # Arrange
+        cache = PrefixCache(min_tokens=1024)
+        messages = [{"role": "system", "content": "Be precise."}]
+
+        # Act
+        cache.record(messages)
+
+        # Assert
+        self.assertEqual(cache.record(messages), 0)
+        self.assertEqual(cache.stats()["prefix_hits"], 0)
+
+    def test_rag_prompt_puts_context_after_static_system_message(self):
+        """Test that retrieved context is not part of the system message"""
+        # Act
+        first = RAG_PROMPT.format_messages(context="Modbus RTU manual", question="Baud rate?")
+        second = RAG_PROMPT.format_messages(context="BACnet guide", question="Device ID?")
+
+        # Assert
+        self.assertEqual(first[0].content, second[0].content)
+        self.assertIn("Modbus RTU manual", first[1].content)
+
+
+if __name__ == '__main__':
+    unittest.main()
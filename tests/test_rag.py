@@ -0,0 +1,672 @@
+"""
+Unit tests for the RAG implementation
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import asyncio
+import sys
+import shutil
+import tempfile
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.chat_models.fake import FakeListChatModel
+from langchain.embeddings.fake import DeterministicFakeEmbedding
+
+from src.models.client_registry import DEFAULT_REGISTRY
+from src.models.rag import IndustrialRAG
+
+
+class CountingFakeEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic fake embeddings that count embedded texts"""
+
+    embedded_texts: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded_texts += len(texts)
+        return super().embed_documents(texts)
+
+
+class TestIndustrialRAG(unittest.TestCase):
+    """Test cases for IndustrialRAG class"""
+
+    def setUp(self):
+        """Set up a temporary corpus and index directory"""
+        os.environ["OPENAI_API_KEY"] = "sk-test-key"
+        DEFAULT_REGISTRY.clear()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.docs_dir = os.path.join(self.tmp_dir, "docs")
+        self.index_dir = os.path.join(self.tmp_dir, "index")
+        os.makedirs(self.docs_dir)
+        self._write("plc.txt", "# PLC\n\nLadder logic and structured text for PLC programming.")
+        self._write("bas.txt", "# BAS\n\nBACnet and KNX protocols in building automation.")
+
+        self.embeddings = CountingFakeEmbeddings(size=16)
+        patcher = patch("src.models.embeddings.OpenAIEmbeddings", return_value=self.embeddings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.docs_dir, name), "w") as f:
+            f.write(content)
+
+    def _make_rag(self):
+        return IndustrialRAG(docs_dir=self.docs_dir, persist_directory=self.index_dir)
+
+    def test_load_documents_reuses_persisted_index(self):
+        """Test that a restart does not re-embed unchanged files"""
+        # Arrange
+        self._make_rag().load_documents()
+        embedded = self.embeddings.embedded_texts
+
+        # Act
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Assert
+        self.assertGreater(embedded, 0)
+        self.assertEqual(self.embeddings.embedded_texts, embedded)
+        self.assertEqual(rag.vectorstore._collection.count(), 2)
+
+    def test_load_documents_updates_changed_and_removed_files(self):
+        """Test that only changed files are re-embedded and removed ones deleted"""
+        # Arrange
+        self._make_rag().load_documents()
+        self._write("plc.txt", "# PLC\n\nFunction block diagrams for PID control.")
+        os.remove(os.path.join(self.docs_dir, "bas.txt"))
+        embedded = self.embeddings.embedded_texts
+
+        # Act
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Assert
+        self.assertEqual(self.embeddings.embedded_texts, embedded + 1)
+        stored = rag.vectorstore.get()
+        self.assertEqual(len(stored["ids"]), 1)
+        self.assertIn("PID control", stored["documents"][0])
+
+    def test_chunking_change_rebuilds_index(self):
+        """Test that changing the chunk size rebuilds the index from the embedding cache"""
+        # Arrange
+        self._make_rag().load_documents()
+        embedded = self.embeddings.embedded_texts
+
+        # Act
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            chunk_size=500
+        )
+        rag.load_documents()
+
+        # Assert
+        self.assertEqual(self.embeddings.embedded_texts, embedded)
+        self.assertEqual(rag.vectorstore._collection.count(), 2)
+        self.assertEqual(rag.embedding_cache_stats()["disk_hits"], 2)
+
+    def test_duplicate_chunks_are_embedded_once(self):
+        """Test that identical chunk text is only sent to the backend once"""
+        # Arrange
+        self._write("copy.txt", "# PLC\n\nLadder logic and structured text for PLC programming.")
+        rag = self._make_rag()
+
+        # Act
+        rag.load_documents()
+        rag.load_documents()
+
+        # Assert
+        self.assertEqual(self.embeddings.embedded_texts, 2)
+        self.assertEqual(rag.vectorstore._collection.count(), 3)
+        stats = rag.embedding_cache_stats()
+        self.assertEqual(stats["misses"], 2)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_query_reuses_cached_chain(self, mock_chat_openai):
+        """Test that repeated queries reuse the chain and chat model"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["Use ladder logic."])
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Act
+        first = rag.query("How do I program a PLC?")
+        second = rag.query("What is BACnet?")
+
+        # Assert
+        self.assertEqual(first["answer"], "Use ladder logic.")
+        self.assertEqual(len(first["sources"]), 2)
+        self.assertEqual(second["answer"], "Use ladder logic.")
+        mock_chat_openai.assert_called_once()
+        kwargs = mock_chat_openai.call_args.kwargs
+        self.assertEqual(kwargs["model_name"], "gpt-3.5-turbo")
+        self.assertIsNotNone(kwargs["client"])
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_query_reports_static_prompt_prefix_hits(self, mock_chat_openai):
+        """Test that different questions share the cached system prompt prefix"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["ok"])
+        rag = IndustrialRAG(docs_dir=self.docs_dir, persist_directory=self.index_dir, response_cache_size=0)
+        rag.load_documents()
+
+        # Act
+        first = rag.query("How do I program a PLC?")
+        second = rag.query("What is BACnet?")
+
+        # Assert
+        self.assertEqual(first["stats"]["prefix_cached_tokens"], 0)
+        self.assertGreater(second["stats"]["prefix_cached_tokens"], 0)
+        self.assertEqual(rag.prefix_cache_stats()["prefix_hits"], 1)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_query_chain_cache_evicts_least_recently_used(self, mock_chat_openai):
+        """Test that the chain cache is bounded"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["ok"])
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            chain_cache_size=1,
+            response_cache_size=0
+        )
+        rag.load_documents()
+
+        # Act
+        rag.query("PLC?", temperature=0.2)
+        rag.query("PLC?", temperature=0.5)
+        rag.query("PLC?", temperature=0.2)
+
+        # Assert: the evicted chain is rebuilt around the registry's chat model
+        self.assertEqual(mock_chat_openai.call_count, 2)
+        self.assertEqual(list(rag._chains), [("gpt-3.5-turbo", 0.2, 4)])
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_abatch_query_returns_results_in_order(self, mock_chat_openai):
+        """Test answering several questions concurrently"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["a", "b", "c"])
+        rag = self._make_rag()
+        rag.load_documents()
+        questions = ["PLC?", "BACnet?", "KNX?"]
+
+        # Act
+        results = asyncio.run(rag.abatch_query(questions, max_concurrency=2))
+
+        # Assert
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sorted(result["answer"] for result in results), ["a", "b", "c"])
+        for result in results:
+            self.assertTrue(result["sources"])
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_stream_query_emits_sources_then_tokens(self, mock_chat_openai):
+        """Test that streaming yields source metadata before the answer"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["PLC"])
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Act
+        events = list(rag.stream_query("How do I program a PLC?"))
+
+        # Assert
+        self.assertEqual(events[0]["type"], "sources")
+        self.assertEqual(len(events[0]["sources"]), 2)
+        self.assertEqual("".join(event["content"] for event in events[1:]), "PLC")
+        self.assertTrue(all(event["type"] == "token" for event in events[1:]))
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_astream_query_emits_sources_then_tokens(self, mock_chat_openai):
+        """Test the async streaming variant"""
+        # Arrange
+        mock_chat_openai.side_effect = lambda **kwargs: FakeListChatModel(responses=["KNX"])
+        rag = self._make_rag()
+        rag.load_documents()
+
+        async def collect():
+            return [event async for event in rag.astream_query("What is KNX?")]
+
+        # Act
+        events = asyncio.run(collect())
+
+        # Assert
+        self.assertEqual(events[0]["type"], "sources")
+        self.assertEqual("".join(event["content"] for event in events[1:]), "KNX")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_repeated_question_is_answered_from_response_cache(self, mock_chat_openai):
+        """Test that a cache hit skips retrieval and generation"""
+        # Arrange
+        llm = FakeListChatModel(responses=["first", "second"])
+        mock_chat_openai.return_value = llm
+        rag = self._make_rag()
+        rag.load_documents()
+        first = rag.query("How do I program a PLC?")
+
+        # Act
+        with patch.object(rag, "_get_chain") as mock_get_chain:
+            second = rag.query("how do I program a PLC")
+
+        # Assert
+        mock_get_chain.assert_not_called()
+        self.assertEqual(second["answer"], first["answer"])
+        self.assertEqual(second["sources"], first["sources"])
+        self.assertTrue(second["stats"]["cache_hit"])
+        self.assertEqual(rag.response_cache.stats()["exact_hits"], 1)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_add_document_invalidates_response_cache(self, mock_chat_openai):
+        """Test that changing the corpus drops cached answers"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["first", "second"])
+        rag = self._make_rag()
+        rag.load_documents()
+        rag.query("How do I program a PLC?")
+        self._write("scada.txt", "# SCADA\n\nHistorian and alarm management.")
+
+        # Act
+        rag.add_document(os.path.join(self.docs_dir, "scada.txt"))
+        result = rag.query("How do I program a PLC?")
+
+        # Assert
+        self.assertEqual(result["answer"], "second")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_answer_computed_during_corpus_change_is_not_cached(self, mock_chat_openai):
+        """Test that an answer started before add_document is not stored after it"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["stale", "fresh"] * 2)
+        rag = self._make_rag()
+        rag.load_documents()
+        self._write("scada.txt", "# SCADA\n\nHistorian and alarm management.")
+
+        def add_scada(messages):
+            rag.add_document(os.path.join(self.docs_dir, "scada.txt"))
+            return 0
+
+        runs = {
+            "query": lambda question: rag.query(question)["answer"],
+            "stream_query": lambda question: "".join(
+                event["content"] for event in rag.stream_query(question) if event["type"] == "token"
+            ),
+        }
+        for name, run in runs.items():
+            with self.subTest(method=name):
+                # Act
+                with patch.object(rag, "_record_prefix", side_effect=add_scada):
+                    first = run(f"How is {name} answered?")
+                second = run(f"How is {name} answered?")
+
+                # Assert
+                self.assertEqual(first, "stale")
+                self.assertEqual(second, "fresh")
+
+    def test_re_adding_document_does_not_duplicate_chunks(self):
+        """Test that adding the same file twice keeps one copy of its chunks"""
+        # Arrange
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            chunk_size=60,
+            chunk_overlap=0
+        )
+        file_path = os.path.join(self.docs_dir, "plc.txt")
+        self._write("plc.txt", "Ladder logic rungs.\n\nStructured text blocks.\n\nFunction block diagrams.")
+        self.assertTrue(rag.add_document(file_path))
+        count = rag.vectorstore._collection.count()
+        embedded = self.embeddings.embedded_texts
+
+        # Act
+        self.assertTrue(rag.add_document(file_path))
+
+        # Assert
+        self.assertEqual(rag.vectorstore._collection.count(), count)
+        self.assertEqual(self.embeddings.embedded_texts, embedded)
+
+    def test_relative_paths_identify_the_same_file(self):
+        """Test that relative spellings of a loaded file do not duplicate its chunks"""
+        # Arrange
+        rag = self._make_rag()
+        rag.load_documents()
+        relative = os.path.relpath(os.path.join(self.docs_dir, "plc.txt"))
+
+        # Act
+        results = rag.add_documents([relative, os.path.join(".", relative)])
+
+        # Assert
+        self.assertEqual(results, {relative: True, os.path.join(".", relative): True})
+        self.assertEqual(rag.vectorstore._collection.count(), 2)
+        self.assertTrue(all(os.path.isabs(source) for source in rag.manifest.sources()))
+
+    def test_removed_file_check_uses_path_components(self):
+        """Test that files of a sibling directory sharing the name prefix are kept"""
+        # Arrange
+        sibling_dir = self.docs_dir + "_extra"
+        os.makedirs(sibling_dir)
+        sibling = os.path.join(sibling_dir, "hmi.txt")
+        with open(sibling, "w") as f:
+            f.write("# HMI\n\nOperator screens and alarm banners.")
+        rag = self._make_rag()
+        rag.load_documents()
+        rag.add_document(sibling)
+
+        # Act
+        report = rag.load_documents()
+
+        # Assert
+        self.assertEqual(report.removed, [])
+        self.assertIn(sibling, rag.manifest.sources())
+
+    def test_re_adding_changed_document_replaces_only_changed_chunks(self):
+        """Test that only the changed chunk of a file is written"""
+        # Arrange
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            chunk_size=30,
+            chunk_overlap=0
+        )
+        file_path = os.path.join(self.docs_dir, "plc.txt")
+        self._write("plc.txt", "Ladder logic rungs.\n\nStructured text blocks.")
+        rag.add_document(file_path)
+        before = set(rag.vectorstore.get()["ids"])
+
+        # Act
+        self._write("plc.txt", "Ladder logic rungs.\n\nSequential function charts.")
+        rag.add_document(file_path)
+
+        # Assert
+        stored = rag.vectorstore.get()
+        self.assertEqual(len(stored["ids"]), 2)
+        self.assertEqual(len(before.intersection(stored["ids"])), 1)
+        self.assertNotIn("Structured text blocks.", stored["documents"])
+
+    def test_edit_moves_start_index_of_later_chunks(self):
+        """Test that chunks shifted by an earlier edit are stored with their new offsets"""
+        # Arrange
+        sections = ["## Pumps\n\nPump P-101 feeds tank T-1."] + [
+            f"## Section {i}\n\n" + " ".join(f"Rung {i}.{j} drives coil Q{j}." for j in range(8)) for i in range(2)
+        ]
+        self._write("plc.txt", "\n\n".join(sections))
+        options = dict(docs_dir=self.docs_dir, persist_directory=self.index_dir, chunk_size=200, chunk_overlap=50)
+        IndustrialRAG(**options).load_documents()
+        sections[0] += " Valve V-7 isolates it."
+        text = "\n\n".join(sections)
+        self._write("plc.txt", text)
+
+        # Act
+        rag = IndustrialRAG(**options)
+        rag.load_documents()
+
+        # Assert
+        stored = rag.vectorstore.get(where={"source": os.path.join(self.docs_dir, "plc.txt")})
+        self.assertGreater(len(stored["ids"]), 3)
+        for content, metadata in zip(stored["documents"], stored["metadatas"]):
+            start = metadata["start_index"]
+            self.assertEqual(text[start:start + len(content)], content)
+
+    def test_add_documents_bulk(self):
+        """Test adding several files in one call"""
+        # Arrange
+        rag = self._make_rag()
+        paths = [
+            os.path.join(self.docs_dir, "plc.txt"),
+            os.path.join(self.docs_dir, "bas.txt"),
+            os.path.join(self.docs_dir, "missing.txt")
+        ]
+
+        # Act
+        results = rag.add_documents(paths)
+
+        # Assert
+        self.assertEqual(results, {paths[0]: True, paths[1]: True, paths[2]: False})
+        self.assertEqual(rag.vectorstore._collection.count(), 2)
+        self.assertEqual(rag.last_ingestion_stats.batches, 1)
+
+    def test_parallel_loading_reports_failed_files(self):
+        """Test process pool loading with a structured failure report"""
+        # Arrange
+        self._write("scada.txt", "# SCADA\n\nHistorian and alarm management.")
+        self._write("broken.pdf", "this is not a PDF")
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            load_workers=2
+        )
+
+        # Act
+        report = rag.load_documents()
+
+        # Assert
+        self.assertEqual(len(report.indexed), 3)
+        self.assertEqual(len(report.failures), 1)
+        self.assertTrue(report.failures[0].path.endswith("broken.pdf"))
+        self.assertEqual(report.failures[0].stage, "load")
+        self.assertEqual(rag.vectorstore._collection.count(), 3)
+
+    def test_hybrid_retrieval_finds_exact_terms(self):
+        """Test that BM25 brings exact technical terms into the results"""
+        # Arrange
+        self._write("fieldbus.txt", "Modbus RTU uses RS-485 wiring.")
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Act
+        docs = rag._get_retriever(k=1).get_relevant_documents("Modbus RTU wiring")
+
+        # Assert
+        self.assertEqual(len(rag.bm25), 3)
+        self.assertIn("Modbus RTU", docs[0].page_content)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_rerank_reports_stage_statistics(self, mock_chat_openai):
+        """Test that reranking keeps k chunks and reports per-stage timings"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["Use RS-485."])
+        self._write("fieldbus.txt", "Modbus RTU uses RS-485 wiring.")
+        rag = IndustrialRAG(docs_dir=self.docs_dir, persist_directory=self.index_dir, rerank=True)
+        rag.load_documents()
+
+        # Act
+        result = rag.query("Modbus RTU wiring", k=1)
+
+        # Assert
+        self.assertEqual(result["answer"], "Use RS-485.")
+        self.assertEqual(result["sources"], [os.path.join(self.docs_dir, "fieldbus.txt")])
+        self.assertEqual(result["stats"]["candidates"], 3)
+        self.assertEqual(result["stats"]["chunks"], 1)
+        for key in ("retrieval_ms", "rerank_ms", "generation_ms"):
+            self.assertIn(key, result["stats"])
+
+    def test_token_chunking_changes_invalidate_index(self):
+        """Test that switching to token chunking rebuilds the index"""
+        # Arrange
+        self._make_rag().load_documents()
+
+        # Act
+        rag = IndustrialRAG(
+            docs_dir=self.docs_dir,
+            persist_directory=self.index_dir,
+            chunking="tokens",
+            chunk_size=64,
+            chunk_overlap=8
+        )
+        report = rag.load_documents()
+
+        # Assert
+        self.assertEqual(len(report.indexed), 2)
+        self.assertEqual(rag.vectorstore._collection.count(), 2)
+
+    def test_retriever_prefilters_on_heading_metadata(self):
+        """Test that a heading filter restricts both vector and lexical search"""
+        # Arrange
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Act
+        docs = rag._get_retriever(k=4, metadata_filter={"h1": "BAS"}).get_relevant_documents("PLC ladder logic")
+        plain = rag._get_retriever(k=4).get_relevant_documents("PLC ladder logic")
+
+        # Assert
+        self.assertEqual(len(plain), 2)
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0].metadata["heading_path"], "BAS")
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_query_filters_on_loaded_file_metadata(self, mock_chat_openai):
+        """Test that loading records file metadata and query searches only the filtered partition"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["all", "scada"])
+        os.makedirs(os.path.join(self.docs_dir, "scada"))
+        self._write(os.path.join("scada", "hmi.txt"), "# HMI\n\nAlarm screens for PLC operators.")
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Act
+        unfiltered = rag.query("PLC alarms")
+        filtered = rag.query("PLC alarms", metadata_filter={"topic": "scada", "file_type": "txt"})
+
+        # Assert
+        hmi_path = os.path.join(self.docs_dir, "scada", "hmi.txt")
+        metadata = rag.vectorstore.get(where={"source": hmi_path})["metadatas"][0]
+        self.assertEqual(metadata["topic"], "scada")
+        self.assertEqual(metadata["file_type"], "txt")
+        self.assertEqual(metadata["modified"], int(os.path.getmtime(hmi_path)))
+        self.assertEqual(len(unfiltered["sources"]), 3)
+        self.assertEqual(filtered["answer"], "scada")
+        self.assertEqual(filtered["sources"], [hmi_path])
+
+    def test_edit_refreshes_file_metadata_of_unchanged_chunks(self):
+        """Test that a modified-time filter finds every chunk of a recently edited file"""
+        sections = [f"## Step {i}\n\nOpen valve V-{i} and check flow." for i in range(3)]
+        path = os.path.join(self.docs_dir, "plc.txt")
+        for backend in ("chroma", "memmap"):
+            with self.subTest(backend=backend):
+                # Arrange
+                self._write("plc.txt", "\n\n".join(sections))
+                os.utime(path, (1_000_000_000, 1_000_000_000))
+                options = dict(
+                    docs_dir=self.docs_dir,
+                    persist_directory=os.path.join(self.index_dir, backend),
+                    vector_backend=backend,
+                    hybrid_search=True,
+                    chunk_size=100,
+                    chunk_overlap=0
+                )
+                IndustrialRAG(**options).load_documents()
+                self._write("plc.txt", "\n\n".join(sections[:2] + ["## Step 2\n\nClose valve V-2."]))
+                edited = int(os.path.getmtime(path))
+
+                # Act
+                rag = IndustrialRAG(**options)
+                rag.load_documents()
+
+                # Assert
+                recent = {"source": path, "modified": {"$gte": edited}}
+                stored = rag.vectorstore.get(where={"$and": [{"source": path}, {"modified": {"$gte": edited}}]})
+                self.assertEqual(len(stored["ids"]), 3)
+                retrieved = rag._get_retriever(k=10, metadata_filter=recent).get_relevant_documents("valve")
+                self.assertEqual(len(retrieved), 3)
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_memmap_backend_answers_after_restart(self, mock_chat_openai):
+        """Test indexing and querying with the memory-mapped int8 vector store"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["answer"])
+        options = dict(docs_dir=self.docs_dir, persist_directory=self.index_dir, vector_backend="memmap", vector_dtype="int8")
+        IndustrialRAG(**options).load_documents()
+        embedded = self.embeddings.embedded_texts
+
+        # Act
+        rag = IndustrialRAG(**options)
+        rag.load_documents()
+        result = rag.query("BACnet protocols", metadata_filter={"h1": "BAS"})
+
+        # Assert
+        self.assertEqual(self.embeddings.embedded_texts, embedded)
+        self.assertEqual(rag.vectorstore.count(), 2)
+        self.assertFalse(rag.hybrid_search)
+        self.assertEqual(len(rag.bm25), 0)
+        self.assertEqual(result["sources"], [os.path.join(self.docs_dir, "bas.txt")])
+
+    @patch("src.models.rag.LEXICAL_LOAD_BATCH", 1)
+    def test_memmap_hybrid_search_fetches_texts_from_store(self):
+        """Test that BM25 is rebuilt page by page and its hits are read from the store"""
+        # Arrange
+        self._write("fieldbus.txt", "Modbus RTU uses RS-485 wiring.")
+        options = dict(docs_dir=self.docs_dir, persist_directory=self.index_dir, vector_backend="memmap", hybrid_search=True)
+        IndustrialRAG(**options).load_documents()
+
+        # Act
+        rag = IndustrialRAG(**options)
+        rag.load_documents()
+        retriever = rag._get_retriever(k=3, metadata_filter={"source": os.path.join(self.docs_dir, "fieldbus.txt")})
+        lexical = retriever._lexical("Modbus RTU wiring")
+
+        # Assert
+        self.assertEqual(len(rag.bm25), 3)
+        self.assertEqual([doc.page_content for doc in lexical], ["Modbus RTU uses RS-485 wiring."])
+        self.assertEqual(lexical[0].metadata["file_type"], "txt")
+
+    def test_query_without_api_key_raises_clear_error(self):
+        """Test that an index built without an OpenAI key cannot generate answers"""
+        # Arrange
+        with patch.dict(os.environ):
+            del os.environ["OPENAI_API_KEY"]
+            rag = IndustrialRAG(docs_dir=self.docs_dir, embedding_backend="hashing")
+        rag.load_documents()
+
+        # Act & Assert
+        with self.assertRaisesRegex(ValueError, "API key is required"):
+            rag.query("BACnet protocols")
+
+    def test_index_is_rebuilt_when_embedding_backend_changes(self):
+        """Test that a persisted index built with another embedding dimension is recreated"""
+        for backend in ("chroma", "memmap"):
+            with self.subTest(backend=backend):
+                # Arrange
+                options = dict(
+                    docs_dir=self.docs_dir,
+                    persist_directory=os.path.join(self.index_dir, backend),
+                    vector_backend=backend
+                )
+                IndustrialRAG(**options).load_documents()
+
+                # Act
+                rag = IndustrialRAG(embedding_backend="hashing", embedding_model="hashing-64", **options)
+                report = rag.load_documents()
+                restarted = IndustrialRAG(embedding_backend="hashing", embedding_model="hashing-64", **options)
+                restarted.load_documents()
+                docs = restarted.vectorstore.similarity_search("BACnet protocols", k=1)
+
+                # Assert
+                self.assertEqual(len(report.indexed), 2)
+                self.assertEqual(report.failures, [])
+                self.assertEqual(len(restarted.vectorstore.get(include=[])["ids"]), 2)
+                self.assertIn("BACnet", docs[0].page_content)
+
+    def test_lexical_index_is_rebuilt_from_persisted_collection(self):
+        """Test that BM25 stays in sync with the collection across restarts"""
+        # Arrange
+        self._make_rag().load_documents()
+        os.remove(os.path.join(self.docs_dir, "bas.txt"))
+
+        # Act
+        rag = self._make_rag()
+        rag.load_documents()
+
+        # Assert
+        self.assertEqual(len(rag.bm25), 1)
+        self.assertEqual(rag.bm25.search("BACnet"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
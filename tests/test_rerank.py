@@ -0,0 +1,74 @@
+"""
+Unit tests for the reranking stage
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+
+from src.models.context import ContextPacker
+from src.models.rerank import Reranker, LexicalOverlapScorer
+
+
+class TestReranker(unittest.TestCase):
+    """Test cases for Reranker class"""
+
+    def setUp(self):
+        """Create candidates in retrieval order"""
+        self.docs = [
+            Document(page_content="BACnet is the standard protocol for building automation."),
+            Document(page_content="KNX is used in home and building automation."),
+            Document(page_content="Modbus RTU runs over RS-485 serial lines."),
+        ]
+
+    def test_rerank_moves_best_match_first(self):
+        """Test that candidates are reordered by query relevance"""
+        # Act
+        docs, stats = Reranker().rerank("Modbus RS-485 wiring", self.docs, k=2)
+
+        # Assert
+        self.assertEqual(docs[0], self.docs[2])
+        self.assertEqual(len(docs), 2)
+        self.assertGreater(stats["context_tokens"], 0)
+
+    def test_token_budget_limits_selected_context(self):
+        """Test that chunks beyond the token budget are dropped"""
+        # Act
+        docs, stats = Reranker(token_budget=15).rerank("building automation", self.docs, k=3)
+
+        # Assert
+        self.assertEqual(len(docs), 1)
+        self.assertLessEqual(stats["context_tokens"], 15)
+
+    def test_context_tokens_match_context_packer(self):
+        """Test that reranking and packing count the same tokens for a model"""
+        # Arrange
+        docs = [Document(page_content=doc.page_content, metadata={"source": str(i)}) for i, doc in enumerate(self.docs)]
+
+        # Act
+        _, rerank_stats = Reranker().rerank("building automation", docs, k=3, model="gpt-4")
+        _, packing_stats = ContextPacker(10000, "gpt-4").pack(docs)
+
+        # Assert
+        self.assertEqual(rerank_stats["context_tokens"], packing_stats["context_tokens"])
+
+    def test_lexical_scorer_scores_every_candidate(self):
+        """Test that a typical candidate set is scored in order, best match highest"""
+        # Arrange
+        texts = [doc.page_content * 20 for doc in self.docs] * 17
+
+        # Act
+        scores = LexicalOverlapScorer().score("Modbus RTU serial wiring", texts)
+
+        # Assert
+        self.assertEqual(len(scores), len(texts))
+        self.assertEqual(max(range(len(texts)), key=scores.__getitem__), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Unit tests for the semantic response cache
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema.embeddings import Embeddings
+
+from src.models.response_cache import SemanticResponseCache, normalize_question
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeds texts as counts of a few domain keywords"""
+
+    keywords = ["pid", "plc", "bacnet", "scada"]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = normalize_question(text).split()
+        return [float(words.count(keyword)) for keyword in self.keywords] + [0.1]
+
+
+class TestSemanticResponseCache(unittest.TestCase):
+    """Test cases for SemanticResponseCache class"""
+
+    def setUp(self):
+        """Create a cache with keyword embeddings"""
+        self.cache = SemanticResponseCache(KeywordEmbeddings(), similarity_threshold=0.9)
+        self.response = {"answer": "Use a PID block", "sources": ["plc.txt"]}
+
+    def test_exact_hit_ignores_case_and_punctuation(self):
+        """Test the normalized exact-match stage"""
+        # Arrange
+        self.cache.store("PID loop in PLC?", self.response)
+
+        # Act
+        cached = self.cache.lookup("pid loop in plc")
+
+        # Assert
+        self.assertEqual(cached, self.response)
+        self.assertEqual(self.cache.stats()["exact_hits"], 1)
+
+    def test_semantic_hit_for_reworded_question(self):
+        """Test the embedding similarity stage"""
+        # Arrange
+        self.cache.store("PID loop in PLC", self.response)
+
+        # Act
+        cached = self.cache.lookup("implement PID control on a PLC")
+        missed = self.cache.lookup("BACnet or SCADA?")
+
+        # Assert
+        self.assertEqual(cached, self.response)
+        self.assertIsNone(missed)
+        self.assertEqual(self.cache.stats()["semantic_hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_namespaces_are_separate(self):
+        """Test that responses for other query parameters are not reused"""
+        # Arrange
+        self.cache.store("PID loop in PLC", self.response, namespace="gpt-4")
+
+        # Act & Assert
+        self.assertIsNone(self.cache.lookup("PID loop in PLC", namespace="gpt-3.5-turbo"))
+
+    def test_entries_expire(self):
+        """Test TTL expiry"""
+        # Arrange
+        cache = SemanticResponseCache(KeywordEmbeddings(), ttl_seconds=10)
+        with patch("src.models.response_cache.time.time", return_value=1000.0):
+            cache.store("PID loop in PLC", self.response)
+
+        # Act
+        with patch("src.models.response_cache.time.time", return_value=1011.0):
+            cached = cache.lookup("PID loop in PLC")
+
+        # Assert
+        self.assertIsNone(cached)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_response_from_before_clear_is_not_stored(self):
+        """Test that a store with an outdated generation is dropped"""
+        # Arrange
+        generation = self.cache.generation
+        self.cache.clear()
+
+        # Act
+        self.cache.store("PID loop in PLC?", self.response, generation=generation)
+        self.cache.store("BACnet objects?", self.response, generation=self.cache.generation)
+
+        # Assert
+        self.assertIsNone(self.cache.lookup("PID loop in PLC?"))
+        self.assertEqual(self.cache.lookup("BACnet objects?"), self.response)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        # Arrange
+        cache = SemanticResponseCache(max_entries=2)
+        cache.store("a", {"answer": "a"})
+        cache.store("b", {"answer": "b"})
+        cache.lookup("a")
+
+        # Act
+        cache.store("c", {"answer": "c"})
+
+        # Assert
+        self.assertIsNotNone(cache.lookup("a"))
+        self.assertIsNone(cache.lookup("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
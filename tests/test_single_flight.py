@@ -0,0 +1,236 @@
+"""
+Unit tests for request coalescing
+"""
+
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.single_flight import SingleFlight, request_key
+
+
+class TestRequestKey(unittest.TestCase):
+    """Test cases for request_key"""
+
+    def test_whitespace_is_normalized_but_parameters_are_not(self):
+        """Test which differences produce different keys"""
+        # Arrange
+        messages = [{"role": "user", "content": "Alarm  on line 3 "}]
+        same = [{"role": "user", "content": "Alarm on line 3"}]
+
+        # Assert
+        self.assertEqual(request_key(messages, model="gpt-4"), request_key(same, model="gpt-4"))
+        self.assertNotEqual(request_key(messages, model="gpt-4"), request_key(messages, model="gpt-3.5-turbo"))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight class"""
+
+    def setUp(self):
+        """Create a single-flight group"""
+        self.flight = SingleFlight()
+        self.upstream_calls = 0
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out")
+            time.sleep(0.001)
+
+    def test_concurrent_calls_share_one_upstream_call(self):
+        """Test that identical in-flight calls wait for the first one"""
+        # Arrange
+        release = threading.Event()
+
+        def upstream():
+            self.upstream_calls += 1
+            release.wait(5)
+            return "Reset the breaker"
+
+        # Act
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(self.flight.do, "alarm", upstream) for _ in range(5)]
+            self._wait_for(lambda: self.flight.stats()["calls"] == 5)
+            release.set()
+            results = [future.result() for future in futures]
+
+        # Assert
+        self.assertEqual(results, ["Reset the breaker"] * 5)
+        self.assertEqual(self.upstream_calls, 1)
+        self.assertEqual(self.flight.stats()["coalesced"], 4)
+
+    def test_errors_reach_every_waiter_and_release_the_key(self):
+        """Test that a failed call is not remembered"""
+        # Arrange
+        def failing():
+            raise RuntimeError("upstream error")
+
+        # Act & Assert
+        with self.assertRaises(RuntimeError):
+            self.flight.do("alarm", failing)
+        self.assertEqual(self.flight.do("alarm", lambda: "ok"), "ok")
+
+    def test_async_calls_share_one_upstream_call(self):
+        """Test coalescing of concurrent coroutine calls"""
+        # Arrange
+        async def upstream():
+            self.upstream_calls += 1
+            await asyncio.sleep(0.01)
+            return "Reset the breaker"
+
+        async def run():
+            return await asyncio.gather(*(self.flight.ado("alarm", upstream) for _ in range(5)))
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(results, ["Reset the breaker"] * 5)
+        self.assertEqual(self.upstream_calls, 1)
+
+    def test_stream_subscriber_joins_mid_stream(self):
+        """Test that a late subscriber replays earlier chunks and follows live"""
+        # Arrange
+        release = threading.Event()
+
+        def upstream():
+            self.upstream_calls += 1
+            yield "Check "
+            yield "the "
+            release.wait(5)
+            yield "fuse."
+
+        # Act
+        first = self.flight.stream("alarm", upstream)
+        head = [next(first), next(first)]
+        second = []
+        thread = threading.Thread(target=lambda: second.extend(self.flight.stream("alarm", upstream)))
+        thread.start()
+        self._wait_for(lambda: self.flight.stats()["coalesced"] == 1)
+        release.set()
+        tail = list(first)
+        thread.join(5)
+
+        # Assert
+        self.assertEqual("".join(head + tail), "Check the fuse.")
+        self.assertEqual("".join(second), "Check the fuse.")
+        self.assertEqual(self.upstream_calls, 1)
+
+    def test_async_stream_is_shared_and_cancelled_when_abandoned(self):
+        """Test async stream sharing and cancellation without subscribers"""
+        # Arrange
+        closed = []
+
+        async def upstream():
+            self.upstream_calls += 1
+            try:
+                for token in ["Check ", "the ", "fuse."]:
+                    await asyncio.sleep(0.01)
+                    yield token
+                await asyncio.sleep(10)
+                yield "never sent"
+            finally:
+                closed.append(True)
+
+        async def collect(limit):
+            tokens = []
+            stream = self.flight.astream("alarm", upstream)
+            async for token in stream:
+                tokens.append(token)
+                if len(tokens) == limit:
+                    break
+            await stream.aclose()
+            return tokens
+
+        async def run():
+            results = await asyncio.gather(collect(3), collect(3))
+            await asyncio.sleep(0.01)
+            return results
+
+        # Act
+        first, second = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(first, ["Check ", "the ", "fuse."])
+        self.assertEqual(second, first)
+        self.assertEqual(self.upstream_calls, 1)
+        self.assertEqual(closed, [True])
+
+
+    def test_async_stream_joined_after_abandonment_starts_over(self):
+        """Test that a subscriber arriving as the last one leaves gets a complete stream"""
+        # Arrange
+        async def upstream():
+            self.upstream_calls += 1
+            for token in ["The ", "pump ", "tripped."]:
+                yield token
+                await asyncio.sleep(0.01)
+
+        async def run():
+            first = self.flight.astream("alarm", upstream)
+            head = await first.__anext__()
+            await first.aclose()
+            second = [token async for token in self.flight.astream("alarm", upstream)]
+            return head, second
+
+        # Act
+        head, second = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(head, "The ")
+        self.assertEqual(second, ["The ", "pump ", "tripped."])
+        self.assertEqual(self.upstream_calls, 2)
+
+    def test_stream_joined_after_abandonment_starts_over(self):
+        """Test that an abandoned producer neither serves nor releases a new stream"""
+        # Arrange
+        release = threading.Event()
+        finish = threading.Event()
+        closed = []
+
+        def upstream():
+            self.upstream_calls += 1
+            first_call = self.upstream_calls == 1
+            try:
+                yield "Check "
+                release.wait(5) if first_call else finish.wait(5)
+                yield "the "
+                yield "fuse."
+            finally:
+                closed.append(first_call)
+
+        # Act
+        first = self.flight.stream("alarm", upstream)
+        head = next(first)
+        first.close()
+        second = self.flight.stream("alarm", upstream)
+        second_head = next(second)
+        joined_abandoned = self.flight.stats()["coalesced"]
+        release.set()
+        self._wait_for(lambda: True in closed)
+        third = []
+        thread = threading.Thread(target=lambda: third.extend(self.flight.stream("alarm", upstream)))
+        thread.start()
+        self._wait_for(lambda: self.flight.stats()["coalesced"] == 1)
+        finish.set()
+        second_tail = list(second)
+        thread.join(5)
+
+        # Assert
+        self.assertEqual(head, "Check ")
+        self.assertEqual(joined_abandoned, 0)
+        self.assertEqual("".join([second_head] + second_tail), "Check the fuse.")
+        self.assertEqual("".join(third), "Check the fuse.")
+        self.assertEqual(self.upstream_calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
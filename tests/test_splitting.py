@@ -0,0 +1,162 @@
+"""
+Unit tests for Markdown-aware splitting
+"""
+
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+
+from src.models.splitting import MarkdownSplitter, MarkdownCharacterSplitter, MarkdownTokenSplitter, split_sections
+from src.models.tokenizer import get_tokenizer, count_tokens
+
+GUIDE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "src", "data", "industrial_docs", "plc_programming_guide.txt"
+)
+
+
+class TestMarkdownTokenSplitter(unittest.TestCase):
+    """Test cases for MarkdownTokenSplitter class"""
+
+    def setUp(self):
+        """Load the PLC programming guide"""
+        with open(GUIDE_PATH, "r") as f:
+            self.text = f.read()
+
+    def test_tokenizer_is_cached_per_process(self):
+        """Test that the tokenizer is loaded only once"""
+        self.assertIs(get_tokenizer("gpt-3.5-turbo"), get_tokenizer("gpt-3.5-turbo"))
+
+    def test_split_sections_starts_at_headers(self):
+        """Test that every section after the first begins with a header"""
+        # Act
+        sections = split_sections(self.text)
+
+        # Assert
+        self.assertGreater(len(sections), 3)
+        for section in sections:
+            self.assertTrue(section.text.startswith("#"))
+            self.assertEqual(self.text[section.start:section.start + len(section.text)], section.text)
+        self.assertEqual(
+            sections[2].headings,
+            ("PLC Programming Best Practices", "Key Programming Languages")
+        )
+
+    def test_comments_in_fenced_code_are_not_headers(self):
+        """Test that "#" lines inside code fences neither split nor rename sections"""
+        # Arrange
+        text = (
+            "# PID Tuning\n\n## Example\n\n"
+            "```python\n# compute error\nerror = setpoint - pv\n# apply gain\noutput = kp * error\n```\n\n"
+            "~~~~bash\n# restart the runtime\n```\nsystemctl restart plc\n~~~~\n\n"
+            "Tune kp first.\n\n## Limits\n\nClamp the output."
+        )
+
+        # Act
+        sections = split_sections(text)
+        chunks = MarkdownCharacterSplitter(chunk_size=1000, chunk_overlap=100).split_documents([Document(page_content=text)])
+
+        # Assert
+        self.assertEqual([section.headings for section in sections], [
+            ("PID Tuning",), ("PID Tuning", "Example"), ("PID Tuning", "Limits")
+        ])
+        self.assertIn("# apply gain\noutput = kp * error\n```", sections[1].text)
+        self.assertIn("systemctl restart plc\n~~~~", sections[1].text)
+        example = [c for c in chunks if "compute error" in c.page_content][0]
+        self.assertEqual(example.metadata["heading_path"], "PID Tuning > Example")
+        self.assertIn("Tune kp first.", example.page_content)
+
+    def test_incomplete_splitter_fails_on_instantiation(self):
+        """Test that a subclass without _windows cannot be created"""
+        # Arrange
+        class LineSplitter(MarkdownSplitter):
+            def _measure(self, text):
+                return text.count("\n"), None
+
+        # Act & Assert
+        with self.assertRaises(TypeError):
+            LineSplitter(chunk_size=10, chunk_overlap=2)
+
+    def test_chunks_carry_heading_path(self):
+        """Test that chunks record the headings they belong to"""
+        # Arrange
+        splitter = MarkdownCharacterSplitter(chunk_size=1000, chunk_overlap=100)
+        doc = Document(page_content=self.text, metadata={"source": "plc_programming_guide.txt"})
+
+        # Act
+        chunks = splitter.split_documents([doc])
+
+        # Assert
+        languages = [c for c in chunks if "Ladder Logic (LD)" in c.page_content][0]
+        self.assertEqual(
+            languages.metadata["heading_path"],
+            "PLC Programming Best Practices > Key Programming Languages"
+        )
+        self.assertEqual(languages.metadata["h1"], "PLC Programming Best Practices")
+        self.assertEqual(languages.metadata["h2"], "Key Programming Languages")
+        self.assertNotIn("## Best Practices", languages.page_content)
+
+    def test_long_sections_keep_heading_path_in_every_window(self):
+        """Test that windows of a section larger than a chunk share its path"""
+        # Arrange
+        text = "# Valves\n\n" + " ".join(f"Valve V{i} opens on command." for i in range(100))
+        splitter = MarkdownCharacterSplitter(chunk_size=200, chunk_overlap=40)
+
+        # Act
+        chunks = splitter.split_documents([Document(page_content=text)])
+
+        # Assert
+        self.assertGreater(len(chunks), 3)
+        self.assertTrue(all(c.metadata["heading_path"] == "Valves" for c in chunks))
+
+    def test_chunks_respect_token_limit(self):
+        """Test that no chunk exceeds the token size"""
+        # Arrange
+        splitter = MarkdownTokenSplitter(chunk_size=64, chunk_overlap=8)
+
+        # Act
+        chunks = splitter.split_text(self.text)
+
+        # Assert
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk), 64)
+
+    def test_small_sections_are_packed_and_start_at_headers(self):
+        """Test that a title is packed with its first subsection"""
+        # Arrange
+        splitter = MarkdownTokenSplitter(chunk_size=400, chunk_overlap=20)
+
+        # Act
+        chunks = splitter.split_text(self.text)
+
+        # Assert
+        self.assertLess(len(chunks), len(split_sections(self.text)))
+        for chunk in chunks:
+            self.assertTrue(chunk.startswith("#"))
+
+    def test_long_section_windows_overlap(self):
+        """Test that windows over one long section share overlap text"""
+        # Arrange
+        text = " ".join(f"Step {i} closes valve V{i}." for i in range(200))
+        splitter = MarkdownTokenSplitter(chunk_size=50, chunk_overlap=10)
+
+        # Act
+        docs = splitter.split_documents([Document(page_content=text, metadata={"source": "sfc.txt"})])
+
+        # Assert
+        self.assertGreater(len(docs), 2)
+        for doc in docs:
+            start = doc.metadata["start_index"]
+            self.assertEqual(text[start:start + len(doc.page_content)], doc.page_content)
+            self.assertEqual(doc.metadata["source"], "sfc.txt")
+        first_end = docs[0].metadata["start_index"] + len(docs[0].page_content)
+        self.assertLess(docs[1].metadata["start_index"], first_end)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Unit tests for tenant overlays on a shared base collection
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.chat_models.fake import FakeListChatModel
+
+from src.models.client_registry import DEFAULT_REGISTRY
+from src.models.rag import IndustrialRAG
+from src.models.tenants import TenantManager
+from tests.test_rag import CountingFakeEmbeddings
+
+
+class TestTenantManager(unittest.TestCase):
+    """Test cases for TenantManager class"""
+
+    def setUp(self):
+        """Create shared manuals and two site corpora"""
+        os.environ["OPENAI_API_KEY"] = "sk-test-key"
+        DEFAULT_REGISTRY.clear()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.base_dir = self._write("manuals", "plc.txt", "# PLC\n\nLadder logic for PLC programming.")
+        self.site_a = self._write("site_a", "line1.txt", "# Line 1\n\nConveyor PLC uses Modbus RTU.")
+        self.site_b = self._write("site_b", "hvac.txt", "# HVAC\n\nBACnet controllers for air handling.")
+
+        self.embeddings = CountingFakeEmbeddings(size=16)
+        patcher = patch("src.models.embeddings.OpenAIEmbeddings", return_value=self.embeddings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.manager = TenantManager(self.base_dir, persist_root=os.path.join(self.tmp_dir, "index"))
+        self.manager.load_base()
+
+    def _write(self, directory, name, content):
+        path = os.path.join(self.tmp_dir, directory)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, name), "w") as f:
+            f.write(content)
+        return path
+
+    def test_shared_documents_are_embedded_once(self):
+        """Test that tenants do not re-embed the base corpus"""
+        # Arrange
+        embedded_base = self.embeddings.embedded_texts
+
+        # Act
+        tenant_a = self.manager.get_tenant("site_a", self.site_a)
+        tenant_b = self.manager.get_tenant("site_b", self.site_b)
+
+        # Assert
+        self.assertEqual(self.embeddings.embedded_texts, embedded_base + 2)
+        self.assertIs(tenant_a.embeddings, self.manager.base.embeddings)
+        self.assertIs(self.manager.get_tenant("site_a", self.site_a), tenant_a)
+        self.assertEqual(tenant_b.vectorstore._collection.count(), 1)
+        self.assertEqual(self.manager.tenants(), ["site_a", "site_b"])
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_queries_search_tenant_and_base_only(self, mock_chat_openai):
+        """Test that a tenant sees its own and the shared documents but not other tenants'"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["answer"])
+        tenant_a = self.manager.get_tenant("site_a", self.site_a)
+        self.manager.get_tenant("site_b", self.site_b)
+
+        # Act
+        result = tenant_a.query("PLC", k=4)
+
+        # Assert
+        self.assertEqual(
+            sorted(result["sources"]),
+            [os.path.join(self.base_dir, "plc.txt"), os.path.join(self.site_a, "line1.txt")]
+        )
+
+    @patch("src.models.client_registry.ChatOpenAI")
+    def test_base_changes_invalidate_tenant_answers(self, mock_chat_openai):
+        """Test that reloading the base clears cached tenant answers"""
+        # Arrange
+        mock_chat_openai.return_value = FakeListChatModel(responses=["answer"])
+        tenant_a = self.manager.get_tenant("site_a", self.site_a)
+        tenant_a.query("PLC")
+        self._write("manuals", "scada.txt", "# SCADA\n\nHMI alarm handling.")
+
+        # Act
+        self.manager.load_base()
+
+        # Assert
+        self.assertEqual(tenant_a.response_cache.stats()["size"], 0)
+
+    def test_loading_tenant_does_not_block_other_tenants(self):
+        """Test that a slow first load only makes callers of the same tenant wait"""
+        # Arrange
+        tenant_a = self.manager.get_tenant("site_a", self.site_a)
+        release = threading.Event()
+        started = threading.Event()
+        load_documents = IndustrialRAG.load_documents
+
+        def slow_load(rag):
+            if rag.collection_name == "tenant_site_b":
+                started.set()
+                release.wait(5)
+            return load_documents(rag)
+
+        results = []
+        with patch.object(IndustrialRAG, "load_documents", autospec=True, side_effect=slow_load):
+            loaders = [
+                threading.Thread(target=lambda: results.append(self.manager.get_tenant("site_b", self.site_b)))
+                for _ in range(2)
+            ]
+            for loader in loaders:
+                loader.start()
+            self.assertTrue(started.wait(5))
+
+            # Act
+            same = self.manager.get_tenant("site_a", self.site_a)
+            loading = self.manager.tenants()
+            release.set()
+            for loader in loaders:
+                loader.join(5)
+
+        # Assert
+        self.assertIs(same, tenant_a)
+        self.assertEqual(loading, ["site_a"])
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.manager.tenants(), ["site_a", "site_b"])
+
+    def test_failed_load_is_retried(self):
+        """Test that a tenant whose load failed is loaded again on the next call"""
+        # Arrange
+        with patch.object(IndustrialRAG, "load_documents", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.manager.get_tenant("site_a", self.site_a)
+
+        # Act
+        tenant = self.manager.get_tenant("site_a", self.site_a)
+
+        # Assert
+        self.assertEqual(tenant.vectorstore._collection.count(), 1)
+        self.assertEqual(self.manager.tenants(), ["site_a"])
+
+    def test_invalid_tenant_id_is_rejected(self):
+        """Test that tenant IDs are validated before naming collections"""
+        with self.assertRaises(ValueError):
+            self.manager.get_tenant("../other", self.site_a)
+
+
+if __name__ == "__main__":
+    unittest.main()